@@ -0,0 +1,179 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import json
+import socket
+import subprocess
+import tempfile
+import time
+from phase1.scraper import fetch_page, extract_book_data
+from phase2.scraper_category import fetch_category_urls
+from phase3.scraper_all_category import fetch_all_category_urls, scrape_books_parallel, scrape_category_listing
+from phase4.scraper_all import download_images_parallel
+from utils.http_client import get_client
+from utils.image_store import ImageStore
+from utils.metrics import get_metrics
+from utils.scheduler import get_scheduler
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+"""
+Benchmark hors ligne du crawler : lance le serveur local `fake_site.py` dans un processus séparé
+(latence, taux d'erreurs et taille du catalogue configurables), puis exécute les points d'entrée
+des phases 1 à 4 contre ce serveur et mesure pour chacun le débit (pages/s), le temps CPU
+du processus de crawl et le pic de mémoire (RSS).
+
+Usage :
+    python benchmarks/bench_crawl.py --books 2000 --categories 50 --latency 20 --error-rate 0.01
+    python benchmarks/bench_crawl.py --books 100000 --scenarios phase2,listing --json resultats.json
+"""
+
+SCENARIOS = ('phase1', 'phase2', 'listing', 'phase3', 'phase4')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_site(books, categories, latency_ms, error_rate, image_size):
+    """
+    Démarre le serveur local dans un sous-processus et attend qu'il soit prêt.
+
+    Returns:
+        tuple[subprocess.Popen, str]: Le processus serveur et l'URL de sa page d'accueil.
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(script_dir, 'fake_site.py'), '--port', str(port), '--books', str(books),
+         '--categories', str(categories), '--latency', str(latency_ms), '--error-rate', str(error_rate),
+         '--image-size', str(image_size)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    print(process.stdout.readline().strip())
+    return process, f"http://127.0.0.1:{port}/index.html"
+
+
+def measure(name, func):
+    """
+    Exécute un scénario et mesure sa durée, son temps CPU, son pic de RSS et le nombre de
+    pages récupérées (d'après les histogrammes 'fetch_seconds' de `utils.metrics`).
+
+    Returns:
+        tuple[object, dict]: Le résultat du scénario et ses mesures.
+    """
+    metrics = get_metrics()
+    metrics.reset()
+    usage = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+
+    pages = sum(entry['count'] for entry in metrics.snapshot()['histograms'] if entry['name'] == 'fetch_seconds')
+    report = {'scenario': name, 'pages': pages, 'seconds': elapsed, 'pages_per_sec': pages / elapsed if elapsed else 0}
+    if resource:
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        cpu = (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime)
+        report.update({
+            'cpu_seconds': cpu,
+            'cpu_percent': cpu / elapsed * 100 if elapsed else 0,
+            'peak_rss_mb': after.ru_maxrss / 1024,
+        })
+    return result, report
+
+
+def print_report(reports):
+    print(f"\n{'scénario':<10} {'pages':>8} {'durée (s)':>10} {'pages/s':>10} {'CPU (s)':>9} {'CPU %':>7} {'RSS max (Mo)':>13}")
+    for report in reports:
+        print(f"{report['scenario']:<10} {report['pages']:>8} {report['seconds']:>10.2f} {report['pages_per_sec']:>10.1f} "
+              f"{report.get('cpu_seconds', 0):>9.2f} {report.get('cpu_percent', 0):>7.0f} "
+              f"{report.get('peak_rss_mb', 0):>13.1f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark hors ligne du crawler contre un serveur local.")
+    arg_parser.add_argument('--books', type=int, default=1000, help="Nombre de livres du catalogue (jusqu'à 100000)")
+    arg_parser.add_argument('--categories', type=int, default=50, help="Nombre de catégories")
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="Latence ajoutée par réponse (ms)")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de réponses 503")
+    arg_parser.add_argument('--image-size', type=int, default=8192, help="Taille des couvertures en octets")
+    arg_parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Scénarios à exécuter, séparés par des virgules ({', '.join(SCENARIOS)})")
+    arg_parser.add_argument('--sample', type=int, default=200, help="Nombre de livres du scénario phase1 (séquentiel)")
+    arg_parser.add_argument('--parser', default='auto', help="Parseur des pages produit : bs4, lxml ou auto")
+    arg_parser.add_argument('--rate', type=float, help="Débit initial de l'ordonnanceur (requêtes/s par hôte)")
+    arg_parser.add_argument('--max-rate', type=float, help="Débit maximal de l'ordonnanceur (requêtes/s par hôte)")
+    arg_parser.add_argument('--json', help="Fichier JSON où enregistrer les résultats")
+    args = arg_parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        arg_parser.error(f"scénarios inconnus : {', '.join(sorted(unknown))}")
+
+    scheduler = get_scheduler()
+    if args.rate:
+        scheduler.initial_rate = args.rate
+    if args.max_rate:
+        scheduler.max_rate = args.max_rate
+
+    process, index_url = start_fake_site(args.books, args.categories, args.latency, args.error_rate, args.image_size)
+    session = get_client().session
+    reports = []
+    try:
+        category_urls, _ = fetch_all_category_urls(index_url, session)
+        book_urls = []
+
+        def discover():
+            for category_url in category_urls:
+                book_urls.extend(fetch_category_urls(category_url, session))
+
+        _, report = measure('phase2', discover)
+        if 'phase2' in scenarios:
+            reports.append(report)
+
+        if 'phase1' in scenarios:
+            sample = book_urls[:args.sample]
+            reports.append(measure('phase1', lambda: [extract_book_data(fetch_page(url, session), url) for url in sample])[1])
+
+        if 'listing' in scenarios:
+            reports.append(measure('listing', lambda: [
+                scrape_category_listing(category_url, session) for category_url in category_urls
+            ])[1])
+
+        books = []
+        if 'phase3' in scenarios or 'phase4' in scenarios:
+            books, report = measure('phase3', lambda: scrape_books_parallel(book_urls, session, parser=args.parser))
+            if 'phase3' in scenarios:
+                reports.append(report)
+
+        if 'phase4' in scenarios:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                store = ImageStore(os.path.join(tmp_dir, 'store'))
+                reports.append(measure('phase4', lambda: download_images_parallel(
+                    session, books, os.path.join(tmp_dir, 'covers'), store=store
+                ))[1])
+                store.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+    print_report(reports)
+    get_scheduler().print_stats()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'parameters': vars(args), 'results': reports}, f, indent=2)
+        print(f"Résultats enregistrés dans : {args.json}")
+
+
+if __name__ == "__main__":
+    main()
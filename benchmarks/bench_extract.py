@@ -0,0 +1,99 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import re
+import time
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from bench_parsers import load_corpus
+from phase1.scraper import extract_book_data
+
+"""
+Benchmark de `extract_book_data`.
+
+Mesure le coût d'extraction par page sur un corpus de pages sauvegardées face à l'ancienne
+implémentation (une recherche dans le tableau produit par champ), après avoir vérifié que
+les deux produisent la même sortie. La sortie attendue de l'extracteur est vérifiée par
+le test tests/test_extract_golden.py, sur le corpus tests/data/product_pages.
+
+Usage :
+    python benchmarks/bench_extract.py tests/data/product_pages --repeat 20
+"""
+
+
+def legacy_extract_book_data(soup, url):
+    """
+    Ancienne version de `extract_book_data`, conservée comme point de comparaison.
+    """
+    table = soup.find('table', class_='table table-striped')
+
+    def get_table_value(label):
+        th = table.find('th', string=label)
+        if th is None:
+            raise ValueError(f"[ERREUR] champ '{label}' introuvable dans le tableau")
+        td = th.find_next_sibling('td')
+        return td.text if td else "N/A"
+
+    title = soup.find('div', class_="col-sm-6 product_main").find('h1').text
+    match = re.search(r'\((\d+)\s+available\)', get_table_value('Availability'))
+    number_available = int(match.group(1)) if match else "Nombre non trouvé"
+    description_tag = soup.find('div', id='product_description')
+    product_description = description_tag.find_next_sibling('p').text \
+        if description_tag and description_tag.find_next_sibling('p') else "N/A"
+
+    review_rating_tag = soup.find('p', class_='star-rating')
+    review_rating_classes = review_rating_tag.get('class') if review_rating_tag else []
+    review_rating_text = next((cls.capitalize() for cls in review_rating_classes if cls != 'star-rating'), 'Zero')
+    review_rating_map = {'Zero': 0, 'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
+    review_rating = review_rating_map.get(review_rating_text, 0)
+
+    return {
+        'product_page_url': url,
+        'universal_product_code': get_table_value('UPC'),
+        'title': title,
+        'price_including_tax': float(get_table_value('Price (incl. tax)').replace('£', '')),
+        'price_excluding_tax': float(get_table_value('Price (excl. tax)').replace('£', '')),
+        'number_available': number_available,
+        'product_description': product_description,
+        'category': soup.find('ul', class_='breadcrumb').find_all('li')[2].text.strip(),
+        'review_rating': review_rating,
+        'image_url': urljoin(url, soup.find('div', class_='item').find('img')['src'])
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark de extract_book_data.")
+    arg_parser.add_argument('pages_dir', help="Dossier contenant les pages produit sauvegardées (.html)")
+    arg_parser.add_argument('--repeat', type=int, default=10, help="Nombre de passes sur le corpus")
+    args = arg_parser.parse_args()
+
+    pages = load_corpus(args.pages_dir)
+    if not pages:
+        print(f"[ERREUR] Aucune page .html trouvée dans {args.pages_dir}")
+        sys.exit(1)
+
+    soups = [(url, BeautifulSoup(html, 'html.parser')) for url, html in pages]
+    for url, soup in soups:
+        if legacy_extract_book_data(soup, url) != extract_book_data(soup, url):
+            print(f"[ERREUR] Sortie différente de l'ancienne implémentation : {url}")
+            sys.exit(1)
+
+    print(f"\n{len(pages)} pages, {args.repeat} passes (arbre HTML déjà construit)")
+    timings = {}
+    for name, func in (('ancienne', legacy_extract_book_data), ('actuelle', extract_book_data)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for url, soup in soups:
+                func(soup, url)
+        timings[name] = (time.perf_counter() - start) / (len(soups) * args.repeat) * 1000
+        print(f"{name:<9} : {timings[name]:.3f} ms/page")
+    print(f"Gain : {(1 - timings['actuelle'] / timings['ancienne']) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import random
+import tempfile
+import time
+from utils.saver import WRITERS
+
+"""
+Benchmark des formats d'export de `utils.saver` : temps d'écriture, taille du fichier
+et temps de relecture, sur un jeu de livres généré.
+
+Usage :
+    python benchmarks/bench_formats.py --rows 100000
+"""
+
+CATEGORIES = ['Mystery', 'Travel', 'Historical Fiction', 'Sequential Art', 'Classics', 'Philosophy']
+RATINGS = [0, 1, 2, 3, 4, 5]
+
+
+def generate_books(count, seed=0):
+    """
+    Génère des livres fictifs ayant la même structure que `extract_book_data`.
+
+    Args:
+        count (int): Nombre de livres à générer.
+        seed (int, optional): Graine du générateur aléatoire.
+
+    Returns:
+        list[dict]: Livres générés.
+    """
+    rng = random.Random(seed)
+    books = []
+    for index in range(count):
+        price = round(rng.uniform(10, 60), 2)
+        books.append({
+            'product_page_url': f"https://books.toscrape.com/catalogue/book-{index}_{index}/index.html",
+            'universal_product_code': f"{rng.getrandbits(64):016x}",
+            'title': f"Book number {index}",
+            'price_including_tax': price,
+            'price_excluding_tax': price,
+            'number_available': rng.randint(0, 22),
+            'product_description': ' '.join(rng.choice(['lorem', 'ipsum', 'dolor', 'sit', 'amet']) for _ in range(150)),
+            'category': rng.choice(CATEGORIES),
+            'review_rating': rng.choice(RATINGS),
+            'image_url': f"https://books.toscrape.com/media/cache/{index:04x}/cover.jpg",
+        })
+    return books
+
+
+def read_back(fmt, path):
+    """
+    Relit un fichier exporté et retourne le nombre de lignes lues.
+    """
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path).num_rows
+    if fmt == 'jsonl':
+        with open(path, encoding='utf-8') as f:
+            return sum(1 for line in f if json.loads(line))
+    if fmt == 'csv.gz':
+        f = gzip.open(path, mode='rt', newline='', encoding='utf-8-sig')
+    elif fmt == 'csv.zst':
+        import zstandard
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')),
+                             encoding='utf-8-sig', newline='')
+    else:
+        f = open(path, newline='', encoding='utf-8-sig')
+    with f:
+        return sum(1 for _ in csv.DictReader(f, delimiter=';'))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare les formats d'export de utils.saver.")
+    arg_parser.add_argument('--rows', type=int, default=20000, help="Nombre de livres générés")
+    args = arg_parser.parse_args()
+
+    books = generate_books(args.rows)
+    print(f"{args.rows} livres\n")
+    print(f"{'format':<9} {'écriture (s)':>13} {'taille (Mo)':>12} {'relecture (s)':>14}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt, writer_class in WRITERS.items():
+            path = os.path.join(tmp_dir, f"bench{writer_class.extension}")
+            try:
+                start = time.perf_counter()
+                with writer_class(path, books[0].keys()) as writer:
+                    writer.write_rows(books)
+                write_time = time.perf_counter() - start
+            except ImportError as e:
+                print(f"{fmt:<9} ignoré : {e}")
+                continue
+            size = os.path.getsize(path) / 1024 / 1024
+            start = time.perf_counter()
+            rows = read_back(fmt, path)
+            read_time = time.perf_counter() - start
+            assert rows == len(books), f"{fmt} : {rows} lignes relues au lieu de {len(books)}"
+            print(f"{fmt:<9} {write_time:>13.3f} {size:>12.2f} {read_time:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
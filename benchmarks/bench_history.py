@@ -0,0 +1,72 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from bench_formats import generate_books
+from utils.history import PriceHistory
+
+"""
+Benchmark de l'historique des prix (`utils.history`) : enregistre un catalogue généré sur
+plusieurs jours de scraping, puis mesure le temps des requêtes d'historique d'un prix et
+de ruptures de stock.
+
+Usage :
+    python benchmarks/bench_history.py --books 20000 --days 90
+"""
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark de l'historique des prix SQLite.")
+    arg_parser.add_argument('--books', type=int, default=20000, help="Nombre de livres du catalogue")
+    arg_parser.add_argument('--days', type=int, default=90, help="Nombre de jours de scraping simulés")
+    arg_parser.add_argument('--queries', type=int, default=200, help="Nombre de requêtes d'historique mesurées")
+    args = arg_parser.parse_args()
+
+    books = generate_books(args.books)
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        history = PriceHistory(os.path.join(tmp_dir, 'history.sqlite3'))
+        started = time.perf_counter()
+        for offset in range(args.days, 0, -1):
+            scraped_on = (date.today() - timedelta(days=offset - 1)).isoformat()
+            for book in books:
+                book['price_including_tax'] = round(book['price_including_tax'] * rng.uniform(0.98, 1.02), 2)
+                book['number_available'] = max(0, book['number_available'] + rng.randint(-2, 2))
+            by_category = {}
+            for book in books:
+                by_category.setdefault(book['category'], []).append(book)
+            for category_name, category_books in by_category.items():
+                history.record(category_name, category_books, scraped_on)
+        elapsed = time.perf_counter() - started
+        rows = args.books * args.days
+        print(f"Enregistrement : {rows} lignes en {elapsed:.1f} s ({rows / elapsed:.0f} lignes/s)")
+        print(f"Taille de la base : {os.path.getsize(history.path) / 1e6:.1f} Mo")
+
+        upcs = [rng.choice(books)['universal_product_code'] for _ in range(args.queries)]
+        started = time.perf_counter()
+        for upc in upcs:
+            history.price_history(upc, days=90)
+        print(f"Historique d'un prix (90 jours) : {(time.perf_counter() - started) / args.queries * 1000:.2f} ms/requête")
+
+        started = time.perf_counter()
+        stock_outs = history.stock_outs()
+        print(f"Ruptures de stock du dernier scraping : {len(stock_outs)} livres en "
+              f"{(time.perf_counter() - started) * 1000:.2f} ms")
+
+        started = time.perf_counter()
+        stock_outs = history.stock_outs(category=books[0]['category'])
+        print(f"Ruptures de stock d'une catégorie : {len(stock_outs)} livres en "
+              f"{(time.perf_counter() - started) * 1000:.2f} ms")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
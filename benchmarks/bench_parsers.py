@@ -0,0 +1,104 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import glob
+import time
+from utils.parsers import PARSERS, get_parser
+
+"""
+Micro-benchmark des parseurs de pages produit sur un corpus de pages sauvegardées.
+
+Vérifie que tous les parseurs produisent des dictionnaires identiques, puis mesure
+le temps moyen d'extraction par page pour chacun.
+
+Usage :
+    python benchmarks/bench_parsers.py chemin/vers/pages --repeat 5
+    python benchmarks/bench_parsers.py chemin/vers/pages --save URL_CATEGORIE
+"""
+
+PAGE_URL_PREFIX = "https://books.toscrape.com/catalogue/"
+
+
+def save_corpus(category_url, pages_dir):
+    """
+    Télécharge les pages produit d'une catégorie dans le dossier du corpus.
+
+    Args:
+        category_url (str): URL de la catégorie à sauvegarder.
+        pages_dir (str): Dossier de destination des pages HTML.
+    """
+    from phase1.scraper import fetch_html
+    from phase2.scraper_category import fetch_category_urls
+    from utils.http_client import get_client
+
+    os.makedirs(pages_dir, exist_ok=True)
+    session = get_client().session
+    for url in fetch_category_urls(category_url, session):
+        slug = url.rstrip('/').split('/')[-2]
+        with open(os.path.join(pages_dir, f"{slug}.html"), 'w', encoding='utf-8') as f:
+            f.write(fetch_html(url, session))
+
+
+def load_corpus(pages_dir):
+    """
+    Charge les pages HTML du corpus.
+
+    Args:
+        pages_dir (str): Dossier contenant les fichiers .html.
+
+    Returns:
+        list[tuple[str, str]]: Couples (URL reconstituée, contenu HTML).
+    """
+    pages = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, '*.html'))):
+        slug = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            pages.append((f"{PAGE_URL_PREFIX}{slug}/index.html", f.read()))
+    return pages
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare les parseurs de pages produit.")
+    arg_parser.add_argument('pages_dir', help="Dossier contenant les pages produit sauvegardées (.html)")
+    arg_parser.add_argument('--repeat', type=int, default=3, help="Nombre de passes sur le corpus")
+    arg_parser.add_argument('--save', metavar='URL_CATEGORIE', help="Télécharge d'abord les pages d'une catégorie")
+    args = arg_parser.parse_args()
+
+    if args.save:
+        save_corpus(args.save, args.pages_dir)
+
+    pages = load_corpus(args.pages_dir)
+    if not pages:
+        print(f"[ERREUR] Aucune page .html trouvée dans {args.pages_dir}")
+        return
+
+    parsers = []
+    for name in PARSERS:
+        try:
+            parsers.append(get_parser(name))
+        except ImportError as e:
+            print(f"[INFO] Parseur '{name}' ignoré : {e}")
+
+    reference = [parsers[0].extract(html, url) for url, html in pages]
+    for parser in parsers[1:]:
+        mismatches = [url for (url, html), expected in zip(pages, reference) if parser.extract(html, url) != expected]
+        status = "identiques" if not mismatches else f"{len(mismatches)} différences (ex : {mismatches[0]})"
+        print(f"[VERIFICATION] {parser.name} vs {parsers[0].name} : {status}")
+
+    print(f"\n{len(pages)} pages, {args.repeat} passes")
+    for parser in parsers:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for url, html in pages:
+                parser.extract(html, url)
+        per_page = (time.perf_counter() - start) / (len(pages) * args.repeat) * 1000
+        print(f"{parser.name:<6} : {per_page:.3f} ms/page")
+
+
+if __name__ == '__main__':
+    main()
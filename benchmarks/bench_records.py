@@ -0,0 +1,80 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from bench_formats import generate_books
+from utils.records import BOOK_FIELDS, BookRecord
+from utils.saver import CsvWriter
+
+"""
+Benchmark mémoire de la représentation des livres : dictionnaires de 10 clés (ancien format)
+contre `utils.records.BookRecord` (__slots__ et catégories internées).
+
+Les chaînes sont recopiées pour chaque livre, comme lorsqu'elles sont extraites d'une page HTML,
+puis la mémoire allouée par la liste de livres est mesurée avec tracemalloc. Le temps d'écriture
+CSV avec `utils.saver.CsvWriter` est mesuré pour les deux représentations.
+
+Usage :
+    python benchmarks/bench_records.py --rows 100000
+"""
+
+
+def fresh(value):
+    """
+    Retourne une copie distincte d'une chaîne (comme une valeur issue du parsing HTML).
+    """
+    return ''.join(list(value)) if isinstance(value, str) else value
+
+
+def build(books, make):
+    """
+    Construit la liste de livres avec `make` et mesure la mémoire allouée.
+
+    Returns:
+        tuple[list, int]: Les livres construits et la mémoire allouée en octets.
+    """
+    gc.collect()
+    tracemalloc.start()
+    rows = [make({field: fresh(book[field]) for field in BOOK_FIELDS}) for book in books]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return rows, size
+
+
+def time_csv(rows):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        with CsvWriter(os.path.join(tmp_dir, 'books.csv'), BOOK_FIELDS) as writer:
+            writer.write_rows(rows)
+        return time.perf_counter() - started
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark mémoire dict / BookRecord.")
+    arg_parser.add_argument('--rows', type=int, default=100000, help="Nombre de livres générés")
+    args = arg_parser.parse_args()
+
+    books = generate_books(args.rows)
+    results = {}
+    for name, make in (('dict', dict), ('BookRecord', BookRecord.from_mapping)):
+        rows, size = build(books, make)
+        results[name] = (size, time_csv(rows))
+        del rows
+
+    print(f"{'représentation':<14} {'mémoire (Mo)':>13} {'octets/livre':>13} {'écriture CSV (s)':>17}")
+    for name, (size, seconds) in results.items():
+        print(f"{name:<14} {size / 1e6:>13.1f} {size / args.rows:>13.0f} {seconds:>17.2f}")
+    saved = results['dict'][0] - results['BookRecord'][0]
+    print(f"\nGain : {saved / 1e6:.1f} Mo pour {args.rows} livres ({saved / results['dict'][0]:.0%})")
+
+
+if __name__ == "__main__":
+    main()
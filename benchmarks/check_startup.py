@@ -0,0 +1,93 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import re
+import subprocess
+import tempfile
+import time
+
+"""
+Vérification du budget de démarrage de la ligne de commande (python -m booksonline).
+
+Chaque commande est lancée plusieurs fois dans un nouveau processus ; le meilleur temps doit
+rester sous le budget, et les dépendances lourdes du crawl (requests, BeautifulSoup, lxml,
+aiohttp) ne doivent être importées ni par les commandes qui n'en ont pas besoin, ni par
+l'import des modules de phase. Le test tests/test_startup.py fait les mêmes vérifications.
+Le code de sortie est 1 si une vérification échoue (utilisable en intégration continue).
+
+Usage :
+    python benchmarks/check_startup.py --budget-ms 200
+"""
+
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'aiohttp', 'concurrent')
+IMPORT_PATTERN = re.compile(r'^import time:\s+\d+ \|\s+\d+ \|\s*(\S+)$')
+
+
+def run(args, repeat):
+    """
+    Lance `python -X importtime` avec les arguments donnés et mesure le meilleur temps.
+
+    Returns:
+        tuple[float, set[str]]: Meilleur temps en millisecondes et modules de premier niveau importés.
+    """
+    best = None
+    modules = set()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=project_root,
+                                capture_output=True, text=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise RuntimeError(f"[ERREUR] Échec de la commande {' '.join(args)} :\n{result.stderr[-2000:]}")
+        best = elapsed if best is None else min(best, elapsed)
+        for line in result.stderr.splitlines():
+            match = IMPORT_PATTERN.match(line)
+            if match:
+                modules.add(match.group(1).split('.')[0])
+    return best, modules
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Vérifie le temps de démarrage de python -m booksonline.")
+    arg_parser.add_argument('--budget-ms', type=float, default=200.0, help="Budget par commande en millisecondes")
+    arg_parser.add_argument('--repeat', type=int, default=5, help="Nombre de lancements par commande")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = os.path.join(tmp_dir, 'history.sqlite3')
+        checks = [
+            ('aide', ['-m', 'booksonline', '--help'], True),
+            ('aide crawl', ['-m', 'booksonline', 'crawl', '--help'], True),
+            ('historique', ['-m', 'booksonline', 'history', '--db', db, 'stock-outs'], True),
+            ('import phase 4', ['-c', 'import phase4.scraper_all'], True),
+            ('import réparti', ['-c', 'import phase4.sharded'], True),
+        ]
+        baseline, _ = run(['-c', 'pass'], args.repeat)
+        print(f"{'interpréteur seul':<18} {baseline:>8.1f} ms")
+
+        failures = []
+        for name, command, checked in checks:
+            elapsed, modules = run(command, args.repeat)
+            heavy = sorted(modules.intersection(HEAVY_MODULES))
+            status = ''
+            if checked and elapsed > args.budget_ms:
+                status = f"  HORS BUDGET (> {args.budget_ms:.0f} ms)"
+                failures.append(name)
+            if checked and heavy:
+                status += f"  IMPORTE {', '.join(heavy)}"
+                failures.append(name)
+            print(f"{name:<18} {elapsed:>8.1f} ms{status if checked else '  (information)'}")
+
+    if failures:
+        print(f"\n[ERREUR] Budget de démarrage dépassé : {', '.join(sorted(set(failures)))}")
+        sys.exit(1)
+    print("\nBudget de démarrage respecté.")
+
+
+if __name__ == "__main__":
+    main()
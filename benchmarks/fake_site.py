@@ -0,0 +1,280 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import hashlib
+import random
+import re
+import struct
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+Serveur HTTP local imitant Books to Scrape, pour mesurer le crawler sans dépendre du réseau.
+
+Le catalogue est généré de façon déterministe à partir de l'identifiant de chaque livre :
+aucune page n'est conservée en mémoire, ce qui permet de simuler jusqu'à 100 000 livres.
+Le serveur reproduit la structure HTML utilisée par les scrapers (accueil avec la liste des
+catégories, pages de catégorie paginées par 20, pages produit, images de couverture avec ETag)
+et peut ajouter une latence fixe et des erreurs 503 aléatoires.
+
+Usage :
+    python benchmarks/fake_site.py --books 100000 --categories 50 --latency 20 --error-rate 0.01
+"""
+
+BOOKS_PER_PAGE = 20
+RATINGS = ['Zero', 'One', 'Two', 'Three', 'Four', 'Five']
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit']
+CATEGORY_PATTERN = re.compile(r'^/catalogue/category/books/category-(\d+)_(\d+)/(index|page-(\d+))\.html$')
+BOOK_PATTERN = re.compile(r'^/catalogue/book-(\d+)_(\d+)/index\.html$')
+IMAGE_PATTERN = re.compile(r'^/media/cache/[0-9a-f]{2}/(\d+)\.jpg$')
+IMAGE_WIDTH = 64
+
+
+class FakeCatalog:
+    """
+    Catalogue généré : le livre i appartient à la catégorie i % categories.
+
+    Args:
+        books (int): Nombre total de livres.
+        categories (int): Nombre de catégories.
+        image_size (int, optional): Taille des images de couverture en octets.
+        seed (int, optional): Graine des données générées.
+    """
+
+    def __init__(self, books, categories, image_size=8192, seed=0):
+        self.books = books
+        self.categories = min(categories, books)
+        self.image_size = image_size
+        self.seed = seed
+
+    def category_name(self, category_id):
+        return f"Category {category_id}"
+
+    def category_books(self, category_id):
+        return range(category_id, self.books, self.categories)
+
+    def page_count(self, category_id):
+        return max(1, -(-len(self.category_books(category_id)) // BOOKS_PER_PAGE))
+
+    def book(self, book_id):
+        """
+        Retourne les données du livre `book_id` (identiques à chaque appel).
+        """
+        rng = random.Random(self.seed * 1_000_003 + book_id)
+        price = round(rng.uniform(10, 60), 2)
+        return {
+            'id': book_id,
+            'title': f"Book {book_id}: {' '.join(rng.choice(WORDS) for _ in range(3)).title()}",
+            'upc': f"{rng.getrandbits(64):016x}",
+            'price': price,
+            'available': rng.randint(0, 22),
+            'rating': rng.choice(RATINGS),
+            'description': ' '.join(rng.choice(WORDS) for _ in range(120)),
+            'category': book_id % self.categories,
+        }
+
+    def index_page(self):
+        items = ''.join(
+            f'<li><a href="catalogue/category/books/category-{category_id}_{category_id + 2}/index.html">'
+            f'{self.category_name(category_id)}</a></li>'
+            for category_id in range(self.categories)
+        )
+        return (
+            '<html><body><div class="side_categories"><ul class="nav nav-list"><li>'
+            '<a href="catalogue/category/books_1/index.html">Books</a>'
+            f'<ul>{items}</ul></li></ul></div></body></html>'
+        )
+
+    def category_page(self, category_id, page_number):
+        page_count = self.page_count(category_id)
+        if not 1 <= page_number <= page_count:
+            return None
+        book_ids = self.category_books(category_id)[(page_number - 1) * BOOKS_PER_PAGE:page_number * BOOKS_PER_PAGE]
+        articles = []
+        for book_id in book_ids:
+            book = self.book(book_id)
+            articles.append(
+                '<li><article class="product_pod">'
+                f'<div class="image_container"><a href="../../../book-{book_id}_{book_id + 1}/index.html">'
+                f'<img src="../../../../media/cache/{book_id % 256:02x}/{book_id}.jpg" class="thumbnail"></a></div>'
+                f'<p class="star-rating {book["rating"]}"><i class="icon-star"></i></p>'
+                f'<h3><a href="../../../book-{book_id}_{book_id + 1}/index.html" title="{escape(book["title"])}">'
+                f'{escape(book["title"][:20])}...</a></h3>'
+                f'<div class="product_price"><p class="price_color">£{book["price"]:.2f}</p>'
+                '<p class="instock availability"><i class="icon-ok"></i>\n    In stock\n</p></div>'
+                '</article></li>'
+            )
+        pager = f'<li class="current">\n    Page {page_number} of {page_count}\n</li>'
+        if page_number < page_count:
+            pager += f'<li class="next"><a href="page-{page_number + 1}.html">next</a></li>'
+        return (
+            '<html><body><form class="form-horizontal"><strong>'
+            f'{len(self.category_books(category_id))}</strong> results.</form>'
+            f'<ol class="row">{"".join(articles)}</ol><ul class="pager">{pager}</ul></body></html>'
+        )
+
+    def product_page(self, book_id):
+        if not 0 <= book_id < self.books:
+            return None
+        book = self.book(book_id)
+        category_id = book['category']
+        price = f"£{book['price']:.2f}"
+        availability = f"In stock ({book['available']} available)"
+        return (
+            '<html><body><ul class="breadcrumb"><li><a href="../../index.html">Home</a></li>'
+            '<li><a href="../category/books_1/index.html">Books</a></li>'
+            f'<li><a href="../category/books/category-{category_id}_{category_id + 2}/index.html">'
+            f'{self.category_name(category_id)}</a></li><li class="active">{escape(book["title"])}</li></ul>'
+            '<div class="row"><div class="col-sm-6"><div id="product_gallery" class="carousel"><div class="thumbnail">'
+            f'<div class="carousel-inner"><div class="item active"><img src="../../media/cache/{book_id % 256:02x}/'
+            f'{book_id}.jpg" alt="{escape(book["title"])}" /></div></div></div></div></div>'
+            f'<div class="col-sm-6 product_main"><h1>{escape(book["title"])}</h1><p class="price_color">{price}</p>'
+            f'<p class="instock availability"><i class="icon-ok"></i> {availability}</p>'
+            f'<p class="star-rating {book["rating"]}"><i class="icon-star"></i></p></div></div>'
+            '<div id="product_description" class="sub-header"><h2>Product Description</h2></div>'
+            f'<p>{book["description"]}</p>'
+            '<div class="sub-header"><h2>Product Information</h2></div><table class="table table-striped">'
+            f'<tr><th>UPC</th><td>{book["upc"]}</td></tr><tr><th>Product Type</th><td>Books</td></tr>'
+            f'<tr><th>Price (excl. tax)</th><td>{price}</td></tr><tr><th>Price (incl. tax)</th><td>{price}</td></tr>'
+            '<tr><th>Tax</th><td>£0.00</td></tr>'
+            f'<tr><th>Availability</th><td>{availability}</td></tr><tr><th>Number of reviews</th><td>0</td></tr>'
+            '</table></body></html>'
+        )
+
+    def image(self, book_id):
+        """
+        Génère une couverture décodable (BMP 24 bits de 64 pixels de large, pixels dérivés de
+        l'identifiant du livre), complétée jusqu'à `image_size` octets.
+        """
+        if not 0 <= book_id < self.books:
+            return None
+        seed = hashlib.sha256(f"{self.seed}:{book_id}".encode()).digest()
+        height = max(1, (self.image_size - 54) // (IMAGE_WIDTH * 3))
+        pixels = (seed * (IMAGE_WIDTH * 3 * height // len(seed) + 1))[:IMAGE_WIDTH * 3 * height]
+        header = b'BM' + struct.pack('<IHHI', 54 + len(pixels), 0, 0, 54) + struct.pack(
+            '<IiiHHIIiiII', 40, IMAGE_WIDTH, height, 1, 24, 0, len(pixels), 2835, 2835, 0, 0
+        )
+        body = header + pixels
+        return body + bytes(max(0, self.image_size - len(body)))
+
+
+def make_handler(catalog, latency=0.0, error_rate=0.0, seed=0):
+    """
+    Construit la classe de gestionnaire HTTP servant le catalogue.
+
+    Args:
+        catalog (FakeCatalog): Catalogue à servir.
+        latency (float, optional): Latence ajoutée à chaque réponse, en secondes.
+        error_rate (float, optional): Proportion de réponses remplacées par une erreur 503.
+        seed (int, optional): Graine du tirage des erreurs.
+    """
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class CatalogHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            if error_rate:
+                with rng_lock:
+                    failed = rng.random() < error_rate
+                if failed:
+                    self._send(503, headers={'Retry-After': '0'})
+                    return
+
+            path = self.path.split('?', 1)[0]
+            if path in ('/', '/index.html'):
+                self._send(200, catalog.index_page().encode('utf-8'))
+                return
+
+            category_match = CATEGORY_PATTERN.match(path)
+            book_match = BOOK_PATTERN.match(path)
+            image_match = IMAGE_PATTERN.match(path)
+            if category_match:
+                page = catalog.category_page(int(category_match.group(1)), int(category_match.group(4) or 1))
+            elif book_match:
+                page = catalog.product_page(int(book_match.group(1)))
+            elif image_match:
+                self._send_image(int(image_match.group(1)))
+                return
+            else:
+                page = None
+
+            if page is None:
+                self._send(404)
+            else:
+                self._send(200, page.encode('utf-8'))
+
+        def _send_image(self, book_id):
+            body = catalog.image(book_id)
+            if body is None:
+                self._send(404)
+                return
+            etag = f'"{catalog.seed}-{book_id}"'
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, headers={'ETag': etag})
+            else:
+                self._send(200, body, 'image/jpeg', {'ETag': etag})
+
+    return CatalogHandler
+
+
+def start_server(catalog, port=0, latency=0.0, error_rate=0.0):
+    """
+    Démarre le serveur dans un thread d'arrière-plan.
+
+    Returns:
+        tuple[ThreadingHTTPServer, str]: Le serveur (à arrêter avec `shutdown()`) et son URL de base.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(catalog, latency, error_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serveur local imitant Books to Scrape.")
+    arg_parser.add_argument('--port', type=int, default=8000)
+    arg_parser.add_argument('--books', type=int, default=1000, help="Nombre de livres du catalogue")
+    arg_parser.add_argument('--categories', type=int, default=50, help="Nombre de catégories")
+    arg_parser.add_argument('--image-size', type=int, default=8192, help="Taille des couvertures en octets")
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="Latence ajoutée par réponse (ms)")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de réponses 503")
+    args = arg_parser.parse_args()
+
+    catalog = FakeCatalog(args.books, args.categories, args.image_size)
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', args.port), make_handler(catalog, args.latency / 1000, args.error_rate)
+    )
+    server.daemon_threads = True
+    print(f"Catalogue de {catalog.books} livres / {catalog.categories} catégories servi sur "
+          f"http://127.0.0.1:{server.server_address[1]}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
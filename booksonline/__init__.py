@@ -0,0 +1,6 @@
+"""
+Point d'entrée en ligne de commande du projet (python -m booksonline).
+
+Le paquet ne charge rien au démarrage : chaque sous-commande importe les modules dont elle a
+besoin au moment où elle s'exécute, pour que l'aide et les requêtes d'historique démarrent vite.
+"""
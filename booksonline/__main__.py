@@ -0,0 +1,4 @@
+import sys
+from booksonline.cli import main
+
+sys.exit(main())
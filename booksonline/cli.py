@@ -0,0 +1,245 @@
+import argparse
+
+"""
+Interface en ligne de commande non interactive, utilisable depuis cron ou un script.
+
+Seul argparse est importé au démarrage : les phases (requests, BeautifulSoup...) ne sont
+chargées que par la sous-commande qui les exécute.
+
+Usage (depuis la racine du projet) :
+    python -m booksonline crawl --phase 4 --workers 30 --format parquet --cache
+    python -m booksonline crawl --phase 3 --listing-only --history
+    python -m booksonline crawl --phase 3 --archive
+    python -m booksonline replay --format jsonl --parse-workers 4
+    python -m booksonline shard run --processes 4
+    python -m booksonline history price a897fe39b1053632 --days 90
+    python -m booksonline history stock-outs --category Poetry
+    python -m booksonline menu
+"""
+
+FORMATS = ('csv', 'csv.gz', 'csv.zst', 'jsonl', 'parquet')
+ENGINES = ('threads', 'async', 'pipeline')
+DEFAULT_WORKERS = 20
+CRAWL_OPTIONS = ('engine', 'parse_workers', 'use_cache', 'delta', 'output_format', 'stream', 'record_history',
+                 'archive')
+PHASE_OPTIONS = {
+    1: (),
+    2: (),
+    3: CRAWL_OPTIONS + ('listing_only', 'fields'),
+    4: CRAWL_OPTIONS + ('resume', 'thumbnails'),
+}
+OPTION_DEFAULTS = {'engine': 'threads', 'output_format': 'csv'}
+OPTION_FLAGS = {'use_cache': '--cache', 'output_format': '--format', 'record_history': '--history'}
+
+
+def configure_scheduler(args):
+    """
+    Applique les options de débit à l'ordonnanceur partagé des requêtes.
+    """
+    if args.rate is None and args.max_rate is None:
+        return
+    from utils.scheduler import get_scheduler
+
+    scheduler = get_scheduler()
+    if args.rate is not None:
+        scheduler.initial_rate = args.rate
+    if args.max_rate is not None:
+        scheduler.max_rate = args.max_rate
+
+
+def run_crawl(args, arg_parser):
+    """
+    Lance la phase demandée avec les options de la ligne de commande.
+    """
+    allowed = set(PHASE_OPTIONS[args.phase])
+    for name in sorted(set(PHASE_OPTIONS[3] + PHASE_OPTIONS[4]) - allowed):
+        if getattr(args, name) not in (None, False, OPTION_DEFAULTS.get(name)):
+            flag = OPTION_FLAGS.get(name, f"--{name.replace('_', '-')}")
+            arg_parser.error(f"l'option {flag} n'est pas disponible en phase {args.phase}")
+    configure_scheduler(args)
+
+    if args.phase in (1, 2):
+        from utils.metrics import get_metrics, profiled, write_run_report
+
+        if args.phase == 1:
+            from phase1.scraper import main as phase_main
+        else:
+            from phase2.scraper_category import main as phase_main
+        get_metrics().reset()
+        with profiled(args.profile):
+            phase_main(**({'url': args.url} if args.url else {}))
+        if args.metrics_out:
+            write_run_report(args.metrics_out)
+    else:
+        options = {name: getattr(args, name) for name in PHASE_OPTIONS[args.phase] if name != 'fields'}
+        options['max_workers'] = args.workers
+        if args.url:
+            options['url'] = args.url
+        if args.fields is not None:
+            options['fields'] = tuple(args.fields.split(','))
+        if args.phase == 3:
+            from phase3.scraper_all_category import main as phase_main
+        else:
+            from phase4.scraper_all import main as phase_main
+        phase_main(metrics_path=args.metrics_out, profile_path=args.profile, **options)
+    return 0
+
+
+def run_history(args, arg_parser):
+    """
+    Interroge l'historique des prix et du stock (voir `utils.history`).
+    """
+    from utils.history import PriceHistory, print_price_history, print_stock_outs
+
+    history = PriceHistory(args.db) if args.db else PriceHistory()
+    try:
+        if args.query == 'price':
+            print_price_history(history, args.product, args.days)
+        else:
+            print_stock_outs(history, args.category, args.date)
+    finally:
+        history.close()
+    return 0
+
+
+def run_replay(args, arg_parser):
+    """
+    Ré-extrait hors ligne les livres d'un run archivé (voir `utils.archive`).
+    """
+    from utils.archive import ResponseArchive, print_runs, replay_archive
+
+    archive = ResponseArchive(args.archive_dir) if args.archive_dir else ResponseArchive()
+    history = None
+    try:
+        if args.list:
+            print_runs(archive)
+            return 0
+        if args.record_history:
+            from utils.history import PriceHistory
+
+            history = PriceHistory()
+        options = {'output_format': args.output_format, 'parse_workers': args.parse_workers, 'parser': args.parser}
+        if args.output_dir:
+            options['base_dir'] = args.output_dir
+        replay_archive(archive, args.run, history=history, **options)
+    except ValueError as e:
+        print(e)
+        return 1
+    finally:
+        archive.close()
+        if history is not None:
+            history.close()
+    return 0
+
+
+def run_shard(args, arg_parser):
+    """
+    Crawl réparti : les arguments sont transmis à `phase4.sharded` (plan, serve, work, merge, status, run).
+    """
+    from phase4.sharded import main as sharded_main
+
+    return sharded_main(args.shard_args)
+
+
+def run_menu(args, arg_parser):
+    """
+    Ouvre le menu interactif historique.
+    """
+    from menu import menu
+
+    menu()
+    return 0
+
+
+def build_parser():
+    """
+    Construit l'analyseur de la ligne de commande.
+
+    Returns:
+        argparse.ArgumentParser: L'analyseur, avec une sous-commande par action.
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog='booksonline', description="Surveillance des prix de Books to Scrape (python -m booksonline)."
+    )
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    crawl = commands.add_parser('crawl', help="Lance une phase de scraping")
+    crawl.set_defaults(handler=run_crawl)
+    crawl.add_argument('--phase', type=int, choices=(1, 2, 3, 4), default=4,
+                       help="1 : un livre, 2 : une catégorie, 3 : tout le site, 4 : tout le site + couvertures")
+    crawl.add_argument('--url', help="URL de départ (page produit, page de catégorie ou page d'accueil selon la phase)")
+    tuning = crawl.add_argument_group("concurrence")
+    tuning.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Threads de récupération et taille du pool de connexions ({DEFAULT_WORKERS} par défaut)")
+    tuning.add_argument('--engine', choices=ENGINES, default='threads', help="Moteur de crawl (phases 3 et 4)")
+    tuning.add_argument('--parse-workers', type=int, help="Processus dédiés au parsing des pages produit")
+    tuning.add_argument('--rate', type=float, help="Débit initial par hôte (requêtes/s)")
+    tuning.add_argument('--max-rate', type=float, help="Débit maximal par hôte (requêtes/s)")
+    output = crawl.add_argument_group("cache et sortie")
+    output.add_argument('--cache', dest='use_cache', action='store_true',
+                        help="Cache de pages persistant (requêtes conditionnelles)")
+    output.add_argument('--format', dest='output_format', choices=FORMATS, default='csv', help="Format d'export")
+    output.add_argument('--stream', action='store_true', help="Écrit les livres au fil de l'eau (mémoire bornée)")
+    output.add_argument('--delta', action='store_true',
+                        help="N'écrit que les changements depuis le run précédent (sans effet avec --listing-only)")
+    output.add_argument('--history', dest='record_history', action='store_true',
+                        help="Ajoute les prix et le stock du run à l'historique SQLite")
+    output.add_argument('--archive', action='store_true',
+                        help="Archive les pages reçues pour les ré-extraire hors ligne (sous-commande replay)")
+    output.add_argument('--listing-only', action='store_true',
+                        help="Phase 3 : lit les prix sur les pages de catégorie (fichiers listing_category_*, "
+                             "sans remplacer l'export complet du jour) ; désactive --delta et --engine")
+    output.add_argument('--fields', help="Phase 3 : colonnes du mode --listing-only, séparées par des virgules")
+    output.add_argument('--resume', action='store_true', help="Phase 4 : reprend le run précédent interrompu")
+    output.add_argument('--thumbnails', action='store_true',
+                        help="Phase 4 : produit les miniatures et le manifeste d'images de chaque catégorie (Pillow)")
+    output.add_argument('--metrics-out', help="Fichier du rapport de métriques du run (.json ou .prom)")
+    output.add_argument('--profile', help="Fichier du profil cProfile du run, threads de travail compris (ex : run.prof)")
+
+    history = commands.add_parser('history', help="Interroge l'historique des prix et du stock")
+    history.set_defaults(handler=run_history)
+    history.add_argument('--db', help="Fichier SQLite de l'historique (.cache/history.sqlite3 par défaut)")
+    queries = history.add_subparsers(dest='query', required=True)
+    price = queries.add_parser('price', help="Évolution du prix et du stock d'un livre")
+    price.add_argument('product', help="Code UPC du livre ou URL de sa page produit")
+    price.add_argument('--days', type=int, help="Nombre de jours d'historique (tout l'historique par défaut)")
+    stock = queries.add_parser('stock-outs', help="Livres en rupture de stock")
+    stock.add_argument('--category', help="Nom de la catégorie")
+    stock.add_argument('--date', help="Date du scraping (AAAA-MM-JJ, dernier scraping par défaut)")
+
+    replay = commands.add_parser('replay', help="Ré-extrait hors ligne les livres d'un run archivé (crawl --archive)")
+    replay.set_defaults(handler=run_replay)
+    replay.add_argument('--archive-dir', help="Dossier de l'archive (.cache/archive par défaut)")
+    replay.add_argument('--list', action='store_true', help="Liste les runs archivés")
+    replay.add_argument('--run', help="Identifiant du run à rejouer (AAAAMMJJ-HHMMSS, dernier run par défaut)")
+    replay.add_argument('--format', dest='output_format', choices=FORMATS, default='csv', help="Format d'export")
+    replay.add_argument('--output-dir', help="Dossier de sortie (replay/ à la racine du projet par défaut)")
+    replay.add_argument('--parse-workers', type=int, help="Processus de parsing (nombre de cœurs par défaut)")
+    replay.add_argument('--parser', choices=('auto', 'bs4', 'lxml'), default='auto', help="Parseur des pages produit")
+    replay.add_argument('--history', dest='record_history', action='store_true',
+                        help="Ajoute les livres à l'historique SQLite, à la date du run archivé")
+
+    # prefix_chars='+' : toutes les options, --help compris, sont transmises telles quelles à phase4.sharded.
+    shard = commands.add_parser('shard', add_help=False, prefix_chars='+',
+                                help="Crawl réparti sur plusieurs workers (python -m booksonline shard --help)")
+    shard.set_defaults(handler=run_shard)
+    shard.add_argument('shard_args', nargs=argparse.REMAINDER)
+
+    menu = commands.add_parser('menu', help="Menu interactif")
+    menu.set_defaults(handler=run_menu)
+    return arg_parser
+
+
+def main(argv=None):
+    """
+    Analyse la ligne de commande et exécute la sous-commande demandée.
+
+    Args:
+        argv (list[str], optional): Arguments (par défaut : ceux du processus).
+
+    Returns:
+        int: Code de sortie du processus.
+    """
+    arg_parser = build_parser()
+    args = arg_parser.parse_args(argv)
+    return args.handler(args, arg_parser)
@@ -1,3 +1,20 @@
+FORMATS = ('csv', 'csv.gz', 'csv.zst', 'jsonl', 'parquet')
+
+
+def choisir_format():
+    """
+    Demande à l'utilisateur le format d'export des fichiers de catégorie.
+
+    Returns:
+        str: Le format choisi ('csv' par défaut si la saisie est vide ou invalide).
+    """
+    choix = input(f"Format d'export ({', '.join(FORMATS)}) [csv] : ").strip().lower()
+    if choix and choix not in FORMATS:
+        print(f"Format inconnu '{choix}', utilisation du format csv.")
+        return 'csv'
+    return choix or 'csv'
+
+
 def menu():
     """
     Affiche un menu interactif permettant de lancer différentes phases du projet.
@@ -31,13 +48,13 @@ def menu():
         elif choix =='3':
             try:
                 from phase3.scraper_all_category import main as phase3_main
-                phase3_main()
+                phase3_main(output_format=choisir_format())
             except Exception as e:
                 print(f"[ERREUR] lors de l'exécution de la Phase 3 : {e}")
         elif choix =='4':
             try:
                 from phase4.scraper_all import main as phase4_main
-                phase4_main()
+                phase4_main(output_format=choisir_format())
             except Exception as e:
                 print(f"[ERREUR] lors de l'exécution de la Phase 4 : {e}")
         elif choix == '0':
@@ -1,45 +1,113 @@
-import sys
-import os
-
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.abspath(os.path.join(script_dir, '..'))
-sys.path.insert(0, project_root)
-
-import requests
-from bs4 import BeautifulSoup
 import re
 from urllib.parse import urljoin
 from utils.saver import save_to_csv
+from utils.metrics import get_metrics
+from utils.records import BookRecord
 
 """
 Script phase1 - Scrape un seul livre depuis BooksToScrape et sauvegarde ses données dans un CSV.
+
+requests et BeautifulSoup ne sont importés qu'au premier appel réseau ou à la première analyse :
+importer ce module (extraction, constantes) reste rapide.
+
+Usage (depuis la racine du projet) :
+    python -m phase1.scraper
 """
 
+URL = "https://books.toscrape.com/catalogue/a-light-in-the-attic_1000/index.html"
 CSV_FOLDER = 'CSV'
+AVAILABLE_PATTERN = re.compile(r'\((\d+)\s+available\)')
+REVIEW_RATING_MAP = {'Zero': 0, 'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
 
 
-def fetch_page(url):
+def fetch_bytes(url, session=None, level='book'):
     """
-    Récupère et parse le contenu HTML d'une page web à partir de son URL.
+    Récupère le contenu brut (octets) d'une page web.
 
     Args:
         url (str): L'URL complète de la page à récupérer.
+        session (requests.Session, optional): Session HTTP à utiliser. Par défaut, la session
+                                              du client partagé (connexions keep-alive réutilisées).
+        level (str, optional): Niveau de la page pour les métriques ('book' par défaut).
 
     Returns:
-        BeautifulSoup: Objet contenant l'arbre HTML de la page, prêt à être analysé.
-    
+        bytes: Le contenu brut de la réponse.
+
     Raises:
-        requests.exceptions.RequestException: En cas de problème réseau.
+        RuntimeError: En cas de problème réseau.
     """
+    import requests
+    from utils.http_client import get_session
+
+    metrics = get_metrics()
     try:
-        response = requests.get(url, timeout=10)
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.text, "html.parser")
-        return soup
+        with metrics.timer('fetch_seconds', level=level):
+            content = get_session(session).get(url, timeout=10).content
+        metrics.inc('bytes_fetched', len(content), level=level)
+        return content
     except requests.exceptions.RequestException as e:
+        metrics.inc('errors', level=level, stage='fetch')
         raise RuntimeError(f"[ERREUR] Echec lors de la récupération de l'URL : {url}\n-> {e}")
 
 
+def fetch_html(url, session=None):
+    """
+    Récupère le contenu HTML brut d'une page web, décodé en UTF-8.
+
+    Args:
+        url (str): L'URL complète de la page à récupérer.
+        session (requests.Session, optional): Session HTTP à utiliser. Par défaut, la session
+                                              du client partagé (connexions keep-alive réutilisées).
+
+    Returns:
+        str: Le contenu HTML de la page.
+
+    Raises:
+        RuntimeError: En cas de problème réseau.
+    """
+    return fetch_bytes(url, session).decode('utf-8', errors='replace')
+
+
+def fetch_page(url, session=None):
+    """
+    Récupère et parse le contenu HTML d'une page web à partir de son URL.
+
+    Args:
+        url (str): L'URL complète de la page à récupérer.
+        session (requests.Session, optional): Session HTTP à utiliser. Par défaut, la session
+                                              du client partagé (connexions keep-alive réutilisées).
+
+    Returns:
+        BeautifulSoup: Objet contenant l'arbre HTML de la page, prêt à être analysé.
+    
+    Raises:
+        RuntimeError: En cas de problème réseau.
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(fetch_html(url, session), "html.parser")
+
+
+def read_product_table(table):
+    """
+    Lit en une seule passe toutes les lignes du tableau "Product Information".
+
+    Args:
+        table (Tag): Balise <table> du tableau produit.
+
+    Returns:
+        dict[str, str]: Valeur textuelle de la cellule <td> associée à chaque libellé <th>
+                        ("N/A" si la cellule est absente). En cas de doublon, la première ligne l'emporte.
+    """
+    values = {}
+    for th in table.find_all('th'):
+        label = th.string
+        if label is not None and label not in values:
+            td = th.find_next_sibling('td')
+            values[label] = td.text if td else "N/A"
+    return values
+
+
 def extract_book_data(soup, url):
     """
         Extrait les informations d'un livre à partir d'une page HTML analysée avec BeautifulSoup.
@@ -49,17 +117,17 @@ def extract_book_data(soup, url):
         url (str): URL complète de la page produit
 
     Returns:
-        dict: Dictionnaire contenant les informations extraites du livre :
-            titre, prix, disponibilités, etc.
+        BookRecord: Enregistrement (accessible comme un dictionnaire) contenant les informations
+            extraites du livre : titre, prix, disponibilités, etc.
     Raises:
         RuntimeError : En cas d'échec de l'extraction d'une donnée depuis l'URL
     """
     try:
-        table = soup.find('table', class_='table table-striped')
+        table = read_product_table(soup.find('table', class_='table table-striped'))
 
         def get_table_value(label):
             """
-            Récupère une valeur dans le tableau HTML à partir d'une balise (th).
+            Récupère une valeur du tableau produit déjà lu.
 
             Args:
                 label (str): Le nom du champ (ex: 'UPC', 'Price (incl. tax)', etc.).
@@ -68,39 +136,35 @@ def extract_book_data(soup, url):
                 str: La valeur textuelle de la cellule <td> associée. Retourne "N/A" si la cellule est vide.
             Raises:
                 ValueError: Si la balise <th> correspondant au label est introuvable
-                RuntimeError: En cas d'échec de l'extraction d'une ou plusieurs données.
             """
-            th = table.find('th', string=label)
-            if th is None:
+            if label not in table:
                 raise ValueError(f"[ERREUR] champ '{label}' introuvable dans le tableau")
-            td = th.find_next_sibling('td')
-            return td.text if td else "N/A"
+            return table[label]
 
         title = soup.find('div', class_="col-sm-6 product_main").find('h1').text
-        match = re.search(r'\((\d+)\s+available\)', get_table_value('Availability'))
+        match = AVAILABLE_PATTERN.search(get_table_value('Availability'))
         number_available = int(match.group(1)) if match else "Nombre non trouvé"
         description_tag = soup.find('div', id='product_description')
-        product_description = description_tag.find_next_sibling('p').text \
-            if description_tag and description_tag.find_next_sibling('p') else "N/A"
+        description_p = description_tag.find_next_sibling('p') if description_tag else None
+        product_description = description_p.text if description_p else "N/A"
 
         review_rating_tag = soup.find('p', class_='star-rating')
         review_rating_classes = review_rating_tag.get('class') if review_rating_tag else []
         review_rating_text = next((cls.capitalize() for cls in review_rating_classes if cls != 'star-rating'), 'Zero')
-        review_rating_map = {'Zero': 0, 'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
-        review_rating = review_rating_map.get(review_rating_text, 0)
-
-        product_data = {
-        'product_page_url': url,
-        'universal_product_code': get_table_value('UPC'),
-        'title': title,
-        'price_including_tax': float(get_table_value('Price (incl. tax)').replace('£', '')),
-        'price_excluding_tax' : float(get_table_value('Price (excl. tax)').replace('£', '')),
-        'number_available': number_available,
-        'product_description': product_description,
-        'category': soup.find('ul', class_='breadcrumb').find_all('li')[2].text.strip(),
-        'review_rating': review_rating,
-        'image_url': urljoin(url, soup.find('div', class_='item').find('img')['src'])
-        }
+        review_rating = REVIEW_RATING_MAP.get(review_rating_text, 0)
+
+        product_data = BookRecord(
+        product_page_url=url,
+        universal_product_code=get_table_value('UPC'),
+        title=title,
+        price_including_tax=float(get_table_value('Price (incl. tax)').replace('£', '')),
+        price_excluding_tax=float(get_table_value('Price (excl. tax)').replace('£', '')),
+        number_available=number_available,
+        product_description=product_description,
+        category=soup.find('ul', class_='breadcrumb').find_all('li')[2].text.strip(),
+        review_rating=review_rating,
+        image_url=urljoin(url, soup.find('div', class_='item').find('img')['src'])
+        )
 
         return product_data
 
@@ -108,15 +172,16 @@ def extract_book_data(soup, url):
         raise RuntimeError(f"[ERREUR] Échec de l'extraction depuis {url} : {e}")
 
 
-def main():
+def main(url=URL):
     """
     Fonction principale du script.
 
     Enchaîne les étapes de récupération, d'extraction et de sauvegarde des données
     d'un livre à partir d'une URL donnée.
-    """
-    url = "https://books.toscrape.com/catalogue/a-light-in-the-attic_1000/index.html"
 
+    Args:
+        url (str, optional): URL de la page produit (par défaut : "A Light in the Attic").
+    """
     try:
         soup = fetch_page(url)
         book_data = extract_book_data(soup, url)
@@ -1,21 +1,212 @@
 import os
-import sys
-
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.abspath(os.path.join(script_dir, '..'))
-sys.path.insert(0, project_root)
-
 import re
-import requests
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
-from phase1.scraper import fetch_page, extract_book_data
+from phase1.scraper import fetch_page, extract_book_data, REVIEW_RATING_MAP
 from utils.saver import save_category_to_csv
+from utils.page_cache import fetch_cached
+from utils.metrics import get_metrics
 
 URL = "https://books.toscrape.com/catalogue/category/books/mystery_3/index.html"
+LISTING_PAGE_WORKERS = 8
+PAGE_COUNT_PATTERN = re.compile(r'Page\s+\d+\s+of\s+(\d+)')
+PAGE_NUMBER_PATTERN = re.compile(r'page-(\d+)\.html$')
+PRICE_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+LISTING_FIELDS = ('product_page_url', 'title', 'price_including_tax', 'availability', 'review_rating')
+# Schéma des pages de catégorie conservées dans le cache de pages : [liens, page suivante, nombre de pages,
+# données partielles des livres]. À changer lorsque `parse` (voir `iter_category_pages`) change.
+LISTING_PAGE_SCHEMA = 'category-page-v2:' + ','.join(LISTING_FIELDS)
+
+
+def article_product_url(article, page_url):
+    """
+    Retourne l'URL complète de la page produit d'un article d'une page de catégorie.
+
+    Args:
+        article (Tag): Élément `article.product_pod`.
+        page_url (str): URL de la page de catégorie, base des liens relatifs.
+
+    Returns:
+        str: L'URL complète de la page produit.
+    """
+    return urljoin(page_url, article.find('h3').find('a')['href'])
+
+
+def parse_category_page(soup, current_url):
+    """
+    Extrait les liens des livres et le lien de la page suivante d'une page de catégorie.
+
+    Args:
+        soup (BeautifulSoup): Page de catégorie analysée.
+        current_url (str): URL de la page analysée, utilisée pour résoudre les liens des livres et de la page suivante.
+
+    Raises:
+        RuntimeError: Si aucun article n'est trouvé sur la page.
+
+    Returns:
+        tuple[list[str], str | None]: Les URLs complètes des livres de la page
+        et l'URL de la page suivante (None s'il s'agit de la dernière page).
+    """
+    articles = soup.find_all('article', class_='product_pod')
+    if not articles:
+        raise RuntimeError(f"[ERREUR PARSING] Aucun article trouvé sur la page : {current_url}")
+
+    urls = []
+    for article in articles:
+        try:
+            urls.append(article_product_url(article, current_url))
+        except Exception as e:
+            print(f"[AVERTISSEMENT] Problème d'extraction d'un lien sur la page : {current_url} -> {e}")
+
+    next_li = soup.find('li', class_='next')
+    next_url = urljoin(current_url, next_li.find('a')['href']) if next_li else None
+    return urls, next_url
+
+
+def parse_listing_records(soup, current_url):
+    """
+    Extrait les données partielles des livres affichées sur une page de catégorie
+    (titre, prix, disponibilité et note), sans visiter les pages produit.
+
+    Args:
+        soup (BeautifulSoup): Page de catégorie analysée.
+        current_url (str): URL de la page analysée (base des liens relatifs).
+
+    Returns:
+        list[dict]: Un dictionnaire par livre, avec les clés de `LISTING_FIELDS`.
+    """
+    records = []
+    for article in soup.find_all('article', class_='product_pod'):
+        try:
+            rating = article.find('p', class_='star-rating')
+            rating_text = next((cls for cls in rating['class'] if cls != 'star-rating'), 'Zero') if rating else 'Zero'
+            availability = article.find('p', class_='availability')
+            records.append({
+                'product_page_url': article_product_url(article, current_url),
+                'title': article.find('h3').find('a')['title'],
+                'price_including_tax': float(PRICE_PATTERN.search(article.find('p', class_='price_color').text).group()),
+                'availability': availability.get_text(strip=True) if availability else "N/A",
+                'review_rating': REVIEW_RATING_MAP.get(rating_text.capitalize(), 0),
+            })
+        except Exception as e:
+            print(f"[AVERTISSEMENT] Problème d'extraction d'un livre sur la page : {current_url} -> {e}")
+    return records
+
+
+def parse_page_count(soup):
+    """
+    Lit le nombre total de pages d'une catégorie dans la pagination ("Page 1 of N").
+
+    Args:
+        soup (BeautifulSoup): Page de catégorie analysée.
+
+    Returns:
+        int | None: Le nombre de pages, ou None si la pagination est absente ou illisible.
+    """
+    current = soup.find('li', class_='current')
+    if current is None:
+        return None
+    match = PAGE_COUNT_PATTERN.search(current.get_text())
+    return int(match.group(1)) if match else None
+
+
+def predict_page_urls(next_url, page_count):
+    """
+    Déduit les URLs des pages 2 à N d'une catégorie à partir du lien vers la page 2.
+
+    Args:
+        next_url (str | None): URL de la page suivante, lue sur la première page.
+        page_count (int | None): Nombre total de pages annoncé par la pagination.
+
+    Returns:
+        list[str] | None: Les URLs des pages 2 à N, ou None si elles ne peuvent pas être prédites
+                          (il faut alors suivre les liens "next" un par un).
+    """
+    if next_url is None or not page_count:
+        return None
+    match = PAGE_NUMBER_PATTERN.search(next_url)
+    if match is None or match.group(1) != '2':
+        return None
+    return [urljoin(next_url, f"page-{number}.html") for number in range(2, page_count + 1)]
+
+
+def iter_category_pages(category_url, session, cache=None, workers=LISTING_PAGE_WORKERS, listing=False):
+    """
+    Parcourt les pages d'une catégorie et produit les liens des livres au fur et à mesure.
+
+    Le nombre de pages est lu sur la première page ("Page 1 of N") : les pages 2 à N sont alors
+    récupérées en parallèle via la session partagée et produites dans l'ordre dès qu'elles arrivent.
+    Si la pagination ne permet pas de prédire les URLs, les liens "next" sont suivis un par un.
 
+    Args:
+        category_url (str): L'URL de la catégorie à scraper.
+        session (requests.Session): Session HTTP réutilisable pour optimiser les requêtes réseau.
+        cache (PageCache, optional): Cache des pages. Si fourni, les pages sont demandées avec des
+                                     requêtes conditionnelles et ne sont re-parsées que si elles ont changé.
+        workers (int, optional): Nombre de pages de catégorie récupérées simultanément.
+        listing (bool, optional): Si True, produit les données partielles des livres affichées sur
+                                  chaque page (voir `parse_listing_records`) au lieu de leurs URLs.
+
+    Raises:
+        RuntimeError: En cas d'échec HTTP (connexion, statut non 200) 
+                      ou d'erreur lors du parsing HTML (articles introuvables).
 
-def fetch_category_urls(category_url, session):
+    Yields:
+        list[str] | list[dict]: Les URLs complètes (ou les données partielles) des livres d'une page, page par page.
+    """
+    import requests
+    from bs4 import BeautifulSoup
+    from concurrent.futures import ThreadPoolExecutor
+
+    metrics = get_metrics()
+
+    def parse(content, page_url):
+        with metrics.timer('parse_seconds', level='category'):
+            soup = BeautifulSoup(content.decode('utf-8', errors='replace'), 'html.parser')
+            page_urls, next_url = parse_category_page(soup, page_url)
+            return [page_urls, next_url, parse_page_count(soup), parse_listing_records(soup, page_url)]
+
+    def download(page_url):
+        with metrics.timer('fetch_seconds', level='category'):
+            response = session.get(page_url, timeout=10)
+        metrics.inc('bytes_fetched', len(response.content), level='category')
+        response.raise_for_status()
+        return parse(response.content, page_url)
+
+    def fetch(page_url):
+        try:
+            if cache is None:
+                data = download(page_url)
+            else:
+                data = fetch_cached(
+                    cache, page_url, session, lambda content: parse(content, page_url), level='category',
+                    schema=LISTING_PAGE_SCHEMA,
+                )
+        except requests.RequestException as e:
+            metrics.inc('errors', level='category', stage='fetch')
+            raise RuntimeError(f"[ERREUR HTTP] Impossible de récupérer la page {page_url} : {e}")
+        page_urls, next_url, page_count, records = data
+        return records if listing else page_urls, next_url, page_count
+
+    page_urls, current_url, page_count = fetch(category_url)
+    yield page_urls
+
+    predicted_urls = predict_page_urls(current_url, page_count)
+    if predicted_urls:
+        executor = ThreadPoolExecutor(max_workers=min(workers, len(predicted_urls)))
+        try:
+            futures = [executor.submit(fetch, page_url) for page_url in predicted_urls]
+            for future in futures:
+                yield future.result()[0]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return
+
+    while current_url:
+        page_urls, current_url, _ = fetch(current_url)
+        yield page_urls
+
+
+def fetch_category_urls(category_url, session, cache=None):
     """
     Récupère tous les liens des livres d'une catégorie donnée sur Books to Scrape.
 
@@ -24,6 +215,7 @@ def fetch_category_urls(category_url, session):
     Args:
         category_url (str): L'URL de la catégorie à scraper.
         session (requests.Session): Session HTTP réutilisable pour optimiser les requêtes réseau.
+        cache (PageCache, optional): Cache des pages pour des requêtes conditionnelles.
 
     Raises:
         RuntimeError: En cas d'échec HTTP (connexion, statut non 200) 
@@ -33,41 +225,33 @@ def fetch_category_urls(category_url, session):
         list[str]: Liste des URLs complètes des livres présents dans la catégorie.
     """
     urls = []
-    current_url = category_url
-    page_number = 1
+    for page_number, page_urls in enumerate(iter_category_pages(category_url, session, cache), start=1):
+        urls.extend(page_urls)
+        print(f"Page {page_number} traitée, {len(page_urls)} livres trouvés.")
 
-    while True:
-        try:
-            response = session.get(current_url, timeout=10)
-            response.encoding = 'utf-8'
-            response.raise_for_status()
-        except requests.RequestException as e:
-            raise RuntimeError(f"[ERREUR HTTP] Impossible de récupérer la page {current_url} : {e}")
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        articles = soup.find_all('article', class_='product_pod')
-        if not articles:
-            raise RuntimeError(f"[ERREUR PARSING] Aucun article trouvé sur la page : {current_url}")
-
-        for article in articles:
-            try:
-                relative_url = article.find('h3').find('a')['href'].replace('../', '')
-                full_url = "https://books.toscrape.com/catalogue/" + relative_url
-                urls.append(full_url)
-            except Exception as e:
-                print(f"[AVERTISSEMENT] Problème d'extraction d'un lien sur la page : {current_url} -> {e}")
+    return urls
 
-        print(f"Page {page_number} traitée, {len(articles)} livres trouvés.")
 
-        next_li = soup.find('li', class_='next')
-        if next_li:
-            next_page = next_li.find('a')['href']
-            current_url = urljoin(current_url, next_page)
-            page_number += 1
-        else:
-            break
+def fetch_category_listing(category_url, session, cache=None):
+    """
+    Récupère les données partielles de tous les livres d'une catégorie à partir des seules
+    pages de catégorie (une requête par page de 20 livres, aucune page produit).
 
-    return urls
+    Args:
+        category_url (str): L'URL de la catégorie à scraper.
+        session (requests.Session): Session HTTP réutilisable pour optimiser les requêtes réseau.
+        cache (PageCache, optional): Cache des pages pour des requêtes conditionnelles.
+
+    Raises:
+        RuntimeError: En cas d'échec HTTP ou d'erreur lors du parsing HTML.
+
+    Returns:
+        list[dict]: Les données partielles des livres (clés de `LISTING_FIELDS`).
+    """
+    records = []
+    for page_records in iter_category_pages(category_url, session, cache, listing=True):
+        records.extend(page_records)
+    return records
 
 
 def extract_category_name(url):
@@ -86,29 +270,34 @@ def extract_category_name(url):
     return match.group(1).capitalize() if match else "Inconnue"
 
 
-def main():
+def main(url=URL):
+    from utils.http_client import get_client
+
+    client = get_client()
+    session = client.session
     try:
-        with requests.Session() as session:
-            category_name = extract_category_name(URL)
-            print(f"\nDébut du scraping de la catégorie {category_name}.\n")
-
-            urls = fetch_category_urls(URL, session)
-            print(f"\nTotal des liens récupérés : {len(urls)}.\n")
-
-            all_products = []
-            for index, url in enumerate(urls, start=1):
-                try:
-                    print(f"Scraping du livre {index}/{len(urls)} (Catégorie {category_name}) : {url}\n")
-                    soup = fetch_page(url)
-                    product_data = extract_book_data(soup, url)
-                    all_products.append(product_data)
-                except Exception as e:
-                    print(f"Erreur lors du scraping du livre {url} : {e}\n")
-            
-            save_category_to_csv(all_products, category_name)
+        category_name = extract_category_name(url)
+        print(f"\nDébut du scraping de la catégorie {category_name}.\n")
+
+        urls = fetch_category_urls(url, session)
+        print(f"\nTotal des liens récupérés : {len(urls)}.\n")
+
+        all_products = []
+        for index, book_url in enumerate(urls, start=1):
+            try:
+                print(f"Scraping du livre {index}/{len(urls)} (Catégorie {category_name}) : {book_url}\n")
+                soup = fetch_page(book_url, session)
+                product_data = extract_book_data(soup, book_url)
+                all_products.append(product_data)
+            except Exception as e:
+                print(f"Erreur lors du scraping du livre {book_url} : {e}\n")
+
+        save_category_to_csv(all_products, category_name)
 
     except Exception as e:
         print(f"[ERREUR] : {e}")
+    finally:
+        client.print_connection_stats()
 
 
 if __name__ == "__main__":
@@ -1,20 +1,31 @@
+import argparse
 import os
-import sys
-
-script_dir = os.path.dirname(os.path.abspath(__file__))
-projet_root = os.path.abspath(os.path.join(script_dir, '..'))
-sys.path.insert(0, projet_root)
-import requests
-
+import threading
 import time
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from phase1.scraper import fetch_page, extract_book_data
-from phase2.scraper_category import fetch_category_urls
-from utils.saver import save_all_categories_to_csv
+from contextlib import ExitStack
+from urllib.parse import urljoin
+from phase1.scraper import fetch_bytes, fetch_html
+from phase2.scraper_category import LISTING_FIELDS, fetch_category_listing, fetch_category_urls, iter_category_pages
+from utils.saver import (
+    CategoryStreamWriter, TeeSink, get_background_writer, save_all_categories_to_csv, save_category_changes_to_csv
+)
+from utils.delta import SnapshotStore
+from utils.history import PriceHistory
+from utils.page_cache import PageCache, fetch_cached
+from utils.pipeline import Pipeline
+from utils.metrics import get_metrics, profiled, write_run_report
+from utils.records import BOOK_SCHEMA, BookRecord
+from utils.url_index import CrawlDedup, UrlIndex
 
 
 URL = "https://books.toscrape.com/index.html"
+MAX_WORKERS = 20
+ENGINES = ('threads', 'async', 'pipeline')
+LISTING_WORKERS = 4
+PARSE_WORKERS = 2
+QUEUE_SIZE = 200
+PARSE_BATCH_SIZE = 25
+LISTING_PREFIX = 'listing_category'
 
 
 def fetch_all_category_urls(category_url, session):
@@ -33,6 +44,8 @@ def fetch_all_category_urls(category_url, session):
         tuple[list[str], list[str]]: Une liste d'URLs complètes des catégories,
         et une liste des noms de ces catégories.
     """
+    from bs4 import BeautifulSoup
+
     urls = []
     category_names = []
     current_url = category_url
@@ -48,8 +61,7 @@ def fetch_all_category_urls(category_url, session):
     for li in li_elements:
         a_tag = li.find('a')
         if a_tag:
-            relative_url = a_tag['href'].replace("../", "")
-            full_url = "https://books.toscrape.com/" + relative_url
+            full_url = urljoin(current_url, a_tag['href'])
             category_name = a_tag.text.strip()
             category_names.append(category_name)
             urls.append(full_url)
@@ -57,7 +69,92 @@ def fetch_all_category_urls(category_url, session):
     return urls, category_names
     
 
-def scrape_books_parallel(book_urls):
+def _parse_batch(batch, parser_name):
+    """
+    Extrait les données d'un lot de pages produit dans un processus du pool de parsing.
+
+    Args:
+        batch (list[tuple[int, str, bytes]]): Lot de triplets (index, URL, HTML brut).
+        parser_name (str): Nom du parseur à utiliser ('bs4', 'lxml' ou 'auto').
+
+    Returns:
+        tuple[list[tuple[int, BookRecord | None]], tuple[dict, dict]]: Couples (index, données du livre ou None
+        en cas d'erreur) et métriques du lot (temps de parsing, erreurs), à fusionner dans le registre du
+        processus principal (voir `MetricsRegistry.merge`).
+    """
+    from utils.parsers import get_parser
+
+    book_parser = get_parser(parser_name)
+    results = []
+    for index, url, raw_html in batch:
+        try:
+            results.append((index, book_parser.extract(raw_html.decode('utf-8', errors='replace'), url)))
+        except Exception as e:
+            print(f"[ERREUR] Livre non traité ({url}) : {e}")
+            get_metrics().inc('errors', level='book', stage='parse')
+            results.append((index, None))
+    return results, get_metrics().drain()
+
+
+def scrape_books_multiprocess(book_urls, session=None, max_workers=MAX_WORKERS, parse_workers=None,
+                              batch_size=PARSE_BATCH_SIZE, parser='auto'):
+    """
+    Récupère les pages produit avec un pool de threads et les analyse dans un pool de processus.
+
+    Le réseau reste sur des threads (limités par le GIL mais en attente d'I/O la plupart du temps),
+    tandis que le parsing, coûteux en CPU, est réparti sur tous les cœurs. Les pages brutes sont
+    envoyées aux processus par lots pour limiter le coût de communication.
+
+    Args:
+        book_urls (list[str]): Liste des URLs des pages produit à scraper.
+        session (requests.Session, optional): Session HTTP partagée. Par défaut, celle du client partagé.
+        max_workers (int, optional): Nombre de threads de récupération (20 par défaut).
+        parse_workers (int, optional): Nombre de processus de parsing (par défaut, le nombre de cœurs).
+        batch_size (int, optional): Nombre de pages envoyées à un processus en une fois (25 par défaut).
+        parser (str, optional): Parseur des pages produit : 'bs4', 'lxml' ou 'auto'.
+
+    Returns:
+        list[BookRecord]: Données des livres, dans l'ordre de `book_urls` (les livres en erreur sont ignorés).
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+    parser_name = parser if isinstance(parser, str) else parser.name
+    results = [None] * len(book_urls)
+
+    def fetch(index, url):
+        try:
+            print(f"Livre {index + 1}/{len(book_urls)} : {url}")
+            return index, url, fetch_bytes(url, session)
+        except Exception as e:
+            print(f"[ERREUR] Livre non traité ({url}) : {e}")
+            return None
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as parse_pool, \
+            ThreadPoolExecutor(max_workers=max_workers) as fetch_pool:
+        fetch_futures = [fetch_pool.submit(fetch, index, url) for index, url in enumerate(book_urls)]
+        parse_futures = []
+        batch = []
+        for future in as_completed(fetch_futures):
+            item = future.result()
+            if item:
+                batch.append(item)
+            if len(batch) >= batch_size:
+                parse_futures.append(parse_pool.submit(_parse_batch, batch, parser_name))
+                batch = []
+        if batch:
+            parse_futures.append(parse_pool.submit(_parse_batch, batch, parser_name))
+
+        for future in parse_futures:
+            batch_results, batch_metrics = future.result()
+            get_metrics().merge(batch_metrics)
+            for index, book in batch_results:
+                results[index] = book
+
+    return [book for book in results if book]
+
+
+def scrape_books_parallel(book_urls, session=None, max_workers=MAX_WORKERS, engine='threads', parser='auto',
+                          parse_workers=None, cache=None, sink=None):
     """
     Récupère les données de plusieurs livres en parallèle à partir de leurs URLs.
 
@@ -66,42 +163,434 @@ def scrape_books_parallel(book_urls):
 
     Args:
         book_urls (list[str]): Liste des URLs des pages produit à scraper.
+        session (requests.Session, optional): Session HTTP partagée. Par défaut, celle du client partagé.
+        max_workers (int, optional): Nombre de threads de récupération (20 par défaut). Avec le moteur 'async',
+                                     nombre maximal de requêtes simultanées par hôte.
+        engine (str, optional): 'threads' (ThreadPoolExecutor) ou 'async' (moteur asyncio/aiohttp,
+                                limité par requêtes en vol plutôt que par nombre de threads ; `session`,
+                                `parse_workers` et `cache` n'y sont pas disponibles).
+        parser (str, optional): Parseur des pages produit : 'bs4', 'lxml' ou 'auto' (lxml si disponible).
+        parse_workers (int, optional): Si renseigné, le parsing est confié à un pool de processus
+                                       de cette taille (voir `scrape_books_multiprocess`).
+        cache (PageCache, optional): Cache des pages. Si fourni, chaque page produit est demandée
+                                     avec une requête conditionnelle et n'est re-parsée que si elle a changé
+                                     (prioritaire sur `parse_workers`).
+        sink (CategoryStreamWriter, optional): Sortie en flux. Si fournie, chaque livre y est écrit dès
+                                               qu'il est récupéré au lieu d'être conservé en mémoire.
 
     Returns:
-        list[dict]: Liste des dictionnaires contenant les informations extraites pour chaque livre.
-                    Les livres en erreur sont ignorés (None filtré).
+        list[BookRecord]: Liste des enregistrements (accessibles comme des dictionnaires) contenant
+                          les informations extraites pour chaque livre, dans l'ordre de `book_urls`.
+                    Les livres en erreur sont ignorés (None filtré). Liste vide si `sink` est fourni.
+
+    Raises:
+        ValueError: Si `session`, `parse_workers` ou `cache` sont fournis avec le moteur 'async'.
     """
-    results = []
+    if engine == 'async':
+        unsupported = [name for name, value in (('session', session), ('parse_workers', parse_workers),
+                                                ('cache', cache)) if value]
+        if unsupported:
+            raise ValueError(f"[ERREUR] Option(s) non disponible(s) avec le moteur 'async' : {', '.join(unsupported)}")
+        from utils.async_engine import scrape_books_async
+        return scrape_books_async(book_urls, per_host=max_workers, parser=parser, sink=sink)
+
+    if parse_workers and cache is None and sink is None:
+        return scrape_books_multiprocess(book_urls, session, max_workers, parse_workers, parser=parser)
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from utils.http_client import get_session
+    from utils.parsers import get_parser
+
+    results = [None] * len(book_urls)
+    book_parser = get_parser(parser)
 
     def process_url(index, url):
         try:
             print(f"Livre {index + 1}/{len(book_urls)} : {url}")
-            soup = fetch_page(url)
-            return extract_book_data(soup, url)
+            if cache is not None:
+                return BookRecord.from_mapping(fetch_cached(
+                    cache, url, get_session(session),
+                    lambda content: book_parser.extract(content.decode('utf-8', errors='replace'), url),
+                    level='book', schema=BOOK_SCHEMA,
+                ))
+            return book_parser.extract(fetch_html(url, session), url)
         except Exception as e:
             print(f"[ERREUR] Livre non traité ({url}) : {e}")
+            get_metrics().inc('errors', level='book', stage='scrape')
             return None
 
-    with ThreadPoolExecutor(max_workers=20) as executor:
-        future_to_url = {
-        executor.submit(process_url, index, url): url
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_index = {
+        executor.submit(process_url, index, url): index
         for index, url in enumerate(book_urls)
         }
-        for future in as_completed(future_to_url):
+        failed = []
+        for future in as_completed(future_to_index):
             result = future.result()
-            if result:
-                results.append(result)
+            if result and sink is not None:
+                sink.write(result)
+            elif result:
+                results[future_to_index[future]] = result
+            else:
+                failed.append(book_urls[future_to_index[future]])
+                continue
+            get_metrics().inc('items', level='book')
+
+    if failed:
+        print(f"[ERREUR] {len(failed)} livres non récupérés malgré les reprises : {', '.join(failed)}")
+    return [book for book in results if book]
+
+
+def scrape_category_listing(category_url, session=None, cache=None, fields=LISTING_FIELDS):
+    """
+    Mode "prix seuls" : récupère les livres d'une catégorie à partir de ses pages de catégorie,
+    sans visiter les pages produit lorsque ce n'est pas nécessaire.
+
+    Les pages produit ne sont récupérées que pour les livres absents du cache des pages
+    (nouveaux produits, afin d'y conserver leur fiche complète), ou pour tous les livres
+    si un champ absent des pages de catégorie est demandé dans `fields`.
+
+    Args:
+        category_url (str): L'URL de la première page de la catégorie.
+        session (requests.Session, optional): Session HTTP partagée. Par défaut, celle du client partagé.
+        cache (PageCache, optional): Cache des pages. Sans cache, aucun livre n'est considéré comme nouveau.
+        fields (tuple[str], optional): Colonnes à produire (par défaut `LISTING_FIELDS`). Tout champ de
+                                       `extract_book_data` est accepté.
+
+    Returns:
+        list[dict]: Un dictionnaire par livre, limité aux colonnes `fields`, dans l'ordre de la catégorie.
+    """
+    from utils.http_client import get_session
+
+    session = get_session(session)
+    records = fetch_category_listing(category_url, session, cache)
+    if set(fields) - set(LISTING_FIELDS):
+        full_urls = [record['product_page_url'] for record in records]
+    elif cache is not None:
+        full_urls = [record['product_page_url'] for record in records if cache.get(record['product_page_url']) is None]
+    else:
+        full_urls = []
+
+    if full_urls:
+        print(f"[LISTING] {len(records)} livres lus sur les pages de catégorie, {len(full_urls)} pages produit à récupérer.")
+        books = {book['product_page_url']: book for book in scrape_books_parallel(full_urls, session, cache=cache)}
+        for record in records:
+            record.update(books.get(record['product_page_url'], {}))
+
+    return [{field: record.get(field, '') for field in fields} for record in records]
+
+
+class _CategoryTracker:
+    """
+    Regroupe les livres d'une catégorie au fil du pipeline et déclenche la sauvegarde
+    lorsque tous les livres découverts pour la catégorie ont été traités.
+
+    Args:
+        on_complete (callable): Fonction appelée avec (category_name, all_books_data, listed_urls).
+    """
+
+    def __init__(self, on_complete):
+        self.on_complete = on_complete
+        self._lock = threading.Lock()
+        self._expected = {}
+        self._listed = {}
+        self._seen = {}
+        self._books = {}
+
+    def expect(self, category_name, total, listed_urls=None):
+        """
+        Enregistre le nombre total de livres découverts pour une catégorie et ses liens listés.
+        """
+        with self._lock:
+            self._expected[category_name] = total
+            self._listed[category_name] = listed_urls
+            self._seen.setdefault(category_name, 0)
+            self._books.setdefault(category_name, [])
+            completed = self._pop_if_complete(category_name)
+        if completed is not None:
+            self.on_complete(category_name, *completed)
+
+    def add(self, category_name, book):
+        """
+        Ajoute un livre traité (None si le livre est en erreur) à sa catégorie.
+        """
+        with self._lock:
+            self._seen[category_name] = self._seen.get(category_name, 0) + 1
+            if book:
+                self._books.setdefault(category_name, []).append(book)
+            completed = self._pop_if_complete(category_name)
+        if completed is not None:
+            self.on_complete(category_name, *completed)
+
+    def _pop_if_complete(self, category_name):
+        expected = self._expected.get(category_name)
+        if expected is None or self._seen.get(category_name, 0) < expected:
+            return None
+        del self._expected[category_name]
+        return self._books.pop(category_name), self._listed.pop(category_name)
+
+
+def scrape_catalog_pipelined(categories, session, save_category, download_cover=None, report_interval=5, parser='auto',
+                             dedup=None):
+    """
+    Scrape toutes les catégories avec un pipeline à étages qui se chevauchent d'une catégorie à l'autre :
+    pagination des catégories, récupération des pages produit, parsing, écriture CSV
+    et (optionnellement) téléchargement des images.
+
+    Args:
+        categories (list[tuple[str, str]]): Couples (nom de catégorie, URL de catégorie).
+        session (requests.Session): Session HTTP partagée.
+        save_category (callable): Fonction appelée avec (category_name, all_books_data, listed_urls) quand
+                                  tous les livres d'une catégorie ont été traités (voir `category_saver`).
+        download_cover (callable, optional): Fonction appelée avec (category_name, book) pour
+                                             télécharger l'image de couverture d'un livre.
+        report_interval (float, optional): Intervalle d'affichage des statistiques du pipeline (secondes).
+        parser (str, optional): Parseur des pages produit : 'bs4', 'lxml' ou 'auto'.
+        dedup (CrawlDedup, optional): Si fourni, un livre présent dans plusieurs catégories n'est récupéré
+                                      qu'une fois : son enregistrement est ajouté à chacune de ces catégories.
+
+    Returns:
+        Pipeline: Le pipeline exécuté, pour consulter ses statistiques.
+    """
+    from utils.parsers import get_parser
+
+    book_parser = get_parser(parser)
+    tracker = _CategoryTracker(save_category)
+
+    def share(category_name, future):
+        # Livre récupéré pour une autre catégorie : appelé dès que son enregistrement est publié.
+        book = future.result()
+        if book and download_cover is not None:
+            download_cover(category_name, book)
+        tracker.add(category_name, book)
+
+    def discover(category):
+        category_name, category_url = category
+        total = 0
+        listed_urls = []
+        try:
+            for page_urls in iter_category_pages(category_url, session):
+                listed_urls.extend(page_urls)
+                for url in page_urls:
+                    total += 1
+                    if dedup is None or dedup.claim(url):
+                        yield category_name, url
+                    else:
+                        dedup.shared(url).add_done_callback(lambda future, name=category_name: share(name, future))
+        finally:
+            tracker.expect(category_name, total, listed_urls)
+
+    def fetch(item):
+        category_name, url = item
+        try:
+            html = fetch_html(url, session)
+        except Exception as e:
+            print(f"[ERREUR] Livre non traité ({url}) : {e}")
+            html = None
+        yield category_name, url, html
 
-    return results
+    def parse(item):
+        category_name, url, html = item
+        book = None
+        if html is not None:
+            try:
+                book = book_parser.extract(html, url)
+            except Exception as e:
+                print(f"[ERREUR] Livre non traité ({url}) : {e}")
+        yield category_name, url, book
 
+    def collect(item):
+        category_name, url, book = item
+        tracker.add(category_name, book)
+        if book and download_cover is not None:
+            yield item
+        elif dedup is not None:
+            dedup.publish(url, book)
+
+    def download(item):
+        category_name, url, book = item
+        try:
+            download_cover(category_name, book)
+        finally:
+            # Publié après la couverture : les autres catégories n'ont plus qu'à la lier.
+            if dedup is not None:
+                dedup.publish(url, book)
+
+    pipeline = Pipeline(queue_size=QUEUE_SIZE, report_interval=report_interval)
+    pipeline.add_stage('listing', discover, workers=LISTING_WORKERS)
+    pipeline.add_stage('fetch', fetch, workers=MAX_WORKERS)
+    pipeline.add_stage('parse', parse, workers=PARSE_WORKERS)
+    pipeline.add_stage('csv', collect, workers=1)
+    if download_cover is not None:
+        pipeline.add_stage('images', download, workers=MAX_WORKERS)
+    pipeline.run(categories)
+    pipeline.print_stats()
+    return pipeline
+
+
+def index_category_urls(category_name, book_urls, url_index=None, dedup=None):
+    """
+    Met à jour l'index des URLs avec les liens d'une catégorie, puis retire les livres
+    déjà pris en charge pendant le run. Ces livres ne sont pas perdus pour la catégorie :
+    leurs enregistrements s'obtiennent avec `CrawlDedup.books` (voir `share_category_books`).
+
+    Returns:
+        list[str]: URLs des pages produit restant à récupérer.
+    """
+    if url_index is not None:
+        added, removed = url_index.update_category(category_name, book_urls)
+        if added or removed:
+            print(f"[INDEX] Catégorie {category_name} : {added} liens ajoutés, {removed} retirés.")
+    if dedup is None:
+        return book_urls
+    remaining = dedup.claim_all(book_urls)
+    if len(remaining) < len(book_urls):
+        print(f"[DEDOUBLONNAGE] {len(book_urls) - len(remaining)} livres déjà récupérés dans une autre catégorie, "
+              f"repris sans nouvelle requête.")
+    return remaining
+
+
+def share_category_books(dedup, listed_urls, book_urls, all_books_data):
+    """
+    Complète les livres récupérés pour une catégorie avec ceux qu'elle partage avec d'autres catégories.
+
+    Les livres récupérés sont publiés pour les catégories suivantes, puis les livres de la catégorie
+    sont retournés dans l'ordre de ses liens : chaque catégorie conserve tous les livres qu'elle liste.
+
+    Args:
+        dedup (CrawlDedup): Livres pris en charge pendant le run.
+        listed_urls (list[str]): Liens listés par la catégorie.
+        book_urls (list[str]): Liens récupérés pour cette catégorie (voir `index_category_urls`).
+        all_books_data (list[dict]): Livres récupérés pour ces liens.
+
+    Returns:
+        list[dict]: Les livres de la catégorie, un par livre distinct.
+    """
+    for book in all_books_data:
+        dedup.write(book)
+    dedup.release(book_urls)
+    return dedup.books(listed_urls)
+
+
+def category_saver(base_dir, delta_store=None, output_format='csv', history=None, url_index=None,
+                   prefix='products_category'):
+    """
+    Construit la fonction de sauvegarde d'une catégorie utilisée par tous les moteurs de crawl.
+
+    Args:
+        base_dir (str): Dossier de base des CSV (ex : phase3, phase4).
+        delta_store (SnapshotStore, optional): Si fourni, seul le journal des changements
+                                               (ajouts, retraits, prix et stock modifiés) est écrit.
+        output_format (str, optional): Format d'export des catégories ('csv', 'csv.gz', 'csv.zst', 'jsonl', 'parquet').
+        history (PriceHistory, optional): Si fourni, les livres sont aussi ajoutés à l'historique des prix.
+        url_index (UrlIndex, optional): Si fourni, l'UPC de chaque page produit y est enregistré.
+        prefix (str, optional): Préfixe des fichiers de catégorie ('listing_category' en mode "prix seuls").
+
+    Returns:
+        callable: Fonction (category_name, all_books_data, listed_urls=None) qui enregistre la catégorie.
+                  `listed_urls` (liens listés par la catégorie) évite, en mode delta, de signaler comme
+                  retirés les livres dont la récupération a échoué.
+    """
+    def save_category(category_name, all_books_data, listed_urls=None):
+        if history is not None:
+            history.record(category_name, all_books_data)
+        if url_index is not None:
+            url_index.record_products(all_books_data)
+        if delta_store is not None:
+            changes = delta_store.apply(category_name, all_books_data, listed_urls)
+            save_category_changes_to_csv(changes, category_name, base_dir)
+        else:
+            save_all_categories_to_csv(all_books_data, category_name, base_dir, fmt=output_format, prefix=prefix)
+
+    return save_category
+
+
+def crawl_all(engine='threads', parse_workers=None, use_cache=False, delta=False, output_format='csv', stream=False,
+              listing_only=False, fields=LISTING_FIELDS, record_history=False, max_workers=MAX_WORKERS, url=URL,
+              archive=False):
+    """
+    Scrape toutes les catégories du site et enregistre un CSV par catégorie.
+
+    Les liens découverts sont conservés dans l'index des URLs (`utils.url_index`), et un livre
+    présent dans plusieurs catégories n'est récupéré qu'une fois par run : son enregistrement
+    figure dans le fichier de chacune de ces catégories.
+
+    Args:
+        engine (str, optional): 'threads' pour traiter les catégories une à une avec un pool de threads,
+                                'async' pour crawler toutes les catégories dans une seule boucle asyncio,
+                                'pipeline' pour un pipeline à étages chevauchant toutes les catégories.
+        parse_workers (int, optional): Avec le moteur 'threads', nombre de processus dédiés au parsing
+                                       des pages produit (désactivé par défaut).
+        use_cache (bool, optional): Avec le moteur 'threads', active le cache de pages persistant
+                                    (requêtes conditionnelles, pas de re-parsing des pages inchangées).
+        delta (bool, optional): N'écrit que le journal des produits ajoutés, retirés ou modifiés
+                                depuis le run précédent, au lieu du CSV complet de chaque catégorie.
+        output_format (str, optional): Format d'export des catégories : 'csv' (par défaut), 'csv.gz',
+                                       'csv.zst', 'jsonl' ou 'parquet'.
+        stream (bool, optional): Avec le moteur 'threads', écrit les livres au fil de l'eau (mémoire bornée,
+                                 renommage atomique en fin de catégorie). Ignoré en mode delta.
+        listing_only (bool, optional): Mode "prix seuls" : les livres sont lus sur les pages de catégorie
+                                       (voir `scrape_category_listing`). Active le cache de pages, ignore
+                                       le moteur et désactive le mode delta. Les fichiers sont nommés
+                                       listing_category_<catégorie>_<date> : ils ne remplacent pas l'export
+                                       complet du jour.
+        fields (tuple[str], optional): Colonnes produites en mode "prix seuls" (par défaut `LISTING_FIELDS`).
+        record_history (bool, optional): Ajoute les prix et le stock du run à l'historique SQLite
+                                         (voir `utils.history`), quel que soit le moteur ou le mode.
+        max_workers (int, optional): Avec le moteur 'threads', nombre de threads de récupération
+                                     des pages produit et taille du pool de connexions (20 par défaut).
+        url (str, optional): URL de la page d'accueil listant les catégories.
+        archive (bool, optional): Archive les pages HTML reçues (voir `utils.archive`) pour pouvoir
+                                  les ré-extraire hors ligne (python -m booksonline replay).
+    """
+    from utils.archive import ResponseArchive
+    from utils.http_client import get_client
 
-def main():
     start_time = time.time()
-    with requests.Session() as session:
-        print(f"\nDébut du scraping de toutes les catégories/livres du site.\n")
-        category_urls, category_names = fetch_all_category_urls(URL, session)
-        total_category = len(category_urls)
-        print(f"Nombre total de catégories : {total_category}\n")
+    client = get_client(pool_size=max_workers)
+    session = client.session
+    response_archive = ResponseArchive().attach(session) if archive else None
+    if listing_only:
+        if delta or engine != 'threads':
+            print("[LISTING] Mode prix seuls : moteur 'threads', mode delta désactivé.")
+        engine, use_cache, delta = 'threads', True, False
+    cache = PageCache() if use_cache else None
+    phase3_dir = os.path.dirname(os.path.abspath(__file__))
+    delta_store = SnapshotStore() if delta else None
+    history = PriceHistory() if record_history else None
+    url_index = UrlIndex()
+    dedup = CrawlDedup(url_index.upc_map())
+    save_category = category_saver(phase3_dir, delta_store, output_format, history, url_index,
+                                   LISTING_PREFIX if listing_only else 'products_category')
+    print(f"\nDébut du scraping de toutes les catégories/livres du site.\n")
+    category_urls, category_names = fetch_all_category_urls(url, session)
+    url_index.update_categories(zip(category_names, category_urls))
+    total_category = len(category_urls)
+    print(f"Nombre total de catégories : {total_category}\n")
+
+    if engine == 'async':
+        from utils.async_engine import crawl_categories_async
+
+        crawl_categories_async(list(zip(category_names, category_urls)), save_category, dedup=dedup,
+                               archive=response_archive)
+        duration = time.time() - start_time
+        print(f"Durée d'exécution : {duration:.2f} secondes")
+        dedup.print_report()
+        if response_archive is not None:
+            response_archive.print_report()
+            response_archive.close()
+        return
+
+    if engine == 'pipeline':
+        scrape_catalog_pipelined(list(zip(category_names, category_urls)), session, save_category, dedup=dedup)
+        duration = time.time() - start_time
+        print(f"Durée d'exécution : {duration:.2f} secondes")
+        client.print_connection_stats()
+        dedup.print_report()
+        if response_archive is not None:
+            response_archive.print_report()
+            response_archive.close()
+        return
     
     for index, (category_name, category_url) in enumerate(zip(category_names, category_urls), start=1):
         print(f"""
@@ -111,13 +600,79 @@ Lien de la catégorie {category_name} : {category_url}
 ______________________________________________________
 
 """)
-        book_urls = fetch_category_urls(category_url, session)
-        all_books_data = scrape_books_parallel(book_urls)
-        phase3_dir = os.path.dirname(os.path.abspath(__file__))
-        save_all_categories_to_csv(all_books_data, category_name, phase3_dir)
+        category_started = time.perf_counter()
+        if listing_only:
+            save_category(category_name, scrape_category_listing(category_url, session, cache, fields))
+        elif stream and not delta:
+            listed_urls = fetch_category_urls(category_url, session, cache)
+            book_urls = index_category_urls(category_name, listed_urls, url_index, dedup)
+            with ExitStack() as stack:
+                sinks = [stack.enter_context(CategoryStreamWriter(category_name, phase3_dir, output_format)),
+                         stack.enter_context(url_index.product_writer())]
+                if history is not None:
+                    sinks.append(stack.enter_context(history.writer(category_name)))
+                sink = TeeSink(*sinks, dedup)
+                scrape_books_parallel(book_urls, session, max_workers, cache=cache, sink=sink)
+                dedup.release(book_urls)
+                for book in dedup.books(listed_urls, skip=book_urls):
+                    sink.write(book)
+        else:
+            listed_urls = fetch_category_urls(category_url, session, cache)
+            book_urls = index_category_urls(category_name, listed_urls, url_index, dedup)
+            all_books_data = scrape_books_parallel(book_urls, session, max_workers, parse_workers=parse_workers,
+                                                   cache=cache)
+            all_books_data = share_category_books(dedup, listed_urls, book_urls, all_books_data)
+            save_category(category_name, all_books_data, listed_urls)
+        get_metrics().observe('category_seconds', time.perf_counter() - category_started)
+        get_metrics().inc('items', level='category')
         duration = time.time() - start_time
         print(f"Durée d'exécution : {duration:.2f} secondes")
 
+    client.print_connection_stats()
+    dedup.print_report()
+    url_index.close()
+    if cache is not None:
+        cache.print_report()
+        cache.close()
+    if history is not None:
+        history.close()
+    if response_archive is not None:
+        response_archive.print_report()
+        response_archive.close()
+
+
+def main(metrics_path=None, profile_path=None, **options):
+    """
+    Lance le crawl complet (voir `crawl_all` pour les options), avec rapport de métriques
+    et profil cProfile optionnels.
+
+    Args:
+        metrics_path (str, optional): Fichier du rapport de métriques du run ('.json' ou '.prom').
+        profile_path (str, optional): Fichier du profil cProfile du run (ex : run.prof).
+        **options: Options transmises à `crawl_all` (engine, use_cache, delta, output_format...).
+    """
+    get_metrics().reset()
+    with profiled(profile_path):
+        crawl_all(**options)
+        get_background_writer().flush()
+    if metrics_path:
+        write_run_report(metrics_path)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Phase 3 : scrape toutes les catégories du site.")
+    arg_parser.add_argument('--listing-only', action='store_true',
+                            help="Mode prix seuls : lit les livres sur les pages de catégorie "
+                                 "(fichiers listing_category_*, sans mode delta)")
+    arg_parser.add_argument('--fields', default=','.join(LISTING_FIELDS),
+                            help="Colonnes produites en mode prix seuls, séparées par des virgules")
+    arg_parser.add_argument('--history', action='store_true',
+                            help="Ajoute les prix et le stock du run à l'historique SQLite (python -m utils.history)")
+    arg_parser.add_argument('--archive', action='store_true',
+                            help="Archive les pages reçues pour un rejeu hors ligne (python -m booksonline replay)")
+    arg_parser.add_argument('--metrics-out', help="Fichier du rapport de métriques du run (.json ou .prom)")
+    arg_parser.add_argument('--profile', help="Fichier du profil cProfile du run, threads de travail compris (ex : run.prof)")
+    args = arg_parser.parse_args()
+    main(metrics_path=args.metrics_out, profile_path=args.profile,
+         listing_only=args.listing_only, fields=tuple(args.fields.split(',')), record_history=args.history,
+         archive=args.archive)
\ No newline at end of file
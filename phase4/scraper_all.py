@@ -1,78 +1,345 @@
+import argparse
+import hashlib
 import os
-import sys
-script_dir = os.path.dirname(os.path.abspath(__file__))
-projet_root = os.path.abspath(os.path.join(script_dir, '..'))
-sys.path.insert(0, projet_root)
-
-import requests
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from phase2.scraper_category import fetch_category_urls
-from phase3.scraper_all_category import fetch_all_category_urls, scrape_books_parallel
-from utils.saver import save_all_categories_to_csv
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+from phase2.scraper_category import iter_category_pages
+from phase3.scraper_all_category import (
+    fetch_all_category_urls, scrape_books_parallel, scrape_catalog_pipelined, category_saver, index_category_urls,
+    share_category_books, MAX_WORKERS
+)
+from utils.delta import SnapshotStore
+from utils.history import PriceHistory
+from utils.saver import CategoryStreamWriter, TeeSink, get_background_writer
+from utils.checkpoint import CheckpointJournal
 from utils.cleaner import clean_filename
+from utils.image_store import ImageStore, fetch_image, get_image_store
+from utils.metrics import get_metrics, profiled, write_run_report
+from utils.page_cache import PageCache
+from utils.url_index import CrawlDedup, UrlIndex
 
 
 URL = "https://books.toscrape.com/index.html"
 
 
-def download_images_parallel(session, all_books_data, book_cover_dir):
+def cover_image_path(book, book_cover_dir):
+    """
+    Construit le chemin du fichier image de couverture d'un livre.
+
+    Args:
+        book (dict): Données du livre, incluant les clés 'image_url' et 'title'.
+        book_cover_dir (str): Dossier où sont enregistrées les images.
+
+    Returns:
+        str: Chemin du fichier image (titre nettoyé et limité à 50 caractères, suivi d'une empreinte
+             courte de l'URL de l'image pour distinguer les titres tronqués identiques, + extension).
+    """
+    safe_title = clean_filename(book["title"], max_length=50)
+    url_hash = hashlib.sha1(book["image_url"].encode('utf-8')).hexdigest()[:8]
+    extension = os.path.splitext(urlsplit(book["image_url"]).path)[1] or ".jpg"
+    return os.path.join(book_cover_dir, f"{safe_title}_{url_hash}{extension}")
+
+
+def download_cover(session, book, book_cover_dir, store=None):
+    """
+    Récupère l'image de couverture d'un livre dans le stockage d'images et la lie dans le dossier de la catégorie.
+
+    L'image n'est téléchargée (par blocs) que si elle est absente du stockage ; sinon elle est
+    re-validée par une requête conditionnelle, au plus une fois par run.
+
+    Args:
+        session (requests.Session): Session HTTP partagée.
+        book (dict): Données du livre, incluant les clés 'image_url' et 'title'.
+        book_cover_dir (str): Dossier où placer l'image.
+        store (ImageStore, optional): Stockage des images (par défaut, le stockage partagé).
+
+    Returns:
+        bool: True si l'image est disponible dans le dossier, False sinon.
+    """
+    image_url = book["image_url"]
+    store = store if store is not None else get_image_store()
+
+    try:
+        ImageStore.link(fetch_image(store, session, image_url), cover_image_path(book, book_cover_dir))
+        return True
+    except Exception as e:
+        print(f"[ERREUR] Téléchargement échoué ({image_url}) : {e}")
+        get_metrics().inc('errors', level='image', stage='download')
+        return False
+
+
+def download_images_parallel(session, all_books_data, book_cover_dir, max_workers=MAX_WORKERS, engine='threads',
+                             on_done=None, store=None):
     """
     Télécharge en parallèle les images de couverture de tous les livres d'une catégorie.
 
-    Chaque image est enregistrée dans un dossier spécifique en fonction du nom du livre, 
-    nettoyé et limité à 50 caractères. Si le fichier image existe déjà, le téléchargement est ignoré.
+    Chaque image est enregistrée une seule fois dans le stockage d'images adressé par contenu
+    (voir `utils.image_store`), puis liée dans le dossier de la catégorie sous le nom du livre.
 
     Args:
         session (requests.Session): Session HTTP partagée pour réutiliser la connexion.
         all_books_data (list[dict]): Liste de dictionnaires contenant les données des livres,
                                      incluant les clés 'image_url' et 'title'.
         book_cover_dir (str): Chemin du dossier où enregistrer les images (ex : /phase4/CSV/Catégorie/Book_Cover).
+        max_workers (int, optional): Nombre de threads de téléchargement (20 par défaut).
+        engine (str, optional): 'threads' (ThreadPoolExecutor) ou 'async' (moteur asyncio/aiohttp).
+        on_done (callable, optional): Fonction appelée avec l'URL de chaque image disponible sur le disque
+                                      (moteur 'threads' uniquement), ex : enregistrement dans le journal de reprise.
+        store (ImageStore, optional): Stockage des images (par défaut, le stockage partagé).
 
     Side Effects:
         Crée le dossier `book_cover_dir` s’il n’existe pas déjà.
-        Télécharge les fichiers images et les enregistre sur le disque.
+        Télécharge les images absentes du stockage et crée les liens dans `book_cover_dir`.
 
     Notes:
-        - Utilise un ThreadPoolExecutor pour paralléliser les téléchargements (max_workers=20).
+        - Utilise un ThreadPoolExecutor pour paralléliser les téléchargements (max_workers threads).
         - Affiche une erreur pour chaque image non téléchargeable.
     """
+    if engine == 'async':
+        from utils.async_engine import download_images_async
+        download_images_async(all_books_data, book_cover_dir)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
     os.makedirs(book_cover_dir, exist_ok=True)
 
-    # Télécharge l'image d'un seul livre si elle n'existe pas déjà localement.
-    def process(book):
-        image_url = book["image_url"]
-        title = book["title"]
-        safe_title = clean_filename(title, max_length=50)
-        extension = os.path.splitext(image_url)[1] or ".jpg"
-        image_path = os.path.join(book_cover_dir, f"{safe_title}{extension}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_url = {
+            executor.submit(download_cover, session, book, book_cover_dir, store): book["image_url"]
+            for book in all_books_data
+        }
+        for future in as_completed(future_to_url):
+            if future.result() and on_done is not None:
+                on_done(future_to_url[future])
+
+
+def category_cover_dir(phase4_dir, category_name):
+    """
+    Retourne le dossier des images de couverture d'une catégorie.
+
+    Args:
+        phase4_dir (str): Dossier de la phase 4.
+        category_name (str): Nom brut de la catégorie.
+
+    Returns:
+        str: Chemin du dossier 'Book_Cover' de la catégorie.
+    """
+    return os.path.join(phase4_dir, "CSV", clean_filename(category_name), "Book_Cover")
+
+
+def discover_category_urls(category_name, category_url, session, journal, cache=None):
+    """
+    Récupère les liens des livres d'une catégorie en enregistrant chaque page explorée dans le journal.
+
+    Si la pagination de la catégorie a déjà été entièrement explorée lors d'un run précédent,
+    les liens sont relus depuis le journal sans requête réseau. Une pagination interrompue
+    est reprise depuis la première page.
+
+    Args:
+        category_name (str): Nom de la catégorie.
+        category_url (str): URL de la première page de la catégorie.
+        session (requests.Session): Session HTTP partagée.
+        journal (CheckpointJournal): Journal de reprise.
+        cache (PageCache, optional): Cache des pages pour des requêtes conditionnelles.
+
+    Returns:
+        list[str]: Liste des URLs complètes des livres de la catégorie.
+    """
+    urls = journal.listing_urls(category_name)
+    if urls is not None:
+        print(f"[REPRISE] {len(urls)} liens de la catégorie {category_name} relus depuis le journal.")
+        return urls
+
+    urls = []
+    for page_number, page_urls in enumerate(iter_category_pages(category_url, session, cache), start=1):
+        journal.record_listing_page(category_name, page_number, page_urls)
+        urls.extend(page_urls)
+        print(f"Page {page_number} traitée, {len(page_urls)} livres trouvés.")
+    journal.mark_listing_done(category_name)
+    return urls
 
-        if os.path.exists(image_path):
-            return
 
-        try:
-            response = session.get(image_url, timeout=10)
-            response.raise_for_status()
-            with open(image_path, 'wb') as f:
-                f.write(response.content)
-        except Exception as e:
-            print(f"[ERREUR] Téléchargement échoué ({image_url}) : {e}")
+def scrape_category_resumable(category_name, book_urls, session, journal, cache=None, sink=None,
+                              parse_workers=None, max_workers=MAX_WORKERS):
+    """
+    Récupère les livres d'une catégorie en ignorant ceux déjà enregistrés dans le journal de reprise.
 
-    with ThreadPoolExecutor(max_workers=20) as executor:
-        futures = [executor.submit(process, book) for book in all_books_data]
-        for future in as_completed(futures):
-            future.result()
+    Args:
+        category_name (str): Nom de la catégorie.
+        book_urls (list[str]): URLs des pages produit de la catégorie.
+        session (requests.Session): Session HTTP partagée.
+        journal (CheckpointJournal): Journal de reprise.
+        cache (PageCache, optional): Cache des pages pour des requêtes conditionnelles.
+        sink (CategoryStreamWriter, optional): Sortie en flux ; les livres déjà récupérés y sont écrits en premier.
+        parse_workers (int, optional): Nombre de processus de parsing (sans sortie en flux uniquement ;
+                                       les livres sont alors enregistrés dans le journal par catégorie).
+        max_workers (int, optional): Nombre de threads de récupération (20 par défaut).
+
+    Returns:
+        list[dict] | None: Les livres de la catégorie dans l'ordre de `book_urls`, ou None si `sink` est fourni.
+    """
+    done = journal.products(category_name)
+    remaining = [url for url in book_urls if url not in done]
+    if done:
+        print(f"[REPRISE] {len(book_urls) - len(remaining)} livres déjà récupérés, {len(remaining)} restants.")
 
+    if sink is not None:
+        for url in book_urls:
+            if url in done:
+                sink.write(done[url])
+        scrape_books_parallel(remaining, session, max_workers, cache=cache,
+                              sink=TeeSink(journal.product_sink(category_name), sink))
+        return None
+
+    if parse_workers:
+        for book in scrape_books_parallel(remaining, session, max_workers, parse_workers=parse_workers, cache=cache):
+            journal.record_product(category_name, book)
+    else:
+        scrape_books_parallel(remaining, session, max_workers, cache=cache, sink=journal.product_sink(category_name))
+
+    done = journal.products(category_name)
+    return [done[url] for url in book_urls if url in done]
+
+
+def crawl_all(engine='threads', parse_workers=None, use_cache=False, delta=False, output_format='csv', stream=False,
+              resume=False, record_history=False, max_workers=MAX_WORKERS, url=URL, archive=False, thumbnails=False):
+    """
+    Scrape toutes les catégories du site, enregistre un CSV par catégorie
+    et télécharge les images de couverture.
+
+    Comme en phase 3, les liens découverts sont conservés dans l'index des URLs et un livre
+    présent dans plusieurs catégories n'est récupéré (et sa couverture téléchargée) qu'une fois par run :
+    il figure dans le fichier et le dossier Book_Cover de chacune de ces catégories.
+
+    Args:
+        engine (str, optional): 'threads' pour traiter les catégories une à une avec des pools de threads,
+                                'async' pour crawler catégories, livres et images dans une seule boucle asyncio,
+                                'pipeline' pour un pipeline à étages chevauchant toutes les catégories.
+        parse_workers (int, optional): Avec le moteur 'threads', nombre de processus dédiés au parsing
+                                       des pages produit (désactivé par défaut).
+        use_cache (bool, optional): Avec le moteur 'threads', active le cache de pages persistant
+                                    (requêtes conditionnelles, pas de re-parsing des pages inchangées).
+        delta (bool, optional): N'écrit que le journal des produits ajoutés, retirés ou modifiés
+                                depuis le run précédent, au lieu du CSV complet de chaque catégorie.
+        output_format (str, optional): Format d'export des catégories : 'csv' (par défaut), 'csv.gz',
+                                       'csv.zst', 'jsonl' ou 'parquet'.
+        stream (bool, optional): Avec le moteur 'threads', écrit les livres au fil de l'eau (mémoire bornée,
+                                 renommage atomique en fin de catégorie). Ignoré en mode delta.
+        resume (bool, optional): Avec le moteur 'threads', reprend le run précédent à partir du journal
+                                 de reprise : les catégories terminées, les livres récupérés et les images
+                                 téléchargées sont ignorés, seuls le travail restant et les échecs sont refaits.
+        record_history (bool, optional): Ajoute les prix et le stock du run à l'historique SQLite
+                                         (voir `utils.history`), quel que soit le moteur ou le mode.
+        max_workers (int, optional): Avec le moteur 'threads', nombre de threads de récupération des pages
+                                     produit et de téléchargement des images, et taille du pool de connexions.
+        url (str, optional): URL de la page d'accueil listant les catégories.
+        archive (bool, optional): Archive les pages HTML reçues (voir `utils.archive`) pour pouvoir
+                                  les ré-extraire hors ligne (python -m booksonline replay).
+        thumbnails (bool, optional): Produit les miniatures des couvertures et le manifeste d'images
+                                     de chaque catégorie dans un pool de processus (voir `utils.thumbnails`,
+                                     nécessite Pillow). Les couvertures inchangées ne sont pas retraitées.
+    """
+    from utils.archive import ResponseArchive
+    from utils.http_client import get_client
+    from utils.thumbnails import ThumbnailStage
 
-def main():
     start_time = time.time()
-    with requests.Session() as session:
-        print(f"\nDébut du scraping de toutes les catégories/livres du site.\n")
-        category_urls, category_names = fetch_all_category_urls(URL, session)
-        total_category = len(category_urls)
-        print(f"Nombre total de catégories : {total_category}\n")
+    client = get_client(pool_size=max_workers)
+    session = client.session
+    response_archive = ResponseArchive().attach(session) if archive else None
+    cache = PageCache() if use_cache else None
+    phase4_dir = os.path.dirname(os.path.abspath(__file__))
+    delta_store = SnapshotStore() if delta else None
+    history = PriceHistory() if record_history else None
+    url_index = UrlIndex()
+    dedup = CrawlDedup(url_index.upc_map())
+    save_category = category_saver(phase4_dir, delta_store, output_format, history, url_index)
+    thumbnail_stage = ThumbnailStage() if thumbnails else None
+    print(f"\nDébut du scraping de toutes les catégories/livres du site.\n")
+    category_urls, category_names = fetch_all_category_urls(url, session)
+    url_index.update_categories(zip(category_names, category_urls))
+    total_category = len(category_urls)
+    print(f"Nombre total de catégories : {total_category}\n")
+
+    saved_categories = []
+
+    def collect_category(category_name, all_books_data, listed_urls=None):
+        # Moteurs 'async' et 'pipeline' : les couvertures d'une catégorie peuvent être encore en cours
+        # de téléchargement quand elle est enregistrée, les miniatures sont lancées après le crawl.
+        save_category(category_name, all_books_data, listed_urls)
+        saved_categories.append((category_name, all_books_data))
+
+    def add_thumbnails(category_name, all_books_data):
+        book_cover_dir = category_cover_dir(phase4_dir, category_name)
+        thumbnail_stage.add_category(
+            category_name, [(book, cover_image_path(book, book_cover_dir)) for book in all_books_data], book_cover_dir
+        )
+
+    if engine == 'async':
+        from utils.async_engine import crawl_categories_async
+
+        crawl_categories_async(
+            list(zip(category_names, category_urls)),
+            save_category if thumbnail_stage is None else collect_category,
+            with_images_dir=lambda category_name: category_cover_dir(phase4_dir, category_name),
+            dedup=dedup,
+            archive=response_archive,
+        )
+        for category_name, all_books_data in saved_categories:
+            add_thumbnails(category_name, all_books_data)
+        if thumbnail_stage is not None:
+            thumbnail_stage.close()
+            thumbnail_stage.print_report()
+        duration = time.time() - start_time
+        print(f"Durée d'exécution : {duration:.2f} secondes")
+        get_image_store().print_report()
+        dedup.print_report()
+        if response_archive is not None:
+            response_archive.print_report()
+            response_archive.close()
+        return
+
+    if engine == 'pipeline':
+        def pipeline_download_cover(category_name, book):
+            book_cover_dir = category_cover_dir(phase4_dir, category_name)
+            os.makedirs(book_cover_dir, exist_ok=True)
+            download_cover(session, book, book_cover_dir)
+
+        scrape_catalog_pipelined(
+            list(zip(category_names, category_urls)), session,
+            save_category if thumbnail_stage is None else collect_category,
+            download_cover=pipeline_download_cover, dedup=dedup,
+        )
+        for category_name, all_books_data in saved_categories:
+            add_thumbnails(category_name, all_books_data)
+        if thumbnail_stage is not None:
+            thumbnail_stage.close()
+            thumbnail_stage.print_report()
+        duration = time.time() - start_time
+        print(f"Durée d'exécution : {duration:.2f} secondes")
+        client.print_connection_stats()
+        get_image_store().print_report()
+        dedup.print_report()
+        if response_archive is not None:
+            response_archive.print_report()
+            response_archive.close()
+        return
     
+    journal = CheckpointJournal()
+    if resume:
+        summary = journal.summary()
+        print(f"[REPRISE] Journal : {summary['categories']} catégories terminées, {summary['products']} livres, "
+              f"{summary['images']} images.\n")
+    else:
+        journal.reset()
+
     for index, (category_name, category_url) in enumerate(zip(category_names, category_urls), start=1):
+        if journal.is_category_done(category_name):
+            print(f"[REPRISE] Catégorie [{index}] {category_name} déjà terminée, ignorée.")
+            continue
+
         print(f"""
 ______________________________________________________
 Catégorie [{index}] : {category_name}
@@ -80,17 +347,104 @@ Lien de la catégorie {category_name} : {category_url}
 ______________________________________________________
 
 """)
-        book_urls = fetch_category_urls(category_url, session)
-        all_books_data = scrape_books_parallel(book_urls)
-        phase4_dir = os.path.dirname(os.path.abspath(__file__))
-        book_cover_dir = os.path.join(phase4_dir, "CSV", clean_filename(category_name), "Book_Cover")
+        category_started = time.perf_counter()
+        listed_urls = discover_category_urls(category_name, category_url, session, journal, cache)
+        book_urls = index_category_urls(category_name, listed_urls, url_index, dedup)
+        book_cover_dir = category_cover_dir(phase4_dir, category_name)
         os.makedirs(book_cover_dir, exist_ok=True)
-        save_all_categories_to_csv(all_books_data, category_name, phase4_dir)
-        download_images_parallel(session, all_books_data, book_cover_dir)
+        if stream and not delta:
+            with ExitStack() as stack:
+                sink = stack.enter_context(CategoryStreamWriter(category_name, phase4_dir, output_format,
+                                                                keep_fields=('product_page_url', 'title', 'image_url')))
+                sinks = [sink, stack.enter_context(url_index.product_writer())]
+                if history is not None:
+                    sinks.append(stack.enter_context(history.writer(category_name)))
+                category_sink = TeeSink(*sinks, dedup)
+                scrape_category_resumable(category_name, book_urls, session, journal, cache,
+                                          sink=category_sink, max_workers=max_workers)
+                dedup.release(book_urls)
+                for book in dedup.books(listed_urls, skip=book_urls):
+                    category_sink.write(book)
+            all_books_data = sink.kept_rows
+        else:
+            all_books_data = scrape_category_resumable(category_name, book_urls, session, journal, cache,
+                                                       parse_workers=parse_workers, max_workers=max_workers)
+            all_books_data = share_category_books(dedup, listed_urls, book_urls, all_books_data)
+            save_category(category_name, all_books_data, listed_urls)
+        # Les couvertures des livres partagés avec une catégorie précédente sont déjà dans le stockage :
+        # elles sont seulement liées dans le dossier de cette catégorie.
+        done_images = journal.done_images()
+        fetched_urls = set(book_urls)
+        download_images_parallel(
+            session, [book for book in all_books_data
+                      if book["image_url"] not in done_images or book["product_page_url"] not in fetched_urls],
+            book_cover_dir, max_workers, on_done=journal.record_image,
+        )
+        if thumbnail_stage is not None:
+            add_thumbnails(category_name, all_books_data)
+        missing_products, missing_images = journal.missing_work(category_name, book_urls)
+        if missing_products or missing_images:
+            # Catégorie incomplète : elle n'est pas marquée terminée, --resume n'y refera que les échecs.
+            print(f"[REPRISE] Catégorie {category_name} incomplète : {len(missing_products)} livres et "
+                  f"{len(missing_images)} images en échec, à reprendre avec --resume.")
+        else:
+            # La catégorie n'est marquée terminée qu'une fois son fichier validé sur disque par le thread d'écriture,
+            # et jamais si une écriture mise en file avant elle a échoué (voir `BackgroundWriter.submit`).
+            get_background_writer().submit(journal.mark_category_done, category_name, barrier=True)
+        get_metrics().observe('category_seconds', time.perf_counter() - category_started)
+        get_metrics().inc('items', level='category')
         duration = time.time() - start_time
         print(f"Durée d'exécution : {duration:.2f} secondes")
 
+    client.print_connection_stats()
+    get_image_store().print_report()
+    if thumbnail_stage is not None:
+        thumbnail_stage.close()
+        thumbnail_stage.print_report()
+    dedup.print_report()
+    url_index.close()
+    get_background_writer().flush()
+    journal.close()
+    if cache is not None:
+        cache.print_report()
+        cache.close()
+    if history is not None:
+        history.close()
+    if response_archive is not None:
+        response_archive.print_report()
+        response_archive.close()
+
+
+def main(metrics_path=None, profile_path=None, **options):
+    """
+    Lance le crawl complet avec images (voir `crawl_all` pour les options), avec rapport de
+    métriques et profil cProfile optionnels.
+
+    Args:
+        metrics_path (str, optional): Fichier du rapport de métriques du run ('.json' ou '.prom').
+        profile_path (str, optional): Fichier du profil cProfile du run (ex : run.prof).
+        **options: Options transmises à `crawl_all` (engine, resume, output_format...).
+    """
+    get_metrics().reset()
+    with profiled(profile_path):
+        crawl_all(**options)
+        get_background_writer().flush()
+    if metrics_path:
+        write_run_report(metrics_path)
+
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser(description="Phase 4 : scrape toutes les catégories et leurs images.")
+    arg_parser.add_argument('--resume', action='store_true', help="Reprend le run précédent interrompu")
+    arg_parser.add_argument('--history', action='store_true',
+                            help="Ajoute les prix et le stock du run à l'historique SQLite (python -m utils.history)")
+    arg_parser.add_argument('--archive', action='store_true',
+                            help="Archive les pages reçues pour un rejeu hors ligne (python -m booksonline replay)")
+    arg_parser.add_argument('--thumbnails', action='store_true',
+                            help="Produit les miniatures et le manifeste d'images de chaque catégorie (Pillow)")
+    arg_parser.add_argument('--metrics-out', help="Fichier du rapport de métriques du run (.json ou .prom)")
+    arg_parser.add_argument('--profile', help="Fichier du profil cProfile du run, threads de travail compris (ex : run.prof)")
+    args = arg_parser.parse_args()
+    main(metrics_path=args.metrics_out, profile_path=args.profile, resume=args.resume, record_history=args.history,
+         archive=args.archive, thumbnails=args.thumbnails)
 
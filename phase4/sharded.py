@@ -0,0 +1,411 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from phase2.scraper_category import fetch_category_urls
+from phase3.scraper_all_category import fetch_all_category_urls, scrape_books_parallel, category_saver, MAX_WORKERS
+from phase4.scraper_all import URL, category_cover_dir, cover_image_path, download_images_parallel
+from utils.history import PriceHistory
+from utils.image_store import ImageStore, get_image_store
+from utils.records import BookRecord
+from utils.saver import get_background_writer
+from utils.scheduler import get_scheduler
+from utils.url_index import UrlIndex
+from utils.work_queue import MAX_ATTEMPTS, LeaseKeeper, WorkQueue, open_queue, serve_queue
+
+"""
+Crawl réparti : un coordinateur découpe le crawl complet en unités de travail et des workers
+(processus locaux ou autres machines) les traitent avec les fonctions des phases 2 à 4.
+
+    1. plan  : récupère la liste des catégories et dépose une unité 'category' par catégorie ;
+    2. work  : chaque worker prend des unités en bail. Une unité 'category' récupère les liens
+               des livres (`fetch_category_urls`), les attribue à la catégorie (un livre présent dans
+               plusieurs catégories n'est récupéré qu'une fois) et les découpe en unités 'books' ;
+               une unité 'books' récupère les livres (`scrape_books_parallel`) et leurs couvertures
+               (`download_images_parallel`, dans le dossier phase4 du worker). Une unité 'books' dont
+               des livres n'ont pas été récupérés est remise en file, puis marquée en échec avec son
+               résultat partiel après `MAX_ATTEMPTS` tentatives ;
+    3. merge : le coordinateur regroupe les livres par catégorie, dans l'ordre de la catégorie (un livre
+               récupéré pour une autre catégorie y figure aussi), et les enregistre avec `category_saver`
+               (formats de `utils.saver`, historique, index des URLs).
+
+La file est une base SQLite (`utils.work_queue`) : les workers d'une même machine l'ouvrent
+directement ; ceux d'autres machines passent par `serve` (TCP). Chaque worker applique ses
+propres limites de débit par hôte (`utils.scheduler`) : le débit total vers le site croît avec
+le nombre de workers, à régler avec --rate / --max-rate (limites de chaque worker) si nécessaire.
+`serve` n'écoute que sur 127.0.0.1 sans --host explicite ; sur une autre adresse, le coordinateur
+et les workers partagent un jeton (--token ou variable BOOKSONLINE_QUEUE_TOKEN). Le jeton et les
+résultats circulent en clair : une autre adresse ne convient qu'à un réseau de confiance (réseau
+privé, VPN, tunnel SSH). Pendant le traitement d'une unité, le worker prolonge son bail (`LeaseKeeper`).
+
+Usage (depuis la racine du projet) :
+    python -m phase4.sharded run --processes 4                  # tout sur cette machine
+    python -m phase4.sharded plan && python -m phase4.sharded serve --host 0.0.0.0 --port 8800 --token secret
+    python -m phase4.sharded work --queue coordinateur:8800 --token secret   # sur chaque machine
+    python -m phase4.sharded merge --format parquet
+"""
+
+SHARD_SIZE = 50
+POLL_INTERVAL = 1.0
+PHASE4_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(PHASE4_DIR)
+
+
+class IncompleteShard(RuntimeError):
+    """
+    Unité 'books' dont une partie des livres n'a pas été récupérée.
+
+    Args:
+        books (list[BookRecord]): Livres récupérés (résultat partiel de l'unité).
+        missing (list[str]): Pages produit en échec.
+    """
+
+    def __init__(self, books, missing):
+        super().__init__(f"{len(missing)} livres sur {len(books) + len(missing)} non récupérés")
+        self.books = books
+        self.missing = missing
+
+
+def plan_crawl(queue, url=URL, images=True, shard_size=SHARD_SIZE):
+    """
+    Crée un crawl réparti : une unité 'category' par catégorie du site.
+
+    Args:
+        queue (WorkQueue): File de travail locale du coordinateur.
+        url (str, optional): URL de la page d'accueil listant les catégories.
+        images (bool, optional): Les workers téléchargent aussi les images de couverture.
+        shard_size (int, optional): Nombre de pages produit par unité 'books'.
+
+    Returns:
+        str: Identifiant du crawl (AAAAMMJJ-HHMMSS).
+    """
+    from utils.http_client import get_client
+
+    category_urls, category_names = fetch_all_category_urls(url, get_client().session)
+    crawl = time.strftime('%Y%m%d-%H%M%S')
+    queue.create_crawl(
+        crawl, {'url': url, 'images': images, 'shard_size': shard_size},
+        [('category', {'category': name, 'url': category_url})
+         for name, category_url in zip(category_names, category_urls)],
+    )
+    print(f"[SHARD] Crawl {crawl} : {len(category_urls)} catégories en file ({queue.path}).")
+    return crawl
+
+
+def process_job(job, crawl, options, queue, session, max_workers=MAX_WORKERS):
+    """
+    Traite une unité de travail.
+
+    Args:
+        job (dict): Unité prise en bail (clés 'kind' et 'payload').
+        crawl (str): Identifiant du crawl.
+        options (dict): Options du crawl (clés 'images' et 'shard_size').
+        queue (WorkQueue | RemoteQueue): File de travail.
+        session (requests.Session): Session HTTP du worker.
+        max_workers (int, optional): Nombre de threads de récupération.
+
+    Returns:
+        tuple[object, list[tuple[str, dict]]]: Résultat de l'unité et nouvelles unités à déposer.
+
+    Raises:
+        IncompleteShard: Si des livres d'une unité 'books' n'ont pas été récupérés.
+    """
+    payload = job['payload']
+    category_name = payload['category']
+    if job['kind'] == 'category':
+        book_urls = fetch_category_urls(payload['url'], session)
+        owned = queue.claim_urls(crawl, category_name, book_urls)
+        size = options['shard_size']
+        new_jobs = [('books', {'category': category_name, 'urls': owned[i:i + size]})
+                    for i in range(0, len(owned), size)]
+        print(f"[SHARD] Catégorie {category_name} : {len(book_urls)} livres, {len(new_jobs)} lots.")
+        return book_urls, new_jobs
+
+    books = scrape_books_parallel(payload['urls'], session, max_workers)
+    if options['images']:
+        download_images_parallel(session, books, category_cover_dir(PHASE4_DIR, category_name), max_workers)
+    fetched = {book['product_page_url'] for book in books}
+    missing = [url for url in payload['urls'] if url not in fetched]
+    if missing:
+        raise IncompleteShard(books, missing)
+    return books, []
+
+
+def run_worker(location=None, crawl=None, max_workers=MAX_WORKERS, worker_id=None, rate=None, max_rate=None,
+               token=None):
+    """
+    Traite les unités d'un crawl jusqu'à ce qu'il n'en reste plus aucune en attente ou en cours.
+
+    Args:
+        location (str, optional): File de travail : chemin SQLite ou adresse 'hôte:port' du coordinateur.
+        crawl (str, optional): Identifiant du crawl (par défaut, le dernier crawl créé).
+        max_workers (int, optional): Nombre de threads de récupération du worker.
+        worker_id (str, optional): Nom du worker dans la file (par défaut, 'machine-pid').
+        rate (float, optional): Débit initial par hôte du worker (requêtes/s).
+        max_rate (float, optional): Débit maximal par hôte du worker (requêtes/s).
+        token (str, optional): Jeton partagé d'un coordinateur distant.
+
+    Returns:
+        int: Nombre d'unités traitées par ce worker.
+
+    Raises:
+        ValueError: Si la file ne contient aucun crawl (ou pas le crawl demandé).
+    """
+    from utils.http_client import get_client
+
+    queue = open_queue(location, token)
+    owner = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    done = 0
+    try:
+        crawl = crawl or queue.latest_crawl()
+        options = queue.crawl_options(crawl) if crawl else None
+        if options is None:
+            raise ValueError(f"[ERREUR] Crawl introuvable dans la file : {crawl or '(file vide)'}")
+        scheduler = get_scheduler()
+        if rate is not None:
+            scheduler.initial_rate = rate
+        if max_rate is not None:
+            scheduler.max_rate = max_rate
+        session = get_client(pool_size=max_workers).session
+        while True:
+            job = queue.lease(crawl, owner)
+            if job is None:
+                if queue.is_finished(crawl):
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+            try:
+                with LeaseKeeper(queue, job['id'], owner):
+                    result, new_jobs = process_job(job, crawl, options, queue, session, max_workers)
+            except IncompleteShard as e:
+                final = " (dernière, résultat partiel conservé)" if job['attempts'] >= MAX_ATTEMPTS else ""
+                print(f"[ERREUR] Unité {job['id']} ({job['kind']}) incomplète, "
+                      f"tentative {job['attempts']}{final} : {e}")
+                queue.fail(job['id'], owner, str(e), e.books)
+                continue
+            except Exception as e:
+                print(f"[ERREUR] Unité {job['id']} ({job['kind']}) en échec, tentative {job['attempts']} : {e}")
+                queue.fail(job['id'], owner, str(e))
+                continue
+            if queue.complete(job['id'], owner, result, new_jobs):
+                done += 1
+    finally:
+        queue.close()
+    print(f"[SHARD] Worker {owner} : {done} unités traitées.")
+    return done
+
+
+def link_shared_covers(books, book_cover_dir):
+    """
+    Lie dans le dossier d'une catégorie les couvertures de livres récupérés pour une autre catégorie,
+    lorsqu'elles sont présentes dans le stockage d'images local (workers de la même machine).
+    """
+    store = get_image_store()
+    for book in books:
+        object_path, _ = store.lookup(book['image_url'])
+        if object_path is not None:
+            os.makedirs(book_cover_dir, exist_ok=True)
+            ImageStore.link(object_path, cover_image_path(book, book_cover_dir))
+
+
+def merge_crawl(queue, crawl=None, output_format='csv', record_history=False, base_dir=PHASE4_DIR):
+    """
+    Regroupe les résultats d'un crawl terminé et enregistre un fichier par catégorie.
+
+    Args:
+        queue (WorkQueue): File de travail locale du coordinateur.
+        crawl (str, optional): Identifiant du crawl (par défaut, le dernier crawl créé).
+        output_format (str, optional): Format d'export : 'csv', 'csv.gz', 'csv.zst', 'jsonl' ou 'parquet'.
+        record_history (bool, optional): Ajoute les prix et le stock à l'historique SQLite.
+        base_dir (str, optional): Dossier de sortie (sous-dossier CSV/<catégorie>, phase4 par défaut).
+
+    Returns:
+        int: Nombre de livres enregistrés.
+
+    Raises:
+        ValueError: Si le crawl est introuvable ou n'est pas terminé.
+    """
+    crawl = crawl or queue.latest_crawl()
+    if crawl is None or queue.crawl_options(crawl) is None:
+        raise ValueError(f"[ERREUR] Crawl introuvable dans la file : {crawl or '(file vide)'}")
+    if not queue.is_finished(crawl):
+        raise ValueError(f"[ERREUR] Le crawl {crawl} n'est pas terminé (voir la commande status).")
+
+    # Un livre n'est récupéré que pour la première catégorie qui le liste : il est retrouvé par son URL
+    # pour chacune des catégories qui le listent.
+    books_by_url = {}
+    owners = {}
+    for payload, books in queue.results(crawl, 'books', partial=True):
+        for book in books:
+            books_by_url[book['product_page_url']] = BookRecord.from_mapping(book)
+            owners[book['product_page_url']] = payload['category']
+
+    history = PriceHistory() if record_history else None
+    url_index = UrlIndex()
+    save_category = category_saver(base_dir, None, output_format, history, url_index)
+    with_images = queue.crawl_options(crawl).get('images')
+    total = 0
+    for payload, book_urls in queue.results(crawl, 'category'):
+        category_name = payload['category']
+        url_index.update_category(category_name, book_urls)
+        books = [books_by_url[url] for url in dict.fromkeys(book_urls) if url in books_by_url]
+        if with_images:
+            link_shared_covers([book for book in books if owners[book['product_page_url']] != category_name],
+                               category_cover_dir(PHASE4_DIR, category_name))
+        save_category(category_name, books)
+        total += len(books)
+    get_background_writer().flush()
+    url_index.close()
+    if history is not None:
+        history.close()
+
+    failures = queue.failures(crawl)
+    for kind, payload, error in failures:
+        print(f"[ERREUR] Unité {kind} de la catégorie {payload['category']} en échec : {error}")
+    print(f"[SHARD] Crawl {crawl} fusionné : {total} livres, {len(failures)} unités en échec.")
+    return total
+
+
+def print_status(queue, crawl=None):
+    """
+    Affiche l'avancement d'un crawl (unités par type et par état).
+    """
+    crawl = crawl or queue.latest_crawl()
+    if crawl is None:
+        print("Aucun crawl dans la file.")
+        return
+    print(f"Crawl {crawl} :")
+    for kind, states in sorted(queue.status(crawl).items()):
+        print(f"  {kind:<9} " + ", ".join(f"{state} {count}" for state, count in sorted(states.items())))
+
+
+def run_local(processes=4, max_workers=MAX_WORKERS, url=URL, images=True, output_format='csv',
+              record_history=False, queue_path=None, rate=None, max_rate=None):
+    """
+    Lance un crawl réparti complet sur cette machine : plan, `processes` workers, puis fusion.
+
+    Args:
+        processes (int, optional): Nombre de processus workers.
+        max_workers (int, optional): Nombre de threads de récupération par worker.
+        url (str, optional): URL de la page d'accueil listant les catégories.
+        images (bool, optional): Télécharge aussi les images de couverture.
+        output_format (str, optional): Format d'export des catégories.
+        record_history (bool, optional): Ajoute les prix et le stock à l'historique SQLite.
+        queue_path (str, optional): Fichier SQLite de la file (par défaut : .cache/work_queue.sqlite3).
+        rate (float, optional): Débit initial par hôte de chaque worker (requêtes/s).
+        max_rate (float, optional): Débit maximal par hôte de chaque worker (requêtes/s).
+    """
+    start_time = time.time()
+    queue = WorkQueue(queue_path) if queue_path else WorkQueue()
+    try:
+        crawl = plan_crawl(queue, url, images)
+        command = [sys.executable, '-m', 'phase4.sharded', 'work', '--queue', os.path.abspath(queue.path),
+                   '--crawl', crawl, '--workers', str(max_workers)]
+        if rate is not None:
+            command += ['--rate', str(rate)]
+        if max_rate is not None:
+            command += ['--max-rate', str(max_rate)]
+        workers = [subprocess.Popen(command + ['--id', f"local-{index}"], cwd=PROJECT_ROOT)
+                   for index in range(1, processes + 1)]
+        try:
+            codes = [worker.wait() for worker in workers]
+        finally:
+            for worker in workers:
+                if worker.poll() is None:
+                    worker.terminate()
+        if any(codes):
+            print(f"[ERREUR] {sum(1 for code in codes if code)} workers se sont arrêtés en erreur.")
+        merge_crawl(queue, crawl, output_format, record_history)
+    finally:
+        queue.close()
+    print(f"Durée d'exécution : {time.time() - start_time:.2f} secondes")
+
+
+def build_parser():
+    """
+    Construit l'analyseur de la ligne de commande du crawl réparti.
+    """
+    arg_parser = argparse.ArgumentParser(prog='sharded', description="Crawl réparti sur plusieurs workers.")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Plan, workers locaux et fusion en une commande")
+    run.add_argument('--processes', type=int, default=4, help="Nombre de processus workers")
+    plan = commands.add_parser('plan', help="Crée un crawl et dépose une unité par catégorie")
+    for sub in (run, plan):
+        sub.add_argument('--url', default=URL, help="URL de la page d'accueil listant les catégories")
+        sub.add_argument('--no-images', dest='images', action='store_false', help="Sans images de couverture")
+    serve = commands.add_parser('serve', help="Sert la file en TCP pour les workers d'autres machines")
+    serve.add_argument('--host', default='127.0.0.1',
+                       help="Adresse d'écoute (127.0.0.1 par défaut, '0.0.0.0' pour les autres machines, "
+                            "sur un réseau de confiance uniquement : le jeton circule en clair)")
+    serve.add_argument('--port', type=int, default=8800)
+    work = commands.add_parser('work', help="Traite les unités d'un crawl jusqu'à épuisement")
+    work.add_argument('--id', help="Nom du worker (machine-pid par défaut)")
+    merge = commands.add_parser('merge', help="Enregistre les résultats d'un crawl terminé")
+    status = commands.add_parser('status', help="Affiche l'avancement d'un crawl")
+
+    for sub in (run, plan, serve, work, merge, status):
+        sub.add_argument('--queue', help="File : fichier SQLite (.cache/work_queue.sqlite3 par défaut) "
+                                         "ou 'hôte:port' pour un worker distant")
+    for sub in (serve, work):
+        sub.add_argument('--token', help="Jeton partagé entre le coordinateur et les workers distants "
+                                          "(variable BOOKSONLINE_QUEUE_TOKEN par défaut)")
+    for sub in (work, merge, status):
+        sub.add_argument('--crawl', help="Identifiant du crawl (dernier crawl par défaut)")
+    for sub in (run, work):
+        sub.add_argument('--workers', type=int, default=MAX_WORKERS, help="Threads de récupération par worker")
+        sub.add_argument('--rate', type=float, help="Débit initial par hôte de chaque worker (requêtes/s)")
+        sub.add_argument('--max-rate', type=float, help="Débit maximal par hôte de chaque worker (requêtes/s)")
+    for sub in (run, merge):
+        sub.add_argument('--format', dest='output_format', default='csv',
+                         choices=('csv', 'csv.gz', 'csv.zst', 'jsonl', 'parquet'), help="Format d'export")
+        sub.add_argument('--history', dest='record_history', action='store_true',
+                         help="Ajoute les prix et le stock à l'historique SQLite")
+    return arg_parser
+
+
+def main(argv=None):
+    """
+    Exécute une commande du crawl réparti.
+
+    Args:
+        argv (list[str], optional): Arguments (par défaut : ceux du processus).
+
+    Returns:
+        int: Code de sortie du processus.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == 'run':
+        run_local(args.processes, args.workers, args.url, args.images, args.output_format, args.record_history,
+                  args.queue, args.rate, args.max_rate)
+        return 0
+    if args.command == 'work':
+        try:
+            run_worker(args.queue, args.crawl, args.workers, args.id, args.rate, args.max_rate, args.token)
+        except ValueError as e:
+            print(e)
+            return 1
+        return 0
+
+    queue = WorkQueue(args.queue) if args.queue else WorkQueue()
+    try:
+        if args.command == 'plan':
+            plan_crawl(queue, args.url, args.images)
+        elif args.command == 'serve':
+            serve_queue(queue, args.host, args.port, args.token)
+        elif args.command == 'status':
+            print_status(queue, args.crawl)
+        else:
+            merge_crawl(queue, args.crawl, args.output_format, args.record_history)
+    except ValueError as e:
+        print(e)
+        return 1
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
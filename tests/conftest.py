@@ -0,0 +1,38 @@
+import glob
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.records import BookRecord
+
+"""
+Configuration commune des tests : la racine du projet est importable (phase1, utils, booksonline...)
+quel que soit le dossier depuis lequel pytest est lancé.
+
+Fixtures partagées :
+    - `product_pages` : pages produit sauvegardées (tests/data/product_pages), couples (URL, HTML) ;
+    - `books` : livres attendus pour ces pages (tests/data/extract_golden.json), en `BookRecord`.
+"""
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+PAGE_URL_PREFIX = "https://books.toscrape.com/catalogue/"
+
+
+@pytest.fixture
+def product_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, 'product_pages', '*.html'))):
+        slug = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            pages.append((f"{PAGE_URL_PREFIX}{slug}/index.html", f.read()))
+    return pages
+
+
+@pytest.fixture
+def books():
+    with open(os.path.join(DATA_DIR, 'extract_golden.json'), encoding='utf-8') as f:
+        golden = json.load(f)
+    return [BookRecord.from_mapping(golden[url]) for url in sorted(golden)]
@@ -0,0 +1,64 @@
+import os
+import pytest
+from utils.checkpoint import CheckpointJournal
+from utils.saver import BackgroundWriter, get_background_writer, save_all_categories_to_csv, write_file
+
+"""
+Thread d'écriture en arrière-plan : une tâche « barrière » (ex : marquer une catégorie terminée
+dans le journal de reprise) n'est exécutée que si les écritures qui la précèdent ont réussi.
+"""
+
+
+def test_barrier_runs_after_successful_writes(tmp_path, books):
+    writer = BackgroundWriter(durable=False)
+    calls = []
+    path = str(tmp_path / 'books.csv')
+    writer.submit(write_file, path, books)
+    writer.submit(calls.append, 'done', barrier=True)
+    writer.flush()
+    assert calls == ['done']
+    assert os.path.exists(path)
+
+
+def test_barrier_skipped_after_failed_write():
+    writer = BackgroundWriter(durable=False)
+    calls = []
+
+    def failing_write():
+        raise OSError("disque plein")
+
+    writer.submit(failing_write)
+    writer.submit(calls.append, 'skipped', barrier=True)
+    writer.submit(calls.append, 'next', barrier=True)
+    with pytest.raises(OSError):
+        writer.flush()
+    assert calls == ['next']
+
+
+def test_failed_category_write_is_not_marked_done_and_resumes(tmp_path, books):
+    journal = CheckpointJournal(str(tmp_path / 'checkpoint.sqlite3'))
+    base_dir = str(tmp_path / 'phase4')
+    output = get_background_writer()
+
+    # Un dossier à la place du fichier temporaire fait échouer l'écriture de la première catégorie.
+    failed_path = save_all_categories_to_csv(books[:2], 'Category 0', base_dir)
+    os.makedirs(failed_path + '.tmp')
+    output.submit(journal.mark_category_done, 'Category 0', barrier=True)
+    saved_path = save_all_categories_to_csv(books[2:], 'Category 1', base_dir)
+    output.submit(journal.mark_category_done, 'Category 1', barrier=True)
+    with pytest.raises(IsADirectoryError):
+        output.flush()
+
+    assert not journal.is_category_done('Category 0')
+    assert not os.path.exists(failed_path)
+    assert journal.is_category_done('Category 1')
+    assert os.path.exists(saved_path)
+
+    # Reprise : la catégorie en échec est de nouveau écrite, puis marquée terminée.
+    os.rmdir(failed_path + '.tmp')
+    save_all_categories_to_csv(books[:2], 'Category 0', base_dir)
+    output.submit(journal.mark_category_done, 'Category 0', barrier=True)
+    output.flush()
+    assert journal.is_category_done('Category 0')
+    assert os.path.exists(failed_path)
+    journal.close()
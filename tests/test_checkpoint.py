@@ -0,0 +1,39 @@
+from utils.checkpoint import CheckpointJournal
+
+"""
+Journal de reprise : travail restant d'une catégorie (livres et couvertures) après un run interrompu.
+"""
+
+
+def test_missing_work_lists_books_and_covers_not_yet_done(tmp_path, books):
+    journal = CheckpointJournal(str(tmp_path / 'checkpoint.sqlite3'))
+    urls = [book['product_page_url'] for book in books]
+    sink = journal.product_sink('Poetry')
+    for book in books[:3]:
+        sink.write(book)
+    journal.record_image(books[0]['image_url'])
+
+    missing_products, missing_images = journal.missing_work('Poetry', urls)
+    assert missing_products == urls[3:]
+    assert missing_images == [book['image_url'] for book in books[1:3]]
+    # Les livres d'une autre catégorie ne comptent pas comme récupérés.
+    assert journal.missing_work('Travel', urls[:1]) == (urls[:1], [])
+
+    for book in books[3:]:
+        journal.record_product('Poetry', book)
+    for book in books[1:]:
+        journal.record_image(book['image_url'])
+    assert journal.missing_work('Poetry', urls) == ([], [])
+    assert journal.products('Poetry')[urls[0]] == books[0]
+    journal.close()
+
+
+def test_reset_starts_a_new_run(tmp_path, books):
+    journal = CheckpointJournal(str(tmp_path / 'checkpoint.sqlite3'))
+    journal.record_product('Poetry', books[0])
+    journal.mark_category_done('Poetry')
+    assert journal.summary() == {'categories': 1, 'listing_pages': 0, 'products': 1, 'images': 0}
+    journal.reset()
+    assert not journal.is_category_done('Poetry')
+    assert journal.missing_work('Poetry', [books[0]['product_page_url']])[0] == [books[0]['product_page_url']]
+    journal.close()
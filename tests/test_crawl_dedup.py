@@ -0,0 +1,114 @@
+import os
+import phase3.scraper_all_category as phase3
+from phase3.scraper_all_category import category_saver, index_category_urls, share_category_books
+from utils.saver import get_background_writer
+from utils.url_index import CrawlDedup
+
+"""
+Dédoublonnage du run : un livre listé par deux catégories n'est récupéré qu'une fois,
+mais figure dans les fichiers de chacune des deux catégories.
+"""
+
+
+def test_claim_by_url_and_upc_alias():
+    dedup = CrawlDedup({'https://a/1': 'upc-1', 'https://b/1': 'upc-1'})
+    assert dedup.claim('https://a/1')
+    assert not dedup.claim('https://b/1')
+    assert not dedup.claim('https://a/1')
+    assert dedup.claim_all(['https://a/2', 'https://a/1', 'https://a/3']) == ['https://a/2', 'https://a/3']
+    assert dedup.skipped == 3
+
+
+def test_overlapping_categories_keep_shared_books(tmp_path, books):
+    urls = [book['product_page_url'] for book in books]
+    dedup = CrawlDedup()
+
+    fetched_poetry = index_category_urls('Poetry', urls[:3], dedup=dedup)
+    assert fetched_poetry == urls[:3]
+    poetry = share_category_books(dedup, urls[:3], fetched_poetry, books[:3])
+
+    # La seconde catégorie ne récupère que le livre qui lui est propre, les deux autres sont partagés.
+    fetched_travel = index_category_urls('Travel', urls[1:], dedup=dedup)
+    assert fetched_travel == urls[3:]
+    travel = share_category_books(dedup, urls[1:], fetched_travel, books[3:])
+    assert [book['product_page_url'] for book in poetry] == urls[:3]
+    assert [book['product_page_url'] for book in travel] == urls[1:]
+    assert travel[0] is poetry[1]
+
+    base_dir = str(tmp_path / 'phase3')
+    save_category = category_saver(base_dir)
+    save_category('Poetry', poetry)
+    save_category('Travel', travel)
+    get_background_writer().flush()
+    folder = os.path.join(base_dir, 'CSV', 'Travel')
+    with open(os.path.join(folder, os.listdir(folder)[0]), encoding='utf-8-sig') as f:
+        rows = f.read().splitlines()[1:]
+    assert [row.split(';')[0] for row in rows] == urls[1:]
+
+
+def test_failed_book_is_released_for_other_categories(books):
+    urls = [book['product_page_url'] for book in books]
+    dedup = CrawlDedup()
+    fetched = index_category_urls('Poetry', urls[:2], dedup=dedup)
+    assert share_category_books(dedup, urls[:2], fetched, books[:1]) == books[:1]
+
+    fetched = index_category_urls('Travel', urls, dedup=dedup)
+    assert share_category_books(dedup, urls, fetched, books[2:]) == [books[0]] + books[2:]
+
+
+def test_pipeline_shares_books_between_categories(monkeypatch, product_pages):
+    pages = dict(product_pages)
+    urls = list(pages)
+    listings = {'poetry-url': [urls[:3]], 'travel-url': [urls[1:2], urls[2:]]}
+    fetched = []
+    monkeypatch.setattr(phase3, 'iter_category_pages', lambda category_url, session: iter(listings[category_url]))
+
+    def fake_fetch_html(url, session):
+        fetched.append(url)
+        return pages[url]
+
+    monkeypatch.setattr(phase3, 'fetch_html', fake_fetch_html)
+    saved = {}
+    covers = []
+
+    def save_category(category_name, all_books_data, listed_urls):
+        saved[category_name] = sorted(book['product_page_url'] for book in all_books_data)
+
+    phase3.scrape_catalog_pipelined(
+        [('Poetry', 'poetry-url'), ('Travel', 'travel-url')], None, save_category,
+        download_cover=lambda category_name, book: covers.append(category_name), report_interval=0,
+        dedup=CrawlDedup(),
+    )
+    assert sorted(fetched) == sorted(urls)
+    assert saved == {'Poetry': sorted(urls[:3]), 'Travel': sorted(urls[1:])}
+    assert sorted(covers) == ['Poetry'] * 3 + ['Travel'] * 3
+
+
+def test_sharded_merge_shares_books_between_categories(tmp_path, monkeypatch, books):
+    import phase4.sharded as sharded
+    from utils.url_index import UrlIndex
+    from utils.work_queue import WorkQueue
+
+    monkeypatch.setattr(sharded, 'UrlIndex', lambda: UrlIndex(str(tmp_path / 'url_index.sqlite3')))
+    urls = [book['product_page_url'] for book in books]
+    listings = {'Poetry': urls[:3], 'Travel': urls[1:]}
+    by_url = dict(zip(urls, books))
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite3'))
+    queue.create_crawl('c1', {'images': False, 'shard_size': 10},
+                       [('category', {'category': name, 'url': name}) for name in listings])
+    job = queue.lease('c1', 'w1')
+    while job is not None:
+        name = job['payload']['category']
+        if job['kind'] == 'category':
+            owned = queue.claim_urls('c1', name, listings[name])
+            queue.complete(job['id'], 'w1', listings[name], [('books', {'category': name, 'urls': owned})])
+        else:
+            queue.complete(job['id'], 'w1', [by_url[url] for url in job['payload']['urls']])
+        job = queue.lease('c1', 'w1')
+
+    assert sharded.merge_crawl(queue, 'c1', base_dir=str(tmp_path)) == 6
+    get_background_writer().flush()
+    folder = os.path.join(str(tmp_path), 'CSV', 'Travel')
+    with open(os.path.join(folder, os.listdir(folder)[0]), encoding='utf-8-sig') as f:
+        assert [row.split(';')[0] for row in f.read().splitlines()[1:]] == urls[1:]
+    queue.close()
@@ -0,0 +1,69 @@
+import sqlite3
+from utils.delta import SnapshotStore
+
+"""
+Mode delta : journal des produits ajoutés, retirés ou modifiés d'une catégorie d'un run à l'autre.
+"""
+
+
+def test_book_shared_by_two_categories_has_a_state_per_category(tmp_path, books):
+    store = SnapshotStore(str(tmp_path / 'snapshot.sqlite3'))
+    assert [change['change_type'] for change in store.apply('Poetry', books[:2])] == ['added'] * 2
+    assert [change['change_type'] for change in store.apply('Travel', books[1:])] == ['added'] * 3
+
+    # Run suivant : le livre partagé (books[1]) n'est signalé dans aucune des deux catégories.
+    assert store.apply('Poetry', books[:2]) == []
+    assert store.apply('Travel', books[1:]) == []
+    store.close()
+
+
+def test_previous_snapshot_table_is_migrated(tmp_path, books):
+    path = str(tmp_path / 'snapshot.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE snapshot (universal_product_code TEXT PRIMARY KEY, category TEXT NOT NULL, "
+                 "title TEXT, product_page_url TEXT, price_including_tax REAL, price_excluding_tax REAL, "
+                 "number_available INTEGER, updated_at TEXT NOT NULL)")
+    conn.executemany(
+        "INSERT INTO snapshot VALUES (?, 'Poetry', ?, ?, ?, ?, ?, '2026-01-01')",
+        [(book['universal_product_code'], book['title'], book['product_page_url'], book['price_including_tax'],
+          book['price_excluding_tax'], book['number_available']) for book in books],
+    )
+    conn.commit()
+    conn.close()
+
+    store = SnapshotStore(path)
+    assert store.apply('Poetry', books) == []
+    store.close()
+
+
+def test_apply_reports_added_changed_and_removed_books(tmp_path, books):
+    store = SnapshotStore(str(tmp_path / 'snapshot.sqlite3'))
+    store.apply('Poetry', books[:3])
+
+    repriced = dict(books[1], price_including_tax=books[1]['price_including_tax'] + 1)
+    changes = {change['universal_product_code']: change
+               for change in store.apply('Poetry', [books[0], repriced, books[3]])}
+    assert {upc: change['change_type'] for upc, change in changes.items()} == {
+        books[1]['universal_product_code']: 'changed',
+        books[2]['universal_product_code']: 'removed',
+        books[3]['universal_product_code']: 'added',
+    }
+    changed = changes[books[1]['universal_product_code']]
+    assert changed['price_including_tax_old'] == books[1]['price_including_tax']
+    assert changed['price_including_tax_new'] == repriced['price_including_tax']
+
+    # Le retrait est enregistré : le run suivant identique ne signale plus rien.
+    assert store.apply('Poetry', [books[0], repriced, books[3]]) == []
+    store.close()
+
+
+def test_failed_fetch_is_not_reported_as_removed(tmp_path, books):
+    store = SnapshotStore(str(tmp_path / 'snapshot.sqlite3'))
+    store.apply('Poetry', books)
+    listed_urls = [book['product_page_url'] for book in books]
+
+    # books[2] est toujours listé mais sa page produit n'a pas pu être récupérée.
+    assert store.apply('Poetry', books[:2] + books[3:], listed_urls) == []
+    # Au run suivant, il est récupéré à nouveau sans être signalé comme ajouté.
+    assert store.apply('Poetry', books, listed_urls) == []
+    store.close()
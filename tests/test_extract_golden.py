@@ -0,0 +1,74 @@
+import glob
+import json
+import os
+import pytest
+from bs4 import BeautifulSoup
+from phase1.scraper import extract_book_data
+from utils.parsers import PARSERS, get_parser
+from utils.records import to_json
+
+"""
+Test "golden file" de l'extraction des pages produit.
+
+Le corpus (tests/data/product_pages) contient quelques pages produit de Books to Scrape allégées
+(en-tête et navigation retirés) couvrant les cas particuliers : entités HTML, page sans description,
+livre épuisé, taxe non nulle. La sortie attendue est dans tests/data/extract_golden.json.
+
+Après une modification volontaire de l'extraction, régénérer la référence :
+    UPDATE_GOLDEN=1 python -m pytest tests/test_extract_golden.py
+"""
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+PAGES_DIR = os.path.join(DATA_DIR, 'product_pages')
+GOLDEN_PATH = os.path.join(DATA_DIR, 'extract_golden.json')
+PAGE_URL_PREFIX = "https://books.toscrape.com/catalogue/"
+
+
+def load_pages():
+    """
+    Charge le corpus : couples (URL reconstituée à partir du nom du fichier, contenu HTML).
+    """
+    pages = []
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+        slug = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            pages.append((f"{PAGE_URL_PREFIX}{slug}/index.html", f.read()))
+    return pages
+
+
+def as_json(record):
+    """
+    Forme JSON d'un `BookRecord`, comparable au contenu du fichier de référence.
+    """
+    return json.loads(json.dumps(record, ensure_ascii=False, default=to_json))
+
+
+@pytest.fixture(scope='module')
+def golden():
+    pages = load_pages()
+    if os.environ.get('UPDATE_GOLDEN'):
+        results = {url: as_json(extract_book_data(BeautifulSoup(html, 'html.parser'), url)) for url, html in pages}
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_corpus_matches_golden_urls(golden):
+    assert sorted(url for url, _ in load_pages()) == sorted(golden)
+
+
+@pytest.mark.parametrize('url, html', [pytest.param(url, html, id=url.split('/')[-2]) for url, html in load_pages()])
+def test_extract_book_data_matches_golden(golden, url, html):
+    assert as_json(extract_book_data(BeautifulSoup(html, 'html.parser'), url)) == golden[url]
+
+
+@pytest.mark.parametrize('name', sorted(PARSERS))
+def test_parsers_match_golden(golden, name):
+    try:
+        parser = get_parser(name)
+    except ImportError as e:
+        pytest.skip(str(e))
+    for url, html in load_pages():
+        assert as_json(parser.extract(html, url)) == golden[url], url
@@ -0,0 +1,55 @@
+from utils import history as history_module
+from utils.history import PriceHistory
+
+"""
+Historique des prix et du stock.
+"""
+
+
+def test_history_module_delegates_to_booksonline_cli(tmp_path, books, capsys):
+    db = str(tmp_path / 'history.sqlite3')
+    history = PriceHistory(db)
+    history.record('Poetry', books, scraped_on='2026-01-01')
+    history.close()
+
+    assert history_module.main(['--db', db, 'price', books[0]['universal_product_code']]) == 0
+    output = capsys.readouterr().out
+    assert output.startswith(f"2026-01-01  £{books[0]['price_including_tax']:.2f}")
+    assert "1 lignes" in output
+
+
+def test_same_day_run_updates_the_row_and_keeps_product_page_values(tmp_path, books):
+    history = PriceHistory(str(tmp_path / 'history.sqlite3'))
+    upc = books[0]['universal_product_code']
+    assert history.record('Poetry', books, scraped_on='2026-01-01') == len(books)
+
+    # Mode "prix seuls" le même jour : ni UPC ni stock chiffré, seulement le libellé de disponibilité.
+    listing = {'product_page_url': books[0]['product_page_url'], 'title': books[0]['title'],
+               'price_including_tax': 9.99, 'availability': 'In stock'}
+    history.record('Poetry', [listing], scraped_on='2026-01-01')
+    rows = history.price_history(upc)
+    assert len(rows) == 1
+    assert rows[0]['price_including_tax'] == 9.99
+    assert rows[0]['price_excluding_tax'] == books[0]['price_excluding_tax']
+    assert rows[0]['number_available'] == books[0]['number_available']
+
+    history.record('Poetry', books[:1], scraped_on='2026-01-02')
+    assert [row['scraped_on'] for row in history.price_history(upc)] == ['2026-01-01', '2026-01-02']
+    assert history.latest_date() == '2026-01-02'
+    history.close()
+
+
+def test_stock_outs_lists_books_out_of_stock(tmp_path, books):
+    history = PriceHistory(str(tmp_path / 'history.sqlite3'))
+    history.record('Poetry', books, scraped_on='2026-01-01')
+    sold_out = {'product_page_url': books[1]['product_page_url'], 'title': books[1]['title'],
+                'price_including_tax': books[1]['price_including_tax'], 'availability': 'Out of stock'}
+    history.record('Poetry', [sold_out], scraped_on='2026-01-02')
+
+    assert history.stock_outs(scraped_on='2026-01-01') == []
+    rows = history.stock_outs()
+    assert [(row['universal_product_code'], row['product_page_url']) for row in rows] == [
+        (books[1]['universal_product_code'], books[1]['product_page_url'])
+    ]
+    assert history.stock_outs(category='Travel') == []
+    history.close()
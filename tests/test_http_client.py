@@ -0,0 +1,62 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import utils.http_client as http_client
+from utils.scheduler import FetchScheduler
+
+"""
+Client HTTP partagé : agrandir le pool de connexions ne ferme pas la session en cours d'utilisation.
+"""
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(0.3 if self.path == '/slow' else 0)
+        body = self.path.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def shared_client(monkeypatch):
+    monkeypatch.setattr(http_client, '_client', None)
+    monkeypatch.setattr(http_client, 'get_scheduler', lambda: FetchScheduler())
+    yield
+    http_client.close_client()
+
+
+def test_larger_pool_keeps_the_session_in_use(server, shared_client):
+    client = http_client.get_client(pool_size=2)
+    session = client.session
+    old_adapter = session.get_adapter(server)
+    responses = []
+    in_flight = threading.Thread(target=lambda: responses.append(session.get(f"{server}/slow", timeout=5)))
+    in_flight.start()
+    time.sleep(0.1)
+
+    assert http_client.get_client(pool_size=8) is client
+    in_flight.join()
+    assert responses[0].status_code == 200 and responses[0].text == '/slow'
+    assert client.session is session
+    assert session.get_adapter(server) is not old_adapter
+    assert session.get_adapter(server)._pool_maxsize == 8
+    assert session.get(f"{server}/fast", timeout=5).text == '/fast'
+    assert sum(entry['requests'] for entry in client.connection_stats().values()) == 2
+    assert http_client.get_client(pool_size=4).pool_size == 8
@@ -0,0 +1,42 @@
+import os
+import stat
+import pytest
+from utils.image_store import ImageStore
+
+"""
+Stockage des couvertures adressé par contenu : empreinte, doublons et droits des fichiers.
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ImageStore(str(tmp_path / 'images'))
+    yield store
+    store.close()
+
+
+def store_blob(store, url, content):
+    writer = store.begin()
+    writer.write(content)
+    return writer.commit(url, {'ETag': '"v1"'})
+
+
+def test_blob_and_links_follow_umask(store, tmp_path):
+    previous = os.umask(0o022)
+    try:
+        path = store_blob(store, 'https://books.toscrape.com/media/cache/fe/72/cover.jpg', b'jpeg')
+        link_path = str(tmp_path / 'Book_Cover' / 'cover.jpg')
+        os.makedirs(os.path.dirname(link_path))
+        ImageStore.link(path, link_path)
+    finally:
+        os.umask(previous)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert stat.S_IMODE(os.stat(link_path).st_mode) == 0o644
+
+
+def test_identical_content_is_stored_once(store):
+    first = store_blob(store, 'https://books.toscrape.com/media/cache/a.jpg', b'same cover')
+    second = store_blob(store, 'https://books.toscrape.com/media/cache/b.jpg', b'same cover')
+    assert first == second
+    assert [name for _, _, files in os.walk(store.objects_dir) for name in files] == [os.path.basename(first)]
+    assert store.entry('https://books.toscrape.com/media/cache/b.jpg')[0] == os.path.basename(first).split('.')[0]
@@ -0,0 +1,22 @@
+import os
+from phase3.scraper_all_category import LISTING_PREFIX, category_saver
+from utils.saver import get_background_writer
+
+"""
+Mode "prix seuls" : ses fichiers ne remplacent pas l'export complet de la catégorie du même jour.
+"""
+
+
+def test_listing_output_does_not_replace_full_export(tmp_path, books):
+    base_dir = str(tmp_path / 'phase3')
+    listing = [{'product_page_url': book['product_page_url'], 'title': book['title'],
+                'price_including_tax': book['price_including_tax']} for book in books]
+    category_saver(base_dir)('Poetry', books)
+    category_saver(base_dir, prefix=LISTING_PREFIX)('Poetry', listing)
+    get_background_writer().flush()
+
+    folder = os.path.join(base_dir, 'CSV', 'Poetry')
+    files = sorted(os.listdir(folder))
+    assert [name.split('_Poetry_')[0] for name in files] == ['listing_category', 'products_category']
+    with open(os.path.join(folder, files[1]), encoding='utf-8-sig') as f:
+        assert f.readline().strip().split(';') == list(books[0].keys())
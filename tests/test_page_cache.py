@@ -0,0 +1,100 @@
+import pytest
+from utils.page_cache import PageCache, fetch_cached
+from utils.parsers import get_parser
+from utils.records import BOOK_SCHEMA
+
+"""
+Cache de pages : réponse 304 et contenu inchangé réutilisent les données extraites,
+un contenu modifié ou une entrée d'un autre schéma sont re-extraits.
+"""
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeSession:
+    """
+    Sert une page avec un ETag et répond 304 aux requêtes conditionnelles qui le présentent.
+    """
+
+    def __init__(self, content, etag='"v1"'):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        if self.etag is not None and (headers or {}).get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, {'ETag': self.etag} if self.etag else {})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PageCache(str(tmp_path / 'pages.sqlite3'))
+    yield cache
+    cache.close()
+
+
+def fetch_book(cache, url, session, extracted, schema=BOOK_SCHEMA):
+    parser = get_parser('auto')
+
+    def extract(content):
+        extracted.append(url)
+        return parser.extract(content.decode('utf-8'), url)
+
+    return fetch_cached(cache, url, session, extract, level='book', schema=schema)
+
+
+def test_miss_then_not_modified(cache, product_pages, books):
+    url, html = product_pages[0]
+    session = FakeSession(html.encode('utf-8'))
+    extracted = []
+    first = fetch_book(cache, url, session, extracted)
+    second = fetch_book(cache, url, session, extracted)
+    assert dict(first) == dict(books[0])
+    assert second == dict(books[0])
+    assert extracted == [url]
+    assert session.requests[1] == {'If-None-Match': '"v1"'}
+    assert cache.counters == {'not_modified': 1, 'unchanged': 0, 'miss': 1}
+
+
+def test_unchanged_content_without_etag_is_not_parsed_again(cache, product_pages):
+    url, html = product_pages[0]
+    session = FakeSession(html.encode('utf-8'), etag=None)
+    extracted = []
+    fetch_book(cache, url, session, extracted)
+    fetch_book(cache, url, session, extracted)
+    assert extracted == [url]
+    assert cache.counters['unchanged'] == 1
+
+
+def test_changed_content_is_parsed_again(cache, product_pages, books):
+    url, html = product_pages[0]
+    extracted = []
+    fetch_book(cache, url, FakeSession(html.encode('utf-8'), etag=None), extracted)
+    changed = html.replace(str(books[0]['title']), 'Nouveau titre')
+    book = fetch_book(cache, url, FakeSession(changed.encode('utf-8'), etag=None), extracted)
+    assert book['title'] == 'Nouveau titre'
+    assert extracted == [url, url]
+
+
+def test_entry_with_another_schema_is_a_miss(cache, product_pages, books):
+    url, html = product_pages[0]
+    session = FakeSession(html.encode('utf-8'))
+    cache.store(url, {'ETag': '"v1"'}, 'empreinte', {'title': 'ancien format'}, schema='book-v0')
+    extracted = []
+    book = fetch_book(cache, url, session, extracted)
+    assert dict(book) == dict(books[0])
+    assert extracted == [url]
+    # Pas de requête conditionnelle : un 304 renverrait les données de l'ancien schéma.
+    assert session.requests == [{}]
+    assert cache.get(url)['schema'] == BOOK_SCHEMA
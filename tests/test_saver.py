@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+import json
+import os
+import pytest
+from utils.saver import commit_files, save_category_to_csv, write_file
+
+"""
+Écriture des fichiers de sortie : chemins de l'arborescence, fichier temporaire puis validation atomique.
+"""
+
+
+def read_rows(path):
+    with open(path, encoding='utf-8-sig') as f:
+        return [line.split(';') for line in f.read().splitlines()]
+
+
+def read_csv_records(f):
+    return [(row['product_page_url'], row['title'], float(row['price_including_tax']))
+            for row in csv.DictReader(f, delimiter=';')]
+
+
+def read_records(path, fmt):
+    """
+    Relit un fichier exporté : (URL, titre, prix TTC) de chaque ligne.
+    """
+    if fmt == 'csv':
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            return read_csv_records(f)
+    if fmt == 'csv.gz':
+        with gzip.open(path, mode='rt', encoding='utf-8-sig', newline='') as f:
+            return read_csv_records(f)
+    if fmt == 'csv.zst':
+        zstandard = pytest.importorskip('zstandard')
+        with open(path, 'rb') as raw, zstandard.ZstdDecompressor().stream_reader(raw) as stream:
+            return read_csv_records(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    if fmt == 'jsonl':
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        return [(row['product_page_url'], row['title'], row['price_including_tax']) for row in rows]
+    table = pytest.importorskip('pyarrow.parquet').read_table(path).to_pydict()
+    return list(zip(table['product_page_url'], table['title'], table['price_including_tax']))
+
+
+def test_phase2_file_is_replaced_only_by_a_complete_write(tmp_path, books):
+    base_dir = str(tmp_path / 'phase2')
+    path = save_category_to_csv(books, 'Mystery', base_dir)
+    assert os.path.dirname(path) == os.path.join(base_dir, 'CSV')
+    assert os.path.basename(path).startswith('products_category_Mystery_')
+    assert len(read_rows(path)) == len(books) + 1
+
+    # Une ligne avec une colonne inattendue fait échouer l'écriture : l'ancien fichier reste intact.
+    broken = [dict(books[0]), dict(books[1], extra='?')]
+    assert save_category_to_csv(broken, 'Mystery', base_dir) is None
+    assert len(read_rows(path)) == len(books) + 1
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz', 'csv.zst', 'jsonl', 'parquet'])
+def test_each_format_round_trips_the_records(tmp_path, books, fmt):
+    if fmt == 'csv.zst':
+        pytest.importorskip('zstandard')
+    elif fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'CSV' / f"books.{fmt}")
+    tmp, final = write_file(path, books, fmt)
+    assert not os.path.exists(final)
+    commit_files([(tmp, final)])
+    assert not os.path.exists(tmp)
+    assert read_records(final, fmt) == [
+        (book['product_page_url'], book['title'], book['price_including_tax']) for book in books
+    ]
+
+
+def test_failed_write_leaves_the_committed_file_untouched(tmp_path, books):
+    path = str(tmp_path / 'books.jsonl')
+    commit_files([write_file(path, books[:2], 'jsonl')], durable=False)
+
+    with pytest.raises(TypeError):
+        write_file(path, [dict(books[0], price_including_tax=object())], 'jsonl')
+    assert read_records(path, 'jsonl') == [
+        (book['product_page_url'], book['title'], book['price_including_tax']) for book in books[:2]
+    ]
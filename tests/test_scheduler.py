@@ -0,0 +1,115 @@
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from utils.http_client import FetchClient
+from utils.scheduler import DECREASE_FACTOR, FetchScheduler, parse_retry_after
+
+"""
+Ordonnanceur des requêtes : concurrence et débit adaptatifs (AIMD) par hôte, reprises
+avec backoff et respect de l'en-tête Retry-After.
+"""
+
+URL = "http://books.example/catalogue/page.html"
+
+
+def test_server_errors_decrease_limits_then_healthy_responses_increase_them():
+    scheduler = FetchScheduler(rate=10, min_concurrency=2, max_concurrency=8)
+    assert scheduler.try_acquire(URL) == 0
+    scheduler.release(URL, 503, 0.05)
+    state = scheduler.stats()['books.example']
+    assert state['concurrency'] == int(8 * DECREASE_FACTOR)
+    assert state['rate'] == pytest.approx(10 * DECREASE_FACTOR)
+    assert state['server_errors'] == 1
+
+    for _ in range(20):
+        scheduler.release(URL, 200, 0.05)
+    state = scheduler.stats()['books.example']
+    assert state['concurrency'] == 8
+    assert state['rate'] > 10
+
+
+def test_limits_never_drop_below_their_floor():
+    scheduler = FetchScheduler(rate=2, min_concurrency=2, max_concurrency=4)
+    for _ in range(20):
+        scheduler.release(URL, None)
+    state = scheduler.stats()['books.example']
+    assert state['concurrency'] == 2
+    assert state['rate'] == 1.0
+    assert state['failures'] == 20
+
+
+def test_slow_responses_decrease_concurrency_without_errors():
+    scheduler = FetchScheduler(min_concurrency=2, max_concurrency=8)
+    scheduler.release(URL, 200, 0.1)
+    for _ in range(10):
+        scheduler.release(URL, 200, 2.0)
+    assert scheduler.stats()['books.example']['concurrency'] < 8
+
+
+def test_retry_after_pauses_the_host_and_bounds_the_backoff():
+    scheduler = FetchScheduler(rate=100)
+    assert scheduler.try_acquire(URL) == 0
+    scheduler.release(URL, 429, 0.05, retry_after=0.5)
+    assert scheduler.try_acquire(URL) == pytest.approx(0.5, abs=0.05)
+    assert scheduler.try_acquire("http://other.example/") == 0
+    assert scheduler.backoff_delay(URL, 0, retry_after=2.0) >= 2.0
+    assert scheduler.stats()['books.example']['throttled'] == 1
+
+
+def test_retries_only_transient_statuses_up_to_the_limit():
+    scheduler = FetchScheduler(max_retries=2)
+    assert scheduler.should_retry(0, 503)
+    assert scheduler.should_retry(1, None)
+    assert not scheduler.should_retry(2, 503)
+    assert not scheduler.should_retry(0, 404)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after('bientôt') is None
+    assert parse_retry_after(None) is None
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """
+    Répond 429 avec Retry-After à la première requête, puis 200.
+    """
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(time.monotonic())
+        throttled = len(self.requests) == 1
+        body = b'' if throttled else b'ok'
+        self.send_response(429 if throttled else 200)
+        if throttled:
+            self.send_header('Retry-After', '0.3')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_client_retries_a_throttled_request_after_retry_after():
+    ThrottlingHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheduler = FetchScheduler()
+    client = FetchClient(pool_size=2, scheduler=scheduler)
+    try:
+        response = client.get(f"http://127.0.0.1:{server.server_port}/page.html")
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+    assert response.status_code == 200 and response.text == 'ok'
+    assert len(ThrottlingHandler.requests) == 2
+    assert ThrottlingHandler.requests[1] - ThrottlingHandler.requests[0] >= 0.3
+    state = scheduler.stats()[f"127.0.0.1:{server.server_port}"]
+    assert state['throttled'] == 1 and state['retries'] == 1
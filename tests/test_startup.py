@@ -0,0 +1,64 @@
+import os
+import re
+import subprocess
+import sys
+import time
+import pytest
+
+"""
+Budget de démarrage de la ligne de commande et des modules de phase (voir benchmarks/check_startup.py).
+
+Chaque commande est lancée dans un nouveau processus avec `python -X importtime` : elle ne doit
+importer aucune dépendance lourde du crawl, et son surcoût par rapport à l'interpréteur seul
+(meilleur de plusieurs lancements) doit rester sous `BUDGET_MS`.
+"""
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'aiohttp', 'concurrent')
+IMPORT_PATTERN = re.compile(r'^import time:\s+\d+ \|\s+\d+ \|\s*(\S+)$')
+BUDGET_MS = 200
+REPEAT = 3
+COMMANDS = {
+    'aide': ['-m', 'booksonline', '--help'],
+    'aide crawl': ['-m', 'booksonline', 'crawl', '--help'],
+    'import phase 1': ['-c', 'import phase1.scraper'],
+    'import phase 2': ['-c', 'import phase2.scraper_category'],
+    'import phase 3': ['-c', 'import phase3.scraper_all_category'],
+    'import phase 4': ['-c', 'import phase4.scraper_all'],
+    'import réparti': ['-c', 'import phase4.sharded'],
+}
+
+
+def run(args):
+    """
+    Lance `python -X importtime` avec les arguments donnés.
+
+    Returns:
+        tuple[float, set[str]]: Meilleur temps en millisecondes et modules de premier niveau importés.
+    """
+    best = None
+    modules = set()
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        assert result.returncode == 0, result.stderr[-2000:]
+        best = elapsed if best is None else min(best, elapsed)
+        for line in result.stderr.splitlines():
+            match = IMPORT_PATTERN.match(line)
+            if match:
+                modules.add(match.group(1).split('.')[0])
+    return best, modules
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    return run(['-c', 'pass'])[0]
+
+
+@pytest.mark.parametrize('name', COMMANDS)
+def test_startup_budget(baseline, name):
+    elapsed, modules = run(COMMANDS[name])
+    assert not modules.intersection(HEAVY_MODULES), f"{name} importe {sorted(modules.intersection(HEAVY_MODULES))}"
+    assert elapsed - baseline < BUDGET_MS, f"{name} : {elapsed - baseline:.0f} ms au-delà de l'interpréteur seul"
@@ -0,0 +1,73 @@
+import time
+import pytest
+from utils.work_queue import MAX_ATTEMPTS, LeaseKeeper, WorkQueue
+
+"""
+File de travail du crawl réparti : baux, prolongation et tentatives.
+"""
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite3'))
+    queue.create_crawl('c1', {'images': False}, [('books', {'category': 'Poetry', 'urls': ['u1', 'u2']})])
+    yield queue
+    queue.close()
+
+
+def test_renewed_lease_is_not_taken_over(queue):
+    job = queue.lease('c1', 'w1', lease_seconds=0.2)
+    time.sleep(0.1)
+    assert queue.renew(job['id'], 'w1', lease_seconds=60)
+    time.sleep(0.2)
+    assert queue.lease('c1', 'w2') is None
+    assert queue.complete(job['id'], 'w1', [])
+
+
+def test_renew_fails_once_the_lease_is_taken_over(queue):
+    job = queue.lease('c1', 'w1', lease_seconds=0)
+    time.sleep(0.01)
+    assert queue.lease('c1', 'w2')['id'] == job['id']
+    assert not queue.renew(job['id'], 'w1')
+    assert not queue.complete(job['id'], 'w1', [])
+
+
+def test_lease_keeper_renews_while_processing(queue):
+    job = queue.lease('c1', 'w1', lease_seconds=0.2)
+    with LeaseKeeper(queue, job['id'], 'w1', interval=0.05):
+        time.sleep(0.5)
+        assert queue.lease('c1', 'w2') is None
+    assert queue.complete(job['id'], 'w1', [])
+    assert queue.is_finished('c1')
+
+
+def test_expired_lease_is_leased_again_with_a_new_attempt(queue):
+    job = queue.lease('c1', 'w1', lease_seconds=0)
+    time.sleep(0.01)
+    retried = queue.lease('c1', 'w2')
+    assert retried['id'] == job['id'] and retried['attempts'] == 2
+    assert queue.complete(retried['id'], 'w2', ['livre'])
+    assert queue.results('c1', 'books') == [(job['payload'], ['livre'])]
+
+
+def test_job_fails_after_max_attempts_and_keeps_its_partial_result(queue):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        job = queue.lease('c1', 'w1')
+        assert job['attempts'] == attempt
+        queue.fail(job['id'], 'w1', 'HTTP 503', result=['partiel'])
+    assert queue.lease('c1', 'w1') is None
+    assert queue.is_finished('c1')
+    assert queue.status('c1') == {'books': {'failed': 1}}
+    assert queue.failures('c1') == [('books', job['payload'], 'HTTP 503')]
+    assert queue.results('c1', 'books') == []
+    assert queue.results('c1', 'books', partial=True) == [(job['payload'], ['partiel'])]
+
+
+def test_expired_lease_at_max_attempts_is_marked_failed(queue):
+    for _ in range(MAX_ATTEMPTS - 1):
+        job = queue.lease('c1', 'w1')
+        queue.fail(job['id'], 'w1', 'HTTP 503')
+    queue.lease('c1', 'w1', lease_seconds=0)
+    time.sleep(0.01)
+    assert queue.lease('c1', 'w2') is None
+    assert queue.failures('c1') == [('books', job['payload'], 'bail expiré')]
@@ -0,0 +1,414 @@
+import gzip
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+from utils.metrics import get_metrics
+from utils.parsers import get_parser
+from utils.saver import get_background_writer, save_all_categories_to_csv
+
+"""
+Archive des réponses brutes (à la manière d'un fichier WARC) et mode rejeu hors ligne.
+
+Pendant un crawl, chaque page HTML reçue (code 200) est ajoutée à un segment `.warc.gz` :
+un enregistrement WARC/1.0 de type "response" (en-têtes HTTP et contenu) compressé
+séparément, si bien qu'un enregistrement se relit avec son seul décalage et sa taille
+(les segments restent lisibles par les outils WARC et par `zcat`). Les segments ne sont
+jamais réécrits ; un nouveau segment est ouvert à chaque run et dès que la taille limite
+est atteinte. L'index SQLite (index.sqlite3) associe à chaque URL son segment, son décalage et sa taille.
+
+Le rejeu ré-extrait les pages produit d'un run archivé, sans accès réseau, et les enregistre
+avec les writers de `utils.saver` : les lots d'enregistrements de chaque segment sont
+analysés en parallèle dans un pool de processus.
+
+Les pages servies depuis le cache (réponses 304 de `--cache`) n'ont pas de contenu et ne sont
+pas archivées : pour un run complet à rejouer, lancer le crawl sans cache.
+"""
+
+DEFAULT_ARCHIVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'archive'))
+DEFAULT_REPLAY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'replay'))
+SEGMENT_SIZE = 16 * 1024 * 1024
+COMPRESS_LEVEL = 6
+INDEX_BATCH_SIZE = 200
+REPLAY_BATCH_SIZE = 100
+ARCHIVED_TYPES = ('text/html',)
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+
+def build_record(url, status, reason, headers, body, fetched_at):
+    """
+    Construit un enregistrement WARC/1.0 de type "response" (non compressé).
+
+    Le contenu est archivé décodé (après décompression HTTP) : les en-têtes Content-Encoding
+    et Transfer-Encoding sont retirés et Content-Length est recalculé.
+
+    Args:
+        url (str): URL de la réponse.
+        status (int): Code HTTP.
+        reason (str): Message associé au code HTTP.
+        headers (Mapping[str, str]): En-têtes de la réponse.
+        body (bytes): Contenu de la réponse.
+        fetched_at (float): Horodatage de la réponse (secondes depuis l'epoch).
+
+    Returns:
+        bytes: L'enregistrement complet, terminé par la ligne vide de fin d'enregistrement.
+    """
+    http_lines = [f"HTTP/1.1 {status} {reason or ''}".rstrip()]
+    http_lines += [f"{name}: {value}" for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS]
+    http_lines.append(f"Content-Length: {len(body)}")
+    block = ('\r\n'.join(http_lines) + '\r\n\r\n').encode('latin-1', errors='replace') + body
+    warc_lines = [
+        'WARC/1.0',
+        'WARC-Type: response',
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(fetched_at))}",
+        f"WARC-Target-URI: {url}",
+        'Content-Type: application/http;msgtype=response',
+        f"Content-Length: {len(block)}",
+    ]
+    return ('\r\n'.join(warc_lines) + '\r\n\r\n').encode('utf-8') + block + b'\r\n\r\n'
+
+
+def _parse_headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip()] = value.strip()
+    return headers
+
+
+def parse_record(data):
+    """
+    Décompresse et lit un enregistrement produit par `build_record`.
+
+    Args:
+        data (bytes): Enregistrement compressé (membre gzip d'un segment).
+
+    Returns:
+        dict: Clés 'url', 'date', 'status', 'headers' et 'body' (contenu brut en octets).
+    """
+    payload = zlib.decompress(data, wbits=31)
+    warc_head, _, rest = payload.partition(b'\r\n\r\n')
+    warc = _parse_headers(warc_head.split(b'\r\n')[1:])
+    block = rest[:int(warc['Content-Length'])]
+    http_head, _, body = block.partition(b'\r\n\r\n')
+    status_line, *header_lines = http_head.split(b'\r\n')
+    return {
+        'url': warc['WARC-Target-URI'],
+        'date': warc['WARC-Date'],
+        'status': int(status_line.split()[1]),
+        'headers': _parse_headers(header_lines),
+        'body': body,
+    }
+
+
+def is_product_url(url):
+    """
+    Indique si une URL archivée est une page produit (et non une page de catégorie ou l'accueil).
+    """
+    path = urlsplit(url).path
+    return '/catalogue/' in path and '/category/' not in path
+
+
+class ResponseArchive:
+    """
+    Archive de réponses en segments compressés ajoutés à la suite, indexée dans SQLite.
+    Partageable entre threads.
+
+    Args:
+        directory (str, optional): Dossier des segments et de l'index (par défaut : .cache/archive).
+        segment_size (int, optional): Taille (compressée) au-delà de laquelle un nouveau segment est ouvert.
+        run (str, optional): Identifiant du run (par défaut : date et heure d'ouverture, AAAAMMJJ-HHMMSS).
+    """
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR, segment_size=SEGMENT_SIZE, run=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.run = run or time.strftime('%Y%m%d-%H%M%S')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS segments (
+                name TEXT PRIMARY KEY,
+                run TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_segments_run ON segments (run);
+            CREATE TABLE IF NOT EXISTS records (
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (segment, offset)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_records_url ON records (url);
+        """)
+        self._file = None
+        self._segment = None
+        self._sequence = 0
+        self._pending = []
+        self._sessions = []
+        self.counters = {'records': 0, 'bytes': 0, 'compressed': 0}
+
+    def attach(self, session):
+        """
+        Archive désormais les pages HTML reçues par une session requests (hook 'response').
+
+        Returns:
+            ResponseArchive: L'archive elle-même.
+        """
+        session.hooks['response'].append(self._hook)
+        self._sessions.append(session)
+        return self
+
+    def _hook(self, response, *args, **kwargs):
+        if kwargs.get('stream') or response.status_code != 200:
+            return
+        if not response.headers.get('Content-Type', '').startswith(ARCHIVED_TYPES):
+            return
+        self.record(response.url, response.status_code, response.reason, response.headers, response.content)
+
+    def record(self, url, status, reason, headers, body):
+        """
+        Ajoute une réponse à l'archive du run (la compression a lieu hors du verrou).
+
+        Args:
+            url (str): URL de la réponse.
+            status (int): Code HTTP.
+            reason (str): Message associé au code HTTP.
+            headers (Mapping[str, str]): En-têtes de la réponse.
+            body (bytes): Contenu de la réponse.
+        """
+        fetched_at = time.time()
+        data = gzip.compress(build_record(url, status, reason, headers, body, fetched_at), COMPRESS_LEVEL)
+        with self._lock:
+            if self._file is None or (self._file.tell() and self._file.tell() + len(data) > self.segment_size):
+                self._open_segment()
+            offset = self._file.tell()
+            self._file.write(data)
+            self._pending.append((self._segment, offset, len(data), url, status, fetched_at))
+            self.counters['records'] += 1
+            self.counters['bytes'] += len(body)
+            self.counters['compressed'] += len(data)
+            if len(self._pending) >= INDEX_BATCH_SIZE:
+                self._flush_index()
+        get_metrics().inc('archived_bytes', len(data))
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._flush_index()
+            self._file.close()
+        self._sequence += 1
+        self._segment = f"{self.run}-{self._sequence:05d}.warc.gz"
+        self._file = open(os.path.join(self.directory, self._segment), 'ab')
+        with self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO segments (name, run, created_at) VALUES (?, ?, ?)",
+                               (self._segment, self.run, time.time()))
+
+    def _flush_index(self):
+        # Le segment est écrit sur disque avant l'index : une entrée de l'index pointe toujours vers des données présentes.
+        self._file.flush()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (segment, offset, length, url, status, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", self._pending
+            )
+        self._pending = []
+
+    def runs(self):
+        """
+        Retourne les runs archivés, du plus ancien au plus récent.
+
+        Returns:
+            list[dict]: Clés 'run', 'started_at', 'segments', 'records' et 'size' (octets compressés).
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT s.run, MIN(s.created_at), COUNT(DISTINCT s.name), COUNT(r.offset), COALESCE(SUM(r.length), 0)
+                FROM segments s LEFT JOIN records r ON r.segment = s.name
+                GROUP BY s.run ORDER BY s.run
+            """).fetchall()
+        return [{'run': run, 'started_at': started_at, 'segments': segments, 'records': records, 'size': size}
+                for run, started_at, segments, records, size in rows]
+
+    def latest_run(self):
+        """
+        Retourne l'identifiant du dernier run archivé (None si l'archive est vide).
+        """
+        runs = self.runs()
+        return runs[-1]['run'] if runs else None
+
+    def entries(self, run):
+        """
+        Retourne les enregistrements d'un run, dans l'ordre des segments.
+
+        Returns:
+            list[tuple[str, int, int, str]]: Quadruplets (segment, décalage, taille, URL).
+        """
+        with self._lock:
+            return self._conn.execute("""
+                SELECT r.segment, r.offset, r.length, r.url
+                FROM records r JOIN segments s ON s.name = r.segment
+                WHERE s.run = ? ORDER BY r.segment, r.offset
+            """, (run,)).fetchall()
+
+    def get(self, url, run=None):
+        """
+        Relit la dernière réponse archivée d'une URL (dans un run donné ou tous runs confondus).
+
+        Returns:
+            dict | None: Réponse (voir `parse_record`), ou None si l'URL n'est pas archivée.
+        """
+        query = ("SELECT r.segment, r.offset, r.length FROM records r JOIN segments s ON s.name = r.segment "
+                 "WHERE r.url = ?" + (" AND s.run = ?" if run else "") + " ORDER BY r.fetched_at DESC LIMIT 1")
+        with self._lock:
+            row = self._conn.execute(query, (url, run) if run else (url,)).fetchone()
+        if row is None:
+            return None
+        segment, offset, length = row
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(offset)
+            return parse_record(f.read(length))
+
+    def print_report(self):
+        """
+        Affiche le bilan de l'archivage du run en cours.
+        """
+        raw = self.counters['bytes']
+        ratio = self.counters['compressed'] / raw * 100 if raw else 0
+        print(f"[ARCHIVE] Run {self.run} : {self.counters['records']} pages archivées, "
+              f"{raw / 1e6:.1f} Mo -> {self.counters['compressed'] / 1e6:.1f} Mo ({ratio:.0f}%)")
+
+    def close(self):
+        """
+        Détache l'archive des sessions, écrit l'index restant et ferme le segment et la base.
+        """
+        for session in self._sessions:
+            if self._hook in session.hooks['response']:
+                session.hooks['response'].remove(self._hook)
+        self._sessions = []
+        with self._lock:
+            if self._file is not None:
+                self._flush_index()
+                self._file.close()
+                self._file = None
+            self._conn.close()
+
+
+def _replay_batch(path, entries, parser_name):
+    """
+    Ré-extrait un lot de pages produit d'un segment (exécuté dans un processus du pool de rejeu).
+
+    Args:
+        path (str): Chemin du segment.
+        entries (list[tuple[int, int, str]]): Triplets (décalage, taille, URL), par décalage croissant.
+        parser_name (str): Nom du parseur à utiliser ('bs4', 'lxml' ou 'auto').
+
+    Returns:
+        tuple[list[BookRecord], int]: Livres extraits, dans l'ordre du lot, et nombre de pages en erreur.
+    """
+    book_parser = get_parser(parser_name)
+    books = []
+    errors = 0
+    with open(path, 'rb') as f:
+        for offset, length, url in entries:
+            try:
+                f.seek(offset)
+                record = parse_record(f.read(length))
+                books.append(book_parser.extract(record['body'].decode('utf-8', errors='replace'), url))
+            except Exception as e:
+                print(f"[ERREUR] Page archivée non traitée ({url}) : {e}")
+                errors += 1
+    return books, errors
+
+
+def replay_archive(archive, run=None, base_dir=DEFAULT_REPLAY_DIR, output_format='csv', parse_workers=None,
+                   parser='auto', history=None, batch_size=REPLAY_BATCH_SIZE):
+    """
+    Ré-extrait les livres d'un run archivé, sans accès réseau, et enregistre un fichier par catégorie.
+
+    Chaque URL produit n'est extraite qu'une fois (sa dernière réponse du run). Les pages sont
+    analysées par lots de `batch_size` enregistrements d'un même segment, en parallèle
+    dans un pool de processus, puis regroupées par catégorie (champ 'category' extrait).
+
+    Args:
+        archive (ResponseArchive): Archive à rejouer.
+        run (str, optional): Identifiant du run (par défaut, le dernier run archivé).
+        base_dir (str, optional): Dossier de sortie (sous-dossier CSV/<catégorie>, comme les phases 3 et 4).
+        output_format (str, optional): Format d'export : 'csv', 'csv.gz', 'csv.zst', 'jsonl' ou 'parquet'.
+        parse_workers (int, optional): Nombre de processus de parsing (par défaut, le nombre de cœurs ;
+                                       1 pour tout traiter dans le processus courant).
+        parser (str, optional): Parseur des pages produit : 'bs4', 'lxml' ou 'auto'.
+        history (PriceHistory, optional): Si fourni, les livres sont ajoutés à l'historique des prix
+                                          à la date du run archivé.
+        batch_size (int, optional): Nombre d'enregistrements par tâche du pool.
+
+    Returns:
+        dict: Clés 'run', 'pages', 'books', 'errors' et 'categories'.
+
+    Raises:
+        ValueError: Si l'archive ne contient aucun run (ou pas le run demandé).
+    """
+    run = run or archive.latest_run()
+    started_at = next((entry['started_at'] for entry in archive.runs() if entry['run'] == run), None)
+    if started_at is None:
+        raise ValueError(f"[ERREUR] Run archivé introuvable : {run or '(archive vide)'}")
+    scraped_on = time.strftime('%Y-%m-%d', time.localtime(started_at))
+
+    latest = {}
+    for segment, offset, length, url in archive.entries(run):
+        if is_product_url(url):
+            latest[url] = (segment, offset, length)
+    by_segment = defaultdict(list)
+    for url, (segment, offset, length) in latest.items():
+        by_segment[segment].append((offset, length, url))
+    tasks = []
+    for segment, entries in sorted(by_segment.items()):
+        entries.sort()
+        path = os.path.join(archive.directory, segment)
+        tasks += [(path, entries[i:i + batch_size]) for i in range(0, len(entries), batch_size)]
+
+    parser_name = parser if isinstance(parser, str) else parser.name
+    print(f"[REJEU] Run {run} : {len(latest)} pages produit, {len(by_segment)} segments, {len(tasks)} lots.")
+    if parse_workers == 1 or len(tasks) <= 1:
+        results = [_replay_batch(path, entries, parser_name) for path, entries in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            results = list(pool.map(_replay_batch, *zip(*tasks), [parser_name] * len(tasks)))
+
+    categories = defaultdict(list)
+    errors = 0
+    for books, batch_errors in results:
+        errors += batch_errors
+        for book in books:
+            categories[book['category']].append(book)
+    for category_name, books in categories.items():
+        save_all_categories_to_csv(books, category_name, base_dir, output_format, scraped_on=scraped_on)
+        if history is not None:
+            history.record(category_name, books, scraped_on=scraped_on)
+    get_background_writer().flush()
+    books_count = sum(len(books) for books in categories.values())
+    get_metrics().inc('items', books_count, level='book')
+    print(f"[REJEU] {books_count} livres ré-extraits dans {len(categories)} catégories, {errors} pages en erreur.")
+    return {'run': run, 'pages': len(latest), 'books': books_count, 'errors': errors, 'categories': len(categories)}
+
+
+def print_runs(archive):
+    """
+    Affiche la liste des runs archivés.
+    """
+    runs = archive.runs()
+    if not runs:
+        print("Aucun run archivé.")
+    for entry in runs:
+        print(f"{entry['run']}  {entry['records']:>7} pages  {entry['segments']:>3} segments  "
+              f"{entry['size'] / 1e6:>8.1f} Mo")
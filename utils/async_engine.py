@@ -0,0 +1,401 @@
+import asyncio
+import os
+import time
+from bs4 import BeautifulSoup
+from phase2.scraper_category import parse_category_page, parse_page_count, predict_page_urls
+from utils.parsers import get_parser
+from utils.image_store import ImageStore, get_image_store
+from utils.metrics import get_metrics
+from utils.scheduler import get_scheduler, parse_retry_after
+
+"""
+Moteur de crawl asynchrone (asyncio + aiohttp), alternative aux ThreadPoolExecutor des phases 3 et 4.
+
+Les pages de catégorie, les pages produit et les images de couverture passent par une seule
+boucle d'événements. La concurrence est bornée par une limite globale de requêtes en vol
+et par une limite par hôte, au lieu d'un nombre fixe de threads. Chaque requête passe en plus
+par l'ordonnanceur partagé (utils.scheduler) : débit par hôte, concurrence adaptative et reprises.
+
+Dépendance optionnelle : aiohttp (pip install aiohttp).
+"""
+
+DEFAULT_MAX_IN_FLIGHT = 200
+DEFAULT_PER_HOST = 50
+DEFAULT_TIMEOUT = 10
+CHUNK_SIZE = 64 * 1024
+
+
+def _import_aiohttp():
+    """
+    Importe aiohttp à la demande.
+
+    Raises:
+        ImportError: Si aiohttp n'est pas installé.
+    """
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError("[ERREUR] Le moteur asynchrone nécessite aiohttp : pip install aiohttp") from e
+    return aiohttp
+
+
+class AsyncCrawler:
+    """
+    Client de crawl asynchrone partageant une session aiohttp et ses limites de concurrence.
+
+    À utiliser comme gestionnaire de contexte asynchrone :
+
+        async with AsyncCrawler() as crawler:
+            books = await crawler.scrape_books(urls)
+
+    La limite de concurrence de l'ordonnanceur partagé est relevée à `per_host`. Le débit par hôte
+    reste limité par l'ordonnanceur (--rate / --max-rate) : à débit r et latence l, au plus r × l
+    requêtes sont en vol vers un même hôte.
+
+    Args:
+        max_in_flight (int, optional): Nombre maximal de requêtes simultanées, tous hôtes confondus.
+        per_host (int, optional): Nombre maximal de requêtes simultanées vers un même hôte.
+        timeout (int, optional): Timeout total d'une requête en secondes.
+        parser (str, optional): Parseur des pages produit : 'bs4', 'lxml' ou 'auto'.
+        scheduler (FetchScheduler, optional): Ordonnanceur des requêtes (par défaut, l'ordonnanceur partagé).
+        image_store (ImageStore, optional): Stockage des images de couverture (par défaut, le stockage partagé).
+        archive (ResponseArchive, optional): Si fournie, les pages HTML reçues y sont archivées.
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT,
+                 parser='auto', scheduler=None, image_store=None, archive=None):
+        self.parser = get_parser(parser)
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.timeout = timeout
+        self.scheduler = scheduler if scheduler is not None else get_scheduler()
+        self.scheduler.allow_concurrency(per_host)
+        self._image_store = image_store
+        self.archive = archive
+        self._session = None
+        self._aiohttp = None
+
+    @property
+    def image_store(self):
+        if self._image_store is None:
+            self._image_store = get_image_store()
+        return self._image_store
+
+    async def __aenter__(self):
+        aiohttp = self._aiohttp = _import_aiohttp()
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.per_host)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+
+    async def _get(self, url, **kwargs):
+        """
+        Envoie une requête GET soumise à l'ordonnanceur, avec reprises des erreurs réseau, 429 et 5xx.
+
+        Args:
+            url (str): L'URL à récupérer.
+            **kwargs: Arguments supplémentaires transmis à `aiohttp.ClientSession.get` (ex : headers).
+
+        Returns:
+            aiohttp.ClientResponse: La réponse, à utiliser comme gestionnaire de contexte asynchrone.
+        """
+        attempt = 0
+        while True:
+            wait = self.scheduler.try_acquire(url)
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self.scheduler.try_acquire(url)
+            started = time.monotonic()
+            released = False
+            try:
+                response = await self._session.get(url, **kwargs)
+            except (self._aiohttp.ClientError, asyncio.TimeoutError):
+                released = True
+                self.scheduler.release(url, None, time.monotonic() - started)
+                get_metrics().inc('http_responses', status='network_error')
+                if not self.scheduler.should_retry(attempt):
+                    raise
+                retry_after = None
+            else:
+                released = True
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.scheduler.release(url, response.status, time.monotonic() - started, retry_after)
+                get_metrics().inc('http_responses', status=response.status)
+                if not self.scheduler.should_retry(attempt, response.status):
+                    return response
+                response.release()
+            finally:
+                # Toute autre exception (URL invalide, annulation de la tâche...) libère le créneau sans ajuster l'hôte.
+                if not released:
+                    self.scheduler.cancel(url)
+            await asyncio.sleep(self.scheduler.backoff_delay(url, attempt, retry_after))
+            attempt += 1
+
+    async def fetch_text(self, url, level='book'):
+        """
+        Récupère le contenu HTML d'une page, décodé en UTF-8.
+
+        Args:
+            url (str): L'URL de la page.
+            level (str, optional): Niveau de la page pour les métriques ('category' ou 'book').
+
+        Returns:
+            str: Le contenu de la page.
+
+        Raises:
+            RuntimeError: En cas d'échec HTTP.
+        """
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            async with await self._get(url) as response:
+                response.raise_for_status()
+                content = await response.read()
+                if self.archive is not None:
+                    self.archive.record(str(response.url), response.status, response.reason, response.headers, content)
+            metrics.observe('fetch_seconds', time.perf_counter() - started, level=level)
+            metrics.inc('bytes_fetched', len(content), level=level)
+            return content.decode('utf-8', errors='replace')
+        except Exception as e:
+            metrics.inc('errors', level=level, stage='fetch')
+            raise RuntimeError(f"[ERREUR] Echec lors de la récupération de l'URL : {url}\n-> {e}")
+
+    async def fetch_category_urls(self, category_url):
+        """
+        Récupère tous les liens des livres d'une catégorie : les pages 2 à N sont demandées
+        en même temps lorsque la pagination ("Page 1 of N") le permet.
+
+        Args:
+            category_url (str): L'URL de la première page de la catégorie.
+
+        Returns:
+            list[str]: Liste des URLs complètes des livres de la catégorie.
+        """
+        soup = BeautifulSoup(await self.fetch_text(category_url, 'category'), 'html.parser')
+        urls, current_url = parse_category_page(soup, category_url)
+
+        predicted_urls = predict_page_urls(current_url, parse_page_count(soup))
+        if predicted_urls:
+            pages = await asyncio.gather(*(self.fetch_text(page_url, 'category') for page_url in predicted_urls))
+            for page_url, html in zip(predicted_urls, pages):
+                urls.extend(parse_category_page(BeautifulSoup(html, 'html.parser'), page_url)[0])
+            return urls
+
+        while current_url:
+            html = await self.fetch_text(current_url, 'category')
+            page_urls, current_url = parse_category_page(BeautifulSoup(html, 'html.parser'), current_url)
+            urls.extend(page_urls)
+        return urls
+
+    async def scrape_book(self, url):
+        """
+        Récupère et extrait les données d'un livre.
+
+        Args:
+            url (str): L'URL de la page produit.
+
+        Returns:
+            dict | None: Les données du livre, ou None en cas d'erreur.
+        """
+        try:
+            html = await self.fetch_text(url)
+            book = self.parser.extract(html, url)
+            get_metrics().inc('items', level='book')
+            return book
+        except Exception as e:
+            print(f"[ERREUR] Livre non traité ({url}) : {e}")
+            get_metrics().inc('errors', level='book', stage='scrape')
+            return None
+
+    async def scrape_books(self, book_urls, sink=None):
+        """
+        Récupère les données de plusieurs livres de manière concurrente.
+
+        Args:
+            book_urls (list[str]): Liste des URLs des pages produit.
+            sink (CategoryStreamWriter, optional): Sortie en flux. Si fournie, chaque livre y est écrit
+                                                   dès qu'il est récupéré au lieu d'être conservé en mémoire.
+
+        Returns:
+            list[dict]: Données des livres, dans l'ordre des URLs (les livres en erreur sont ignorés).
+                        Liste vide si `sink` est fourni.
+        """
+        if sink is None:
+            results = await asyncio.gather(*(self.scrape_book(url) for url in book_urls))
+            return [result for result in results if result]
+        for future in asyncio.as_completed([self.scrape_book(url) for url in book_urls]):
+            book = await future
+            if book:
+                sink.write(book)
+        return []
+
+    async def download_image(self, image_url, image_path):
+        """
+        Récupère une image dans le stockage d'images (téléchargement par blocs ou re-validation
+        conditionnelle) et la lie à l'emplacement demandé.
+
+        Args:
+            image_url (str): URL de l'image.
+            image_path (str): Chemin du fichier de destination.
+        """
+        store = self.image_store
+        try:
+            object_path, headers = store.lookup(image_url)
+            if object_path is not None and store.is_fresh(image_url):
+                store.count('reused')
+            else:
+                started = time.perf_counter()
+                async with await self._get(image_url, headers=headers) as response:
+                    if response.status == 304 and object_path is not None:
+                        store.mark_fresh(image_url, 'not_modified')
+                    else:
+                        response.raise_for_status()
+                        writer = store.begin()
+                        try:
+                            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                                writer.write(chunk)
+                        except BaseException:
+                            writer.abort()
+                            raise
+                        object_path = writer.commit(image_url, response.headers)
+                        store.count('downloaded')
+                get_metrics().observe('fetch_seconds', time.perf_counter() - started, level='image')
+            ImageStore.link(object_path, image_path)
+        except Exception as e:
+            print(f"[ERREUR] Téléchargement échoué ({image_url}) : {e}")
+            get_metrics().inc('errors', level='image', stage='download')
+
+    async def download_images(self, all_books_data, book_cover_dir):
+        """
+        Télécharge de manière concurrente les images de couverture d'une liste de livres.
+
+        Args:
+            all_books_data (list[dict]): Données des livres (clés 'image_url' et 'title').
+            book_cover_dir (str): Dossier où enregistrer les images.
+        """
+        from phase4.scraper_all import cover_image_path
+
+        os.makedirs(book_cover_dir, exist_ok=True)
+        await asyncio.gather(*(
+            self.download_image(book["image_url"], cover_image_path(book, book_cover_dir))
+            for book in all_books_data
+        ))
+
+    async def crawl_category(self, category_name, category_url, on_category_done, dedup=None):
+        """
+        Crawle une catégorie complète (pagination puis pages produit).
+
+        Args:
+            category_name (str): Nom de la catégorie.
+            category_url (str): URL de la première page de la catégorie.
+            on_category_done (callable): Fonction appelée avec (category_name, all_books_data, listed_urls)
+                                         une fois la catégorie terminée. Peut être une coroutine.
+            dedup (CrawlDedup, optional): Livres pris en charge pendant le run : ceux déjà réservés par une autre
+                                          catégorie ne sont pas récupérés, leur enregistrement est attendu.
+        """
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            book_urls = await self.fetch_category_urls(category_url)
+        except Exception as e:
+            print(f"[ERREUR] Catégorie non traitée ({category_name}) : {e}")
+            metrics.inc('errors', level='category', stage='discover')
+            return
+        listed_urls = book_urls
+        if dedup is not None:
+            book_urls = dedup.claim_all(book_urls)
+        all_books_data = await self.scrape_books(book_urls)
+        if dedup is not None:
+            # Publier avant d'attendre : deux catégories qui partagent des livres ne s'attendent pas mutuellement.
+            for book in all_books_data:
+                dedup.write(book)
+            dedup.release(book_urls)
+            await asyncio.gather(*(asyncio.wrap_future(dedup.shared(url)) for url in listed_urls))
+            all_books_data = dedup.books(listed_urls)
+        print(f"[ASYNC] Catégorie {category_name} : {len(all_books_data)} livres récupérés.")
+        result = on_category_done(category_name, all_books_data, listed_urls)
+        if asyncio.iscoroutine(result):
+            await result
+        metrics.observe('category_seconds', time.perf_counter() - started)
+        metrics.inc('items', level='category')
+
+
+def scrape_books_async(book_urls, max_in_flight=DEFAULT_MAX_IN_FLIGHT, per_host=DEFAULT_PER_HOST, parser='auto',
+                       sink=None):
+    """
+    Équivalent asynchrone de `scrape_books_parallel`, exécuté dans sa propre boucle d'événements.
+
+    Args:
+        book_urls (list[str]): Liste des URLs des pages produit.
+        max_in_flight (int, optional): Nombre maximal de requêtes simultanées.
+        per_host (int, optional): Nombre maximal de requêtes simultanées par hôte.
+        parser (str, optional): Parseur des pages produit : 'bs4', 'lxml' ou 'auto'.
+        sink (CategoryStreamWriter, optional): Sortie en flux (voir `AsyncCrawler.scrape_books`).
+
+    Returns:
+        list[dict]: Données des livres (les livres en erreur sont ignorés). Liste vide si `sink` est fourni.
+    """
+    async def run():
+        async with AsyncCrawler(max_in_flight, per_host, parser=parser) as crawler:
+            return await crawler.scrape_books(book_urls, sink)
+
+    return asyncio.run(run())
+
+
+def download_images_async(all_books_data, book_cover_dir, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                          per_host=DEFAULT_PER_HOST):
+    """
+    Équivalent asynchrone de `download_images_parallel`.
+
+    Args:
+        all_books_data (list[dict]): Données des livres (clés 'image_url' et 'title').
+        book_cover_dir (str): Dossier où enregistrer les images.
+        max_in_flight (int, optional): Nombre maximal de requêtes simultanées.
+        per_host (int, optional): Nombre maximal de requêtes simultanées par hôte.
+    """
+    async def run():
+        async with AsyncCrawler(max_in_flight, per_host) as crawler:
+            await crawler.download_images(all_books_data, book_cover_dir)
+
+    asyncio.run(run())
+
+
+def crawl_categories_async(categories, on_category_done, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                           per_host=DEFAULT_PER_HOST, with_images_dir=None, dedup=None, archive=None):
+    """
+    Crawle toutes les catégories en même temps dans une seule boucle d'événements.
+
+    Args:
+        categories (list[tuple[str, str]]): Couples (nom de catégorie, URL de catégorie).
+        on_category_done (callable): Fonction appelée avec (category_name, all_books_data, listed_urls)
+                                     à la fin de chaque catégorie (ex : sauvegarde CSV). Elle est exécutée
+                                     dans un thread, hors de la boucle d'événements : ses écritures (fichiers,
+                                     SQLite) ne bloquent pas les requêtes en cours. Elle doit être thread-safe.
+        max_in_flight (int, optional): Nombre maximal de requêtes simultanées.
+        per_host (int, optional): Nombre maximal de requêtes simultanées par hôte.
+        with_images_dir (callable, optional): Si fourni, fonction qui retourne le dossier des
+                                              couvertures d'une catégorie ; les images sont alors
+                                              téléchargées dans la même boucle.
+        dedup (CrawlDedup, optional): Si fourni, un livre présent dans plusieurs catégories n'est récupéré
+                                      qu'une fois : son enregistrement est ajouté à chacune de ces catégories.
+        archive (ResponseArchive, optional): Si fournie, les pages HTML reçues y sont archivées.
+    """
+    async def run():
+        async with AsyncCrawler(max_in_flight, per_host, archive=archive) as crawler:
+            async def done(category_name, all_books_data, listed_urls):
+                await asyncio.get_running_loop().run_in_executor(
+                    None, on_category_done, category_name, all_books_data, listed_urls
+                )
+                if with_images_dir is not None:
+                    await crawler.download_images(all_books_data, with_images_dir(category_name))
+
+            await asyncio.gather(*(
+                crawler.crawl_category(name, url, done, dedup) for name, url in categories
+            ))
+
+    asyncio.run(run())
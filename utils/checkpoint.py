@@ -0,0 +1,215 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.records import BookRecord, to_json
+
+"""
+Journal de reprise du crawl complet : enregistre au fil de l'eau les pages de catégorie
+explorées, les livres récupérés, les images téléchargées et les catégories terminées,
+pour qu'un run interrompu puisse reprendre là où il s'était arrêté.
+"""
+
+DEFAULT_JOURNAL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'checkpoint.sqlite3'))
+
+
+class CheckpointJournal:
+    """
+    Journal de reprise stocké dans une base SQLite, partageable entre threads.
+
+    Args:
+        path (str, optional): Chemin du fichier SQLite (par défaut : .cache/checkpoint.sqlite3 à la racine du projet).
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS categories (
+                name TEXT PRIMARY KEY,
+                listing_done INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS listing_pages (
+                category TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                urls TEXT NOT NULL,
+                PRIMARY KEY (category, page_number)
+            );
+            CREATE TABLE IF NOT EXISTS products (
+                url TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                data TEXT NOT NULL,
+                done_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_products_category ON products (category);
+            CREATE TABLE IF NOT EXISTS images (
+                url TEXT PRIMARY KEY,
+                done_at REAL NOT NULL
+            );
+        """)
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def reset(self):
+        """
+        Vide le journal pour démarrer un nouveau run complet.
+        """
+        with self._lock:
+            self._conn.executescript(
+                "DELETE FROM categories; DELETE FROM listing_pages; DELETE FROM products; DELETE FROM images;"
+            )
+
+    def is_category_done(self, name):
+        """
+        Indique si une catégorie a été entièrement traitée (CSV et images).
+        """
+        return bool(self._execute("SELECT 1 FROM categories WHERE name = ? AND done = 1", (name,)))
+
+    def mark_category_done(self, name):
+        """
+        Marque une catégorie comme entièrement traitée.
+        """
+        self._execute(
+            "INSERT INTO categories (name, listing_done, done) VALUES (?, 1, 1) "
+            "ON CONFLICT(name) DO UPDATE SET listing_done = 1, done = 1",
+            (name,),
+        )
+
+    def record_listing_page(self, category, page_number, urls):
+        """
+        Enregistre les liens des livres d'une page de catégorie explorée.
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO listing_pages (category, page_number, urls) VALUES (?, ?, ?)",
+            (category, page_number, json.dumps(urls)),
+        )
+
+    def mark_listing_done(self, category):
+        """
+        Marque la pagination d'une catégorie comme entièrement explorée.
+        """
+        self._execute(
+            "INSERT INTO categories (name, listing_done) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET listing_done = 1",
+            (category,),
+        )
+
+    def listing_urls(self, category):
+        """
+        Retourne les liens des livres d'une catégorie si sa pagination a été entièrement explorée.
+
+        Returns:
+            list[str] | None: Les URLs des livres, ou None si la pagination est incomplète.
+        """
+        if not self._execute("SELECT 1 FROM categories WHERE name = ? AND listing_done = 1", (category,)):
+            return None
+        rows = self._execute(
+            "SELECT urls FROM listing_pages WHERE category = ? ORDER BY page_number", (category,)
+        )
+        return [url for (urls,) in rows for url in json.loads(urls)]
+
+    def record_product(self, category, book):
+        """
+        Enregistre les données d'un livre récupéré avec succès.
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO products (url, category, data, done_at) VALUES (?, ?, ?, ?)",
+            (book['product_page_url'], category, json.dumps(book, ensure_ascii=False, default=to_json), time.time()),
+        )
+
+    def products(self, category):
+        """
+        Retourne les livres déjà récupérés pour une catégorie, indexés par URL.
+
+        Returns:
+            dict[str, BookRecord]: Données des livres par URL de page produit.
+        """
+        rows = self._execute("SELECT url, data FROM products WHERE category = ?", (category,))
+        return {url: BookRecord.from_mapping(json.loads(data)) for url, data in rows}
+
+    def product_sink(self, category):
+        """
+        Retourne une sortie en flux (méthode `write`) qui enregistre chaque livre dans le journal.
+
+        Args:
+            category (str): Nom de la catégorie des livres.
+
+        Returns:
+            ProductSink: Sortie utilisable par `scrape_books_parallel(sink=...)`.
+        """
+        return ProductSink(self, category)
+
+    def record_image(self, image_url):
+        """
+        Enregistre une image de couverture téléchargée (ou déjà présente sur le disque).
+        """
+        self._execute("INSERT OR REPLACE INTO images (url, done_at) VALUES (?, ?)", (image_url, time.time()))
+
+    def done_images(self):
+        """
+        Retourne l'ensemble des URLs d'images déjà téléchargées.
+        """
+        return {url for (url,) in self._execute("SELECT url FROM images")}
+
+    def missing_work(self, category, book_urls):
+        """
+        Retourne le travail restant d'une catégorie : livres non récupérés et couvertures non téléchargées.
+
+        Args:
+            category (str): Nom de la catégorie.
+            book_urls (list[str]): URLs des pages produit listées pour la catégorie.
+
+        Returns:
+            tuple[list[str], list[str]]: URLs des pages produit et URLs des images absentes du journal.
+        """
+        done = self.products(category)
+        done_images = self.done_images()
+        missing_products = [url for url in book_urls if url not in done]
+        missing_images = [done[url]['image_url'] for url in book_urls
+                          if url in done and done[url]['image_url'] not in done_images]
+        return missing_products, missing_images
+
+    def summary(self):
+        """
+        Retourne le nombre d'éléments enregistrés dans le journal.
+
+        Returns:
+            dict[str, int]: Catégories terminées, pages de catégorie, livres et images enregistrés.
+        """
+        return {
+            'categories': self._execute("SELECT COUNT(*) FROM categories WHERE done = 1")[0][0],
+            'listing_pages': self._execute("SELECT COUNT(*) FROM listing_pages")[0][0],
+            'products': self._execute("SELECT COUNT(*) FROM products")[0][0],
+            'images': self._execute("SELECT COUNT(*) FROM images")[0][0],
+        }
+
+    def close(self):
+        """
+        Ferme la connexion à la base.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class ProductSink:
+    """
+    Sortie en flux qui enregistre chaque livre récupéré dans le journal de reprise.
+
+    Args:
+        journal (CheckpointJournal): Journal de reprise.
+        category (str): Nom de la catégorie des livres.
+    """
+
+    def __init__(self, journal, category):
+        self.journal = journal
+        self.category = category
+
+    def write(self, book):
+        self.journal.record_product(self.category, book)
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+from datetime import date
+
+"""
+Mode delta : conserve le dernier état connu de chaque produit de chaque catégorie (indexé par
+catégorie et UPC) et calcule, à chaque run, les produits ajoutés, retirés ou modifiés (prix et stock)
+d'une catégorie. Un livre listé par plusieurs catégories a un état par catégorie.
+"""
+
+DEFAULT_SNAPSHOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'snapshot.sqlite3'))
+TRACKED_FIELDS = ('price_including_tax', 'price_excluding_tax', 'number_available')
+CHANGE_FIELDNAMES = ['change_type', 'universal_product_code', 'title', 'product_page_url'] + [
+    f"{field}_{suffix}" for field in TRACKED_FIELDS for suffix in ('old', 'new')
+]
+
+
+class SnapshotStore:
+    """
+    Dernier état connu des produits, stocké dans une base SQLite indexée par catégorie et par UPC.
+
+    Args:
+        path (str, optional): Chemin du fichier SQLite (par défaut : .cache/snapshot.sqlite3 à la racine du projet).
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS category_snapshot (
+                category TEXT NOT NULL,
+                universal_product_code TEXT NOT NULL,
+                title TEXT,
+                product_page_url TEXT,
+                price_including_tax REAL,
+                price_excluding_tax REAL,
+                number_available INTEGER,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (category, universal_product_code)
+            ) WITHOUT ROWID;
+        """)
+        with self._conn:
+            # Ancienne table indexée par UPC seul (un livre partagé passait d'une catégorie à l'autre).
+            if self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'snapshot'").fetchone():
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO category_snapshot SELECT category, universal_product_code, title, "
+                    f"product_page_url, {', '.join(TRACKED_FIELDS)}, updated_at FROM snapshot"
+                )
+                self._conn.execute("DROP TABLE snapshot")
+
+    def apply(self, category_name, books, listed_urls=None):
+        """
+        Compare les livres d'une catégorie au dernier état connu, puis met l'état à jour.
+
+        Un livre connu mais absent de `books` n'est signalé 'removed' (et retiré de l'état) que s'il
+        ne figure plus dans la liste de la catégorie : un échec de récupération n'est pas un retrait.
+
+        Args:
+            category_name (str): Nom de la catégorie crawlée.
+            books (list[dict]): Livres récupérés pour cette catégorie lors du run courant.
+            listed_urls (Iterable[str], optional): URLs des pages produit listées pour la catégorie
+                                                   (par défaut, celles des livres récupérés).
+
+        Returns:
+            list[dict]: Lignes du journal des changements ('added', 'removed' ou 'changed'),
+                        avec les anciennes et nouvelles valeurs des champs suivis.
+        """
+        today = date.today().isoformat()
+        with self._lock, self._conn:
+            previous = {
+                row[0]: row for row in self._conn.execute(
+                    "SELECT universal_product_code, title, product_page_url, "
+                    f"{', '.join(TRACKED_FIELDS)} FROM category_snapshot WHERE category = ?",
+                    (category_name,),
+                )
+            }
+
+            changes = []
+            current = set()
+            for book in books:
+                upc = book['universal_product_code']
+                current.add(upc)
+                new_values = tuple(book[field] for field in TRACKED_FIELDS)
+                old = previous.get(upc)
+                if old is None:
+                    changes.append(self._change('added', upc, book['title'], book['product_page_url'], None, new_values))
+                elif tuple(old[3:]) != new_values:
+                    changes.append(self._change('changed', upc, book['title'], book['product_page_url'],
+                                                old[3:], new_values))
+
+            listed = set(listed_urls) if listed_urls is not None else None
+            removed = [upc for upc, old in previous.items()
+                       if upc not in current and (listed is None or old[2] not in listed)]
+            for upc in removed:
+                old = previous[upc]
+                changes.append(self._change('removed', upc, old[1], old[2], old[3:], None))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO category_snapshot (universal_product_code, category, title, product_page_url, "
+                f"{', '.join(TRACKED_FIELDS)}, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (book['universal_product_code'], category_name, book['title'], book['product_page_url'],
+                     *(book[field] for field in TRACKED_FIELDS), today)
+                    for book in books
+                ],
+            )
+            self._conn.executemany(
+                "DELETE FROM category_snapshot WHERE category = ? AND universal_product_code = ?",
+                [(category_name, upc) for upc in removed],
+            )
+        return changes
+
+    @staticmethod
+    def _change(change_type, upc, title, url, old_values, new_values):
+        change = {'change_type': change_type, 'universal_product_code': upc, 'title': title, 'product_page_url': url}
+        for index, field in enumerate(TRACKED_FIELDS):
+            change[f"{field}_old"] = old_values[index] if old_values is not None else ''
+            change[f"{field}_new"] = new_values[index] if new_values is not None else ''
+        return change
+
+    def close(self):
+        """
+        Ferme la connexion à la base.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,256 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from functools import partial
+from utils.saver import BatchSink
+
+"""
+Historique des prix et du stock : chaque run enregistre une ligne par livre et par jour
+dans une base SQLite indexée par UPC, catégorie et date, ce qui permet de suivre l'évolution
+d'un prix ou de lister les ruptures de stock sans relire les CSV datés de chaque run.
+
+Usage (depuis la racine du projet), équivalent à python -m booksonline history :
+    python -m utils.history price a897fe39b1053632 --days 90
+    python -m utils.history stock-outs --category Poetry
+"""
+
+DEFAULT_HISTORY_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'history.sqlite3'))
+HISTORY_BATCH_SIZE = 500
+
+
+def _in_stock(book):
+    """
+    Déduit la disponibilité d'un livre du stock chiffré (page produit) ou du libellé
+    'availability' (mode "prix seuls").
+    """
+    number_available = book.get('number_available')
+    if isinstance(number_available, int):
+        return int(number_available > 0)
+    availability = book.get('availability')
+    if availability is not None:
+        return int('in stock' in availability.lower())
+    return None
+
+
+def _price_row(book, product_id, scraped_on):
+    number_available = book.get('number_available')
+    return (
+        product_id, scraped_on,
+        book.get('price_including_tax'), book.get('price_excluding_tax'),
+        number_available if isinstance(number_available, int) else None,
+        _in_stock(book),
+    )
+
+
+class PriceHistory:
+    """
+    Historique des prix stocké dans une base SQLite, partageable entre threads.
+
+    Les données fixes d'un livre (URL, UPC, titre, catégorie) sont stockées une seule fois
+    dans la table 'products' ; la table 'prices' ne contient qu'une ligne courte par livre et
+    par jour de scraping. Relancer un run le même jour met la ligne à jour au lieu de la dupliquer.
+
+    Args:
+        path (str, optional): Chemin du fichier SQLite (par défaut : .cache/history.sqlite3 à la racine du projet).
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY,
+                product_page_url TEXT NOT NULL UNIQUE,
+                universal_product_code TEXT,
+                category TEXT NOT NULL,
+                title TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_products_upc ON products (universal_product_code);
+            CREATE INDEX IF NOT EXISTS idx_products_category ON products (category);
+            CREATE TABLE IF NOT EXISTS prices (
+                product_id INTEGER NOT NULL REFERENCES products (id),
+                scraped_on TEXT NOT NULL,
+                price_including_tax REAL,
+                price_excluding_tax REAL,
+                number_available INTEGER,
+                in_stock INTEGER,
+                PRIMARY KEY (product_id, scraped_on)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_prices_date ON prices (scraped_on, in_stock);
+        """)
+
+    def record(self, category_name, books, scraped_on=None):
+        """
+        Enregistre les livres d'une catégorie pour le jour donné, en une seule transaction.
+
+        Les livres du mode "prix seuls" (sans UPC ni stock chiffré) sont acceptés : les colonnes
+        absentes restent vides et la disponibilité est déduite du libellé 'availability'.
+        Les livres sans 'product_page_url' sont ignorés.
+
+        Args:
+            category_name (str): Nom de la catégorie.
+            books (Iterable[Mapping]): Livres récupérés (BookRecord ou dictionnaires).
+            scraped_on (str, optional): Date du scraping au format ISO (par défaut : aujourd'hui).
+
+        Returns:
+            int: Nombre de lignes enregistrées.
+        """
+        scraped_on = scraped_on or date.today().isoformat()
+        books = [book for book in books if book.get('product_page_url')]
+        if not books:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO products (product_page_url, universal_product_code, category, title) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (product_page_url) DO UPDATE SET "
+                "universal_product_code = COALESCE(excluded.universal_product_code, universal_product_code), "
+                "category = excluded.category, title = COALESCE(excluded.title, title)",
+                [(book['product_page_url'], book.get('universal_product_code'), category_name, book.get('title'))
+                 for book in books],
+            )
+            product_ids = dict(self._conn.execute(
+                "SELECT product_page_url, id FROM products WHERE category = ?", (category_name,)
+            ))
+            self._conn.executemany(
+                "INSERT INTO prices (product_id, scraped_on, price_including_tax, price_excluding_tax, "
+                "number_available, in_stock) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (product_id, scraped_on) DO UPDATE SET "
+                "price_including_tax = excluded.price_including_tax, "
+                "price_excluding_tax = COALESCE(excluded.price_excluding_tax, price_excluding_tax), "
+                "number_available = COALESCE(excluded.number_available, number_available), "
+                "in_stock = excluded.in_stock",
+                [_price_row(book, product_ids[book['product_page_url']], scraped_on) for book in books],
+            )
+        return len(books)
+
+    def writer(self, category_name, batch_size=HISTORY_BATCH_SIZE):
+        """
+        Retourne une sortie en flux (méthode `write`) qui enregistre les livres par lots.
+
+        Args:
+            category_name (str): Nom de la catégorie des livres.
+            batch_size (int, optional): Nombre de livres par transaction.
+
+        Returns:
+            BatchSink: Sortie à fermer (ou à utiliser comme gestionnaire de contexte).
+        """
+        return BatchSink(partial(self.record, category_name, scraped_on=date.today().isoformat()), batch_size)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def latest_date(self):
+        """
+        Retourne la date du dernier scraping enregistré (None si l'historique est vide).
+        """
+        with self._lock:
+            return self._conn.execute("SELECT MAX(scraped_on) FROM prices").fetchone()[0]
+
+    def price_history(self, product, days=None):
+        """
+        Retourne l'évolution du prix et du stock d'un livre.
+
+        Args:
+            product (str): Code UPC du livre, ou URL de sa page produit (livres enregistrés
+                           en mode "prix seuls", sans UPC).
+            days (int, optional): Limite l'historique aux `days` derniers jours.
+
+        Returns:
+            list[dict]: Une ligne par jour de scraping (date, titre, prix, stock), dans l'ordre chronologique.
+        """
+        column = 'product_page_url' if '://' in product else 'universal_product_code'
+        sql = ("SELECT p.scraped_on, d.title, d.category, p.price_including_tax, p.price_excluding_tax, "
+               "p.number_available, p.in_stock FROM products d JOIN prices p ON p.product_id = d.id "
+               f"WHERE d.{column} = ?")
+        params = [product]
+        if days is not None:
+            sql += " AND p.scraped_on >= ?"
+            params.append((date.today() - timedelta(days=days)).isoformat())
+        return self._query(sql + " ORDER BY p.scraped_on", params)
+
+    def stock_outs(self, category=None, scraped_on=None):
+        """
+        Liste les livres en rupture de stock à une date donnée.
+
+        Args:
+            category (str, optional): Limite la recherche à une catégorie.
+            scraped_on (str, optional): Date ISO du scraping (par défaut : le dernier scraping enregistré).
+
+        Returns:
+            list[dict]: Livres en rupture (UPC, titre, catégorie, dernier prix, URL), triés par catégorie et titre.
+        """
+        scraped_on = scraped_on or self.latest_date()
+        sql = ("SELECT d.universal_product_code, d.title, d.category, p.price_including_tax, d.product_page_url "
+               "FROM prices p JOIN products d ON d.id = p.product_id WHERE p.scraped_on = ? AND p.in_stock = 0")
+        params = [scraped_on]
+        if category is not None:
+            sql += " AND d.category = ?"
+            params.append(category)
+        return self._query(sql + " ORDER BY d.category, d.title", params)
+
+    def close(self):
+        """
+        Ferme la connexion à la base.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def format_price(price):
+    return 'N/A' if price is None else f"£{price:.2f}"
+
+
+def print_price_history(history, product, days=None):
+    """
+    Affiche l'évolution du prix et du stock d'un livre, avec la durée de la requête.
+    """
+    started = time.perf_counter()
+    rows = history.price_history(product, days)
+    for row in rows:
+        stock = row['number_available'] if row['number_available'] is not None else (
+            'en stock' if row['in_stock'] else 'rupture')
+        print(f"{row['scraped_on']}  {format_price(row['price_including_tax'])}  stock : {stock}  {row['title']}")
+    print(f"\n{len(rows)} lignes en {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def print_stock_outs(history, category=None, scraped_on=None):
+    """
+    Affiche les livres en rupture de stock, avec la durée de la requête.
+    """
+    started = time.perf_counter()
+    rows = history.stock_outs(category, scraped_on)
+    for row in rows:
+        print(f"[{row['category']}] {row['title']} (UPC {row['universal_product_code'] or 'N/A'}, "
+              f"{format_price(row['price_including_tax'])}) {row['product_page_url']}")
+    print(f"\n{len(rows)} lignes en {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def main(argv=None):
+    """
+    Interroge l'historique depuis la ligne de commande : raccourci de `python -m booksonline history`,
+    qui définit les requêtes et leurs options.
+
+    Args:
+        argv (list[str], optional): Arguments de la requête (par défaut : ceux du processus).
+
+    Returns:
+        int: Code de sortie du processus.
+    """
+    from booksonline.cli import main as cli_main
+
+    return cli_main(['history'] + (sys.argv[1:] if argv is None else list(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
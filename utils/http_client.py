@@ -0,0 +1,211 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from utils.metrics import get_metrics
+from utils.scheduler import get_scheduler, parse_retry_after
+
+"""
+Client HTTP partagé par les quatre phases : une seule session requests, un pool de
+connexions keep-alive par hôte dimensionné sur le nombre de workers, et des
+statistiques de réutilisation des connexions.
+
+Toutes les requêtes de la session passent par l'ordonnanceur partagé (utils.scheduler) :
+limite de débit par hôte, concurrence adaptative et reprises avec backoff.
+"""
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT = 10
+MAX_HOST_POOLS = 10
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class ScheduledAdapter(HTTPAdapter):
+    """
+    `HTTPAdapter` qui soumet chaque requête à un `FetchScheduler` : attente d'un créneau,
+    retour d'information (code HTTP, latence) et reprises des erreurs réseau, 429 et 5xx.
+
+    Args:
+        scheduler (FetchScheduler): Ordonnanceur des requêtes.
+        **kwargs: Arguments transmis à `HTTPAdapter`.
+    """
+
+    def __init__(self, scheduler, **kwargs):
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        attempt = 0
+        while True:
+            self.scheduler.acquire(request.url)
+            started = time.monotonic()
+            released = False
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                released = True
+                self.scheduler.release(request.url, None, time.monotonic() - started)
+                get_metrics().inc('http_responses', status='network_error')
+                if not self.scheduler.should_retry(attempt):
+                    raise
+                retry_after = None
+            else:
+                released = True
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.scheduler.release(request.url, response.status_code, time.monotonic() - started, retry_after)
+                get_metrics().inc('http_responses', status=response.status_code)
+                if not self.scheduler.should_retry(attempt, response.status_code):
+                    return response
+                response.close()
+            finally:
+                # Toute autre exception (URL ou en-tête invalide...) libère le créneau sans ajuster l'hôte.
+                if not released:
+                    self.scheduler.cancel(request.url)
+            time.sleep(self.scheduler.backoff_delay(request.url, attempt, retry_after))
+            attempt += 1
+
+
+class FetchClient:
+    """
+    Encapsule une `requests.Session` montée sur un `HTTPAdapter` dont le pool
+    par hôte est dimensionné sur le nombre de threads qui l'utilisent.
+
+    Args:
+        pool_size (int, optional): Nombre maximal de connexions conservées par hôte (20 par défaut).
+        timeout (int, optional): Timeout par défaut des requêtes en secondes (10 par défaut).
+        scheduler (FetchScheduler, optional): Ordonnanceur des requêtes (par défaut, l'ordonnanceur partagé).
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, scheduler=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.scheduler = scheduler if scheduler is not None else get_scheduler()
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        self._adapters = []
+        self._mount(pool_size)
+
+    def _mount(self, pool_size):
+        self.scheduler.allow_concurrency(pool_size)
+        self.adapter = ScheduledAdapter(
+            self.scheduler, pool_connections=MAX_HOST_POOLS, pool_maxsize=pool_size, pool_block=True
+        )
+        self._adapters.append(self.adapter)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def resize(self, pool_size):
+        """
+        Agrandit le pool de connexions par hôte sans fermer la session.
+
+        Un nouvel adaptateur est monté sur la même session : les requêtes en cours se terminent
+        sur l'ancien (qui n'est fermé qu'avec le client), les suivantes utilisent le nouveau pool.
+
+        Args:
+            pool_size (int): Nouveau nombre maximal de connexions conservées par hôte.
+        """
+        self.pool_size = pool_size
+        self._mount(pool_size)
+
+    def get(self, url, **kwargs):
+        """
+        Effectue une requête GET via la session partagée.
+
+        Args:
+            url (str): L'URL à récupérer.
+            **kwargs: Arguments supplémentaires transmis à `requests.Session.get`.
+
+        Returns:
+            requests.Response: La réponse HTTP.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def connection_stats(self):
+        """
+        Calcule les statistiques de réutilisation des connexions pour chaque hôte.
+
+        Returns:
+            dict[str, dict[str, int]]: Pour chaque hôte, le nombre de requêtes envoyées,
+            de connexions ouvertes et de requêtes servies par une connexion réutilisée.
+        """
+        stats = {}
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = f"{key.key_scheme}://{key.key_host}"
+                entry = stats.setdefault(host, {'requests': 0, 'connections': 0, 'reused': 0})
+                entry['requests'] += pool.num_requests
+                entry['connections'] += pool.num_connections
+                entry['reused'] += max(pool.num_requests - pool.num_connections, 0)
+        return stats
+
+    def print_connection_stats(self):
+        """
+        Affiche les statistiques de réutilisation des connexions dans la console.
+        """
+        for host, entry in self.connection_stats().items():
+            ratio = entry['reused'] / entry['requests'] * 100 if entry['requests'] else 0
+            print(f"[CONNEXIONS] {host} : {entry['requests']} requêtes, "
+                  f"{entry['connections']} connexions ouvertes, {ratio:.1f}% de réutilisation")
+        self.scheduler.print_stats()
+
+    def close(self):
+        """
+        Ferme la session et libère les connexions de ses pools.
+        """
+        self.session.close()
+        for adapter in self._adapters:
+            adapter.close()
+
+
+def get_client(pool_size=None):
+    """
+    Retourne le client HTTP partagé, en le créant au premier appel.
+
+    Si un `pool_size` supérieur à celui du client existant est demandé, le pool du client est
+    agrandi (voir `FetchClient.resize`) : la session, que d'autres threads peuvent être en train
+    d'utiliser, reste la même et n'est pas fermée.
+
+    Args:
+        pool_size (int, optional): Nombre de workers qui utiliseront le client.
+
+    Returns:
+        FetchClient: Le client HTTP partagé.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = FetchClient(pool_size=pool_size or DEFAULT_POOL_SIZE)
+        elif pool_size and pool_size > _client.pool_size:
+            _client.resize(pool_size)
+        return _client
+
+
+def get_session(session=None):
+    """
+    Retourne la session fournie ou, à défaut, celle du client partagé.
+
+    Args:
+        session (requests.Session, optional): Session explicitement fournie par l'appelant.
+
+    Returns:
+        requests.Session: La session à utiliser pour la requête.
+    """
+    return session if session is not None else get_client().session
+
+
+def close_client():
+    """
+    Ferme le client HTTP partagé s'il existe.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
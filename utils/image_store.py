@@ -0,0 +1,324 @@
+import hashlib
+import os
+import shutil
+import secrets
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+from utils.metrics import get_metrics
+
+"""
+Stockage des images de couverture adressé par contenu.
+
+Chaque image est enregistrée une seule fois sous l'empreinte SHA-256 de son contenu
+(.cache/images/objects/ab/abcdef....jpg). Un index SQLite associe chaque URL d'image à son
+empreinte et à ses en-têtes ETag / Last-Modified, pour re-valider les images avec des requêtes
+conditionnelles. Les dossiers de couvertures par catégorie ne contiennent que des liens
+(physiques, ou symboliques à défaut) vers ces fichiers.
+"""
+
+DEFAULT_STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'images'))
+CHUNK_SIZE = 64 * 1024
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class BlobWriter:
+    """
+    Écriture en flux d'une image dans un fichier temporaire du stockage, avec calcul de l'empreinte.
+
+    Le fichier est créé avec les droits par défaut du processus (0666 moins l'umask), comme
+    un fichier ouvert avec `open` : les couvertures restent lisibles par les autres utilisateurs.
+
+    Args:
+        store (ImageStore): Stockage de destination.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.tmp_path = os.path.join(store.objects_dir, f"{secrets.token_hex(8)}.tmp")
+        fd = os.open(self.tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk):
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self, url, headers):
+        """
+        Termine l'écriture et range l'image sous son empreinte (les doublons sont supprimés).
+
+        Args:
+            url (str): URL de l'image.
+            headers (Mapping[str, str]): En-têtes de la réponse HTTP.
+
+        Returns:
+            str: Chemin de l'image dans le stockage.
+        """
+        self._file.close()
+        get_metrics().inc('bytes_fetched', self.size, level='image')
+        content_hash = self._hash.hexdigest()
+        extension = os.path.splitext(urlsplit(url).path)[1] or '.jpg'
+        path = self.store.object_path(content_hash, extension)
+        if os.path.exists(path):
+            os.remove(self.tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self.tmp_path, path)
+        self.store.record(url, headers, content_hash, extension)
+        return path
+
+    def abort(self):
+        """
+        Abandonne l'écriture et supprime le fichier temporaire.
+        """
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class ImageStore:
+    """
+    Stockage d'images adressé par contenu, partageable entre threads.
+
+    Args:
+        root (str, optional): Dossier du stockage (par défaut : .cache/images à la racine du projet).
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, 'index.sqlite3'), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                extension TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_info (
+                content_hash TEXT PRIMARY KEY,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._fresh = set()
+        self.counters = {'downloaded': 0, 'not_modified': 0, 'reused': 0}
+
+    def object_path(self, content_hash, extension):
+        """
+        Retourne le chemin d'une image du stockage à partir de son empreinte.
+        """
+        return os.path.join(self.objects_dir, content_hash[:2], content_hash + extension)
+
+    def lookup(self, url):
+        """
+        Retourne le fichier stocké pour une URL et les en-têtes de re-validation associés.
+
+        Args:
+            url (str): URL de l'image.
+
+        Returns:
+            tuple[str | None, dict[str, str]]: Chemin de l'image (None si elle est absente du stockage)
+            et en-têtes de requête conditionnelle (If-None-Match / If-Modified-Since).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, extension FROM images WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None, {}
+        path = self.object_path(row[2], row[3])
+        if not os.path.exists(path):
+            return None, {}
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return path, headers
+
+    def entry(self, url):
+        """
+        Retourne l'empreinte et l'extension de l'image stockée pour une URL.
+
+        Returns:
+            tuple[str, str] | None: (empreinte SHA-256, extension), None si l'URL n'est pas indexée.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT content_hash, extension FROM images WHERE url = ?", (url,)
+            ).fetchone()
+
+    def image_info(self, content_hash):
+        """
+        Retourne les dimensions et la taille enregistrées d'une image du stockage.
+
+        Returns:
+            tuple[int, int, int] | None: (largeur, hauteur, taille en octets), None si inconnues.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT width, height, size FROM image_info WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+
+    def record_image_info(self, content_hash, width, height, size):
+        """
+        Enregistre les dimensions et la taille d'une image du stockage (voir `utils.thumbnails`).
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_info (content_hash, width, height, size) VALUES (?, ?, ?, ?)",
+                (content_hash, width, height, size),
+            )
+
+    def is_fresh(self, url):
+        """
+        Indique si l'image a déjà été téléchargée ou re-validée pendant ce run.
+        """
+        with self._lock:
+            return url in self._fresh
+
+    def begin(self):
+        """
+        Ouvre l'écriture en flux d'une nouvelle image.
+
+        Returns:
+            BlobWriter: L'écriture en cours.
+        """
+        return BlobWriter(self)
+
+    def record(self, url, headers, content_hash, extension):
+        """
+        Enregistre (ou remplace) l'entrée d'index d'une URL d'image.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (url, etag, last_modified, content_hash, extension, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, headers.get('ETag'), headers.get('Last-Modified'), content_hash, extension, time.time()),
+            )
+            self._fresh.add(url)
+
+    def mark_fresh(self, url, outcome):
+        """
+        Note qu'une image stockée est à jour pour ce run ('not_modified' ou 'reused').
+        """
+        with self._lock:
+            self._fresh.add(url)
+        self.count(outcome)
+
+    def count(self, outcome):
+        """
+        Incrémente un compteur de résultat ('downloaded', 'not_modified' ou 'reused').
+        """
+        with self._lock:
+            self.counters[outcome] += 1
+        get_metrics().inc('images', outcome=outcome)
+
+    @staticmethod
+    def link(object_path, dest_path):
+        """
+        Place l'image du stockage à l'emplacement demandé : lien physique, sinon lien symbolique,
+        sinon copie.
+
+        Args:
+            object_path (str): Chemin de l'image dans le stockage.
+            dest_path (str): Chemin de destination (ex : dossier de couvertures d'une catégorie).
+        """
+        if os.path.lexists(dest_path):
+            if os.path.exists(dest_path) and os.path.samefile(object_path, dest_path):
+                return
+            os.remove(dest_path)
+        try:
+            os.link(object_path, dest_path)
+        except OSError:
+            try:
+                os.symlink(object_path, dest_path)
+            except OSError:
+                shutil.copyfile(object_path, dest_path)
+
+    def print_report(self):
+        """
+        Affiche le bilan des téléchargements d'images du run en cours.
+        """
+        print(f"[IMAGES] {self.counters['downloaded']} téléchargées, {self.counters['not_modified']} non modifiées (304), "
+              f"{self.counters['reused']} réutilisées sans requête")
+
+    def close(self):
+        """
+        Ferme la connexion à l'index.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def fetch_image(store, session, url, timeout=10):
+    """
+    Récupère une image dans le stockage, en la téléchargeant par blocs ou en la re-validant
+    avec une requête conditionnelle si nécessaire.
+
+    Une image déjà téléchargée ou re-validée pendant le run (même couverture dans plusieurs
+    catégories) est réutilisée sans requête.
+
+    Args:
+        store (ImageStore): Stockage des images.
+        session (requests.Session): Session HTTP à utiliser.
+        url (str): URL de l'image.
+        timeout (int, optional): Timeout de la requête en secondes.
+
+    Returns:
+        str: Chemin de l'image dans le stockage.
+
+    Raises:
+        requests.RequestException: En cas d'échec HTTP.
+    """
+    path, headers = store.lookup(url)
+    if path is not None and store.is_fresh(url):
+        store.count('reused')
+        return path
+
+    with get_metrics().timer('fetch_seconds', level='image'), \
+            session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304 and path is not None:
+            store.mark_fresh(url, 'not_modified')
+            return path
+        response.raise_for_status()
+        writer = store.begin()
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        path = writer.commit(url, response.headers)
+    store.count('downloaded')
+    return path
+
+
+def get_image_store():
+    """
+    Retourne le stockage d'images partagé, en le créant au premier appel.
+
+    Returns:
+        ImageStore: Le stockage d'images partagé.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
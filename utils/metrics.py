@@ -0,0 +1,358 @@
+import cProfile
+import json
+import math
+import os
+import pstats
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+"""
+Métriques structurées d'un run : compteurs, jauges et histogrammes de latence étiquetés
+(niveau catégorie / livre / image, étape fetch / parse / save / download).
+
+Le rapport de fin de run est écrit en JSON (.json) ou au format texte Prometheus (.prom),
+et un profil cProfile peut être capturé en option (voir `profiled`).
+"""
+
+METRIC_PREFIX = 'booksonline_'
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+class Histogram:
+    """
+    Histogramme à seaux fixes (bornes supérieures en secondes par défaut).
+
+    Args:
+        buckets (tuple[float], optional): Bornes supérieures des seaux, triées.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """
+        Ajoute les observations d'un autre histogramme aux mêmes seaux.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        Estime un quantile par la borne supérieure du seau qui le contient.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative_buckets(self):
+        """
+        Retourne les couples (borne, nombre cumulé d'observations), seau +Inf compris.
+        """
+        cumulative = 0
+        result = []
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            result.append((bound, cumulative))
+        return result
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Registre de métriques partageable entre threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """
+        Incrémente un compteur (ex : inc('bytes_fetched', 5120, level='book')).
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """
+        Fixe la valeur d'une jauge.
+        """
+        with self._lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """
+        Ajoute une observation (en secondes le plus souvent) à un histogramme.
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Mesure la durée du bloc et l'ajoute à l'histogramme `name`.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def drain(self):
+        """
+        Retourne les compteurs et les histogrammes du registre puis les vide (ex : dans un processus
+        de parsing, pour les renvoyer au processus principal qui les ajoute avec `merge`).
+
+        Returns:
+            tuple[dict, dict]: Compteurs et histogrammes, sérialisables avec pickle.
+        """
+        with self._lock:
+            drained = self.counters, self.histograms
+            self.counters, self.histograms = {}, {}
+        return drained
+
+    def merge(self, drained):
+        """
+        Ajoute au registre des compteurs et des histogrammes obtenus avec `drain`.
+
+        Args:
+            drained (tuple[dict, dict]): Compteurs et histogrammes d'un autre registre.
+        """
+        counters, histograms = drained
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, histogram in histograms.items():
+                if key in self.histograms:
+                    self.histograms[key].merge(histogram)
+                else:
+                    self.histograms[key] = histogram
+
+    def reset(self):
+        """
+        Vide le registre pour démarrer un nouveau run.
+        """
+        with self._lock:
+            self.started_at = time.time()
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """
+        Retourne l'état du registre sous forme sérialisable en JSON.
+
+        Returns:
+            dict: Durée du run, compteurs, jauges et histogrammes (avec quantiles estimés).
+        """
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'duration_seconds': time.time() - self.started_at,
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ],
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                ],
+            }
+
+    def to_prometheus(self):
+        """
+        Formate le registre au format texte d'exposition Prometheus.
+
+        Returns:
+            str: Les métriques, une ligne par série.
+        """
+        def labels_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in pairs) + '}'
+
+        lines = []
+        with self._lock:
+            lines.append(f"{METRIC_PREFIX}run_duration_seconds {time.time() - self.started_at}")
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name}_total counter")
+                    typed.add(name)
+                lines.append(f"{METRIC_PREFIX}{name}_total{labels_text(labels)} {value}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name} gauge")
+                    typed.add(name)
+                lines.append(f"{METRIC_PREFIX}{name}{labels_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                    typed.add(name)
+                for bound, count in histogram.cumulative_buckets():
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{labels_text(labels, [('le', le)])} {count}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{labels_text(labels)} {histogram.sum}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{labels_text(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path):
+        """
+        Écrit le rapport du run : JSON si le chemin se termine par '.json', Prometheus sinon.
+
+        Args:
+            path (str): Chemin du fichier de rapport (ex : run.json, run.prom).
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if path.endswith('.json'):
+            content = json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+        else:
+            content = self.to_prometheus()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        print(f"[METRIQUES] Rapport du run enregistré dans : {path}")
+
+
+def escape_label(value):
+    """
+    Échappe une valeur d'étiquette pour le format texte Prometheus (barre oblique inverse,
+    guillemet et saut de ligne).
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def get_metrics():
+    """
+    Retourne le registre de métriques partagé, en le créant au premier appel.
+
+    Returns:
+        MetricsRegistry: Le registre partagé.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
+
+
+def write_run_report(path):
+    """
+    Ajoute l'état de l'ordonnanceur des requêtes (débit, concurrence, reprises, erreurs par hôte)
+    au registre partagé, puis écrit le rapport du run.
+
+    Args:
+        path (str): Chemin du fichier de rapport ('.json' ou '.prom').
+    """
+    from utils.scheduler import get_scheduler
+
+    metrics = get_metrics()
+    for host, entry in get_scheduler().stats().items():
+        for field in ('requests', 'retries', 'throttled', 'server_errors', 'failures', 'rate', 'concurrency'):
+            metrics.set_gauge(f"scheduler_{field}", entry[field], host=host)
+    metrics.write_report(path)
+
+
+@contextmanager
+def profiled(path=None):
+    """
+    Capture un profil cProfile du bloc et l'enregistre dans `path` (lisible avec pstats ou snakeviz).
+    Ne fait rien si `path` vaut None.
+
+    Le thread appelant et chaque thread démarré pendant le bloc (pools de récupération, étages
+    du pipeline, exécuteur de la boucle asyncio) ont leur propre profileur ; les profils sont
+    fusionnés avec `pstats.Stats.add`. Les threads démarrés avant le bloc et les processus
+    de parsing (--parse-workers) ne sont pas profilés.
+
+    Args:
+        path (str, optional): Chemin du fichier de profil (ex : run.prof).
+    """
+    if path is None:
+        yield
+        return
+    profilers = []
+    profilers_lock = threading.Lock()
+
+    def profile_thread(frame, event, arg):
+        # Premier événement d'un nouveau thread : remplace ce crochet par un profileur propre au thread.
+        sys.setprofile(None)
+        thread_profiler = cProfile.Profile()
+        with profilers_lock:
+            profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    profiler = cProfile.Profile()
+    threading.setprofile(profile_thread)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(profiler)
+        with profilers_lock:
+            for thread_profiler in profilers:
+                try:
+                    stats.add(thread_profiler)
+                except TypeError:
+                    pass  # thread sans appel profilé
+        stats.dump_stats(path)
+        print(f"[PROFIL] Profil cProfile enregistré dans : {path} ({len(profilers) + 1} threads)")
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.metrics import get_metrics
+from utils.records import to_json
+
+"""
+Cache persistant des pages, indexé par URL, pour les re-crawls incrémentaux.
+
+Pour chaque URL, le cache conserve les en-têtes ETag / Last-Modified, l'empreinte SHA-256
+du contenu et les données déjà extraites de la page (dictionnaire produit ou liens d'une page
+de catégorie). Les requêtes suivantes sont conditionnelles : une réponse 304, ou un contenu
+dont l'empreinte n'a pas changé, réutilise les données extraites sans re-parser la page.
+
+Chaque entrée porte aussi le schéma des données extraites (ex : `BOOK_SCHEMA`) : une entrée
+enregistrée avec un autre schéma (extracteur ou champs modifiés depuis) est traitée comme absente.
+"""
+
+DEFAULT_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'pages.sqlite3'))
+
+
+class PageCache:
+    """
+    Cache de pages stocké dans une base SQLite, partageable entre threads.
+
+    Args:
+        path (str, optional): Chemin du fichier SQLite (par défaut : .cache/pages.sqlite3 à la racine du projet).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                schema TEXT
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if 'schema' not in columns:
+            # Base créée avant l'ajout des schémas : ses entrées seront re-extraites.
+            self._conn.execute("ALTER TABLE pages ADD COLUMN schema TEXT")
+        self.counters = {'not_modified': 0, 'unchanged': 0, 'miss': 0}
+
+    def get(self, url):
+        """
+        Retourne l'entrée du cache associée à une URL.
+
+        Args:
+            url (str): L'URL de la page.
+
+        Returns:
+            dict | None: Clés 'etag', 'last_modified', 'content_hash', 'data' et 'schema',
+            ou None si l'URL est inconnue.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, data, schema FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'content_hash': row[2], 'data': json.loads(row[3]),
+                'schema': row[4]}
+
+    def store(self, url, headers, content_hash, data, schema=None):
+        """
+        Enregistre (ou remplace) l'entrée d'une URL.
+
+        Args:
+            url (str): L'URL de la page.
+            headers (Mapping[str, str]): En-têtes de la réponse HTTP.
+            content_hash (str): Empreinte SHA-256 du contenu de la page.
+            data: Données extraites de la page (sérialisables en JSON, `BookRecord` compris).
+            schema (str, optional): Schéma des données extraites (voir `fetch_cached`).
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, data, fetched_at, schema) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get('ETag'), headers.get('Last-Modified'), content_hash,
+                 json.dumps(data, ensure_ascii=False, default=to_json), time.time(), schema),
+            )
+
+    def count(self, outcome):
+        """
+        Incrémente un compteur de résultat ('not_modified', 'unchanged' ou 'miss').
+        """
+        with self._lock:
+            self.counters[outcome] += 1
+
+    def print_report(self):
+        """
+        Affiche le bilan des succès et échecs du cache pour le run en cours.
+        """
+        hits = self.counters['not_modified'] + self.counters['unchanged']
+        total = hits + self.counters['miss']
+        ratio = hits / total * 100 if total else 0
+        print(f"[CACHE] {total} pages : {self.counters['not_modified']} non modifiées (304), "
+              f"{self.counters['unchanged']} inchangées (empreinte), {self.counters['miss']} re-parsées "
+              f"-> {ratio:.1f}% de succès")
+
+    def close(self):
+        """
+        Ferme la connexion à la base.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def fetch_cached(cache, url, session, extract, timeout=10, level='page', schema=None):
+    """
+    Récupère une page avec une requête conditionnelle et ne ré-extrait ses données que si elle a changé.
+
+    Args:
+        cache (PageCache): Cache des pages.
+        url (str): L'URL de la page.
+        session (requests.Session): Session HTTP à utiliser.
+        extract (callable): Fonction qui reçoit le contenu brut (bytes) et retourne les données extraites.
+        timeout (int, optional): Timeout de la requête en secondes.
+        level (str, optional): Niveau de la page pour les métriques ('category', 'book'...).
+        schema (str, optional): Schéma des données produites par `extract`. Une entrée enregistrée avec
+                                un autre schéma n'est pas réutilisée : la page est re-téléchargée et re-extraite.
+
+    Returns:
+        Les données extraites de la page (issues du cache ou de `extract`).
+
+    Raises:
+        requests.RequestException: En cas d'échec HTTP.
+    """
+    entry = cache.get(url)
+    if entry is not None and entry['schema'] != schema:
+        entry = None
+    headers = {}
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    metrics = get_metrics()
+    with metrics.timer('fetch_seconds', level=level):
+        response = session.get(url, headers=headers, timeout=timeout)
+    metrics.inc('bytes_fetched', len(response.content), level=level)
+    if response.status_code == 304 and entry is not None:
+        cache.count('not_modified')
+        return entry['data']
+    response.raise_for_status()
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if entry is not None and entry['content_hash'] == content_hash:
+        cache.count('unchanged')
+        cache.store(url, response.headers, content_hash, entry['data'], schema)
+        return entry['data']
+
+    data = extract(response.content)
+    cache.store(url, response.headers, content_hash, data, schema)
+    cache.count('miss')
+    return data
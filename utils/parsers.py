@@ -0,0 +1,155 @@
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from phase1.scraper import extract_book_data, AVAILABLE_PATTERN, REVIEW_RATING_MAP
+from utils.metrics import get_metrics
+from utils.records import BookRecord
+
+"""
+Couche de parsing interchangeable pour les pages produit.
+
+Deux implémentations produisent exactement le même `BookRecord` :
+    - 'bs4'  : BeautifulSoup + html.parser (implémentation de référence, toujours disponible) ;
+    - 'lxml' : parseur compilé lxml avec des expressions XPath précompilées.
+
+Dépendance optionnelle : lxml (pip install lxml).
+"""
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class BookParser:
+    """
+    Interface commune des parseurs de pages produit.
+    """
+    name = None
+
+    def extract(self, html, url):
+        """
+        Extrait les données d'un livre à partir du HTML brut de sa page produit.
+
+        Args:
+            html (str): Contenu HTML de la page produit.
+            url (str): URL complète de la page produit.
+
+        Returns:
+            BookRecord: Données du livre (mêmes champs que `phase1.scraper.extract_book_data`).
+
+        Raises:
+            RuntimeError: En cas d'échec de l'extraction.
+        """
+        raise NotImplementedError
+
+
+class SoupParser(BookParser):
+    """
+    Parseur de référence basé sur BeautifulSoup et `extract_book_data`.
+    """
+    name = 'bs4'
+
+    def extract(self, html, url):
+        with get_metrics().timer('parse_seconds', level='book', parser=self.name):
+            return extract_book_data(BeautifulSoup(html, 'html.parser'), url)
+
+
+class LxmlParser(BookParser):
+    """
+    Parseur rapide basé sur lxml, avec des expressions XPath compilées une seule fois.
+    """
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree, html as lxml_html
+
+        self._fromstring = lxml_html.document_fromstring
+        self._title = etree.XPath(f"//div[{_has_class('col-sm-6')} and {_has_class('product_main')}][1]/h1[1]")
+        self._rows = etree.XPath(f"(//table[{_has_class('table')} and {_has_class('table-striped')}])[1]//th")
+        self._description = etree.XPath(
+            "(//div[@id='product_description'])[1]/following-sibling::p[1]"
+        )
+        self._rating = etree.XPath(f"(//p[{_has_class('star-rating')}])[1]/@class")
+        self._breadcrumb = etree.XPath(f"(//ul[{_has_class('breadcrumb')}])[1]//li")
+        self._image = etree.XPath(f"(//div[{_has_class('item')}])[1]//img[1]/@src")
+
+    def extract(self, html, url):
+        with get_metrics().timer('parse_seconds', level='book', parser=self.name):
+            return self._extract(html, url)
+
+    def _extract(self, html, url):
+        try:
+            tree = self._fromstring(html)
+
+            table = {}
+            for th in self._rows(tree):
+                if len(th) == 0 and th.text is not None:
+                    td = th.getnext()
+                    while td is not None and td.tag != 'td':
+                        td = td.getnext()
+                    table.setdefault(th.text, td.text_content() if td is not None else "N/A")
+
+            def get_table_value(label):
+                if label not in table:
+                    raise ValueError(f"[ERREUR] champ '{label}' introuvable dans le tableau")
+                return table[label]
+
+            title = self._title(tree)[0].text_content()
+            match = AVAILABLE_PATTERN.search(get_table_value('Availability'))
+            number_available = int(match.group(1)) if match else "Nombre non trouvé"
+            description = self._description(tree)
+            product_description = description[0].text_content() if description else "N/A"
+
+            rating_classes = self._rating(tree)
+            rating_classes = rating_classes[0].split() if rating_classes else []
+            rating_text = next((cls.capitalize() for cls in rating_classes if cls != 'star-rating'), 'Zero')
+
+            return BookRecord(
+                product_page_url=url,
+                universal_product_code=get_table_value('UPC'),
+                title=title,
+                price_including_tax=float(get_table_value('Price (incl. tax)').replace('£', '')),
+                price_excluding_tax=float(get_table_value('Price (excl. tax)').replace('£', '')),
+                number_available=number_available,
+                product_description=product_description,
+                category=self._breadcrumb(tree)[2].text_content().strip(),
+                review_rating=REVIEW_RATING_MAP.get(rating_text, 0),
+                image_url=urljoin(url, self._image(tree)[0]),
+            )
+        except Exception as e:
+            raise RuntimeError(f"[ERREUR] Échec de l'extraction depuis {url} : {e}")
+
+
+PARSERS = {
+    'bs4': SoupParser,
+    'lxml': LxmlParser,
+}
+
+_instances = {}
+
+
+def get_parser(name='auto'):
+    """
+    Retourne une instance (partagée) du parseur demandé.
+
+    Args:
+        name (str, optional): 'bs4', 'lxml' ou 'auto' (lxml s'il est installé, sinon BeautifulSoup).
+
+    Returns:
+        BookParser: Le parseur demandé.
+
+    Raises:
+        ValueError: Si le nom de parseur est inconnu.
+        ImportError: Si le parseur demandé explicitement nécessite une dépendance absente.
+    """
+    if isinstance(name, BookParser):
+        return name
+    if name == 'auto':
+        try:
+            return get_parser('lxml')
+        except ImportError:
+            return get_parser('bs4')
+    if name not in PARSERS:
+        raise ValueError(f"[ERREUR] Parseur inconnu : '{name}' (choix possibles : {', '.join(PARSERS)}, auto)")
+    if name not in _instances:
+        _instances[name] = PARSERS[name]()
+    return _instances[name]
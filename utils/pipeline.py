@@ -0,0 +1,174 @@
+import queue
+import threading
+import time
+
+"""
+Pipeline producteur/consommateur à étages, reliés par des files bornées.
+
+Chaque étage possède son propre pool de threads et transmet ses résultats à l'étage suivant.
+Les files bornées limitent la mémoire et appliquent une contre-pression sur les étages amont.
+"""
+
+_STOP = object()
+
+
+class Stage:
+    """
+    Étage du pipeline.
+
+    Args:
+        name (str): Nom de l'étage (affiché dans les statistiques).
+        func (callable): Fonction appelée pour chaque élément. Elle retourne un itérable
+                         d'éléments à transmettre à l'étage suivant (ou None).
+        workers (int): Nombre de threads de l'étage.
+        queue_size (int): Taille maximale de la file d'entrée de l'étage.
+    """
+
+    def __init__(self, name, func, workers, queue_size):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.errors = 0
+        self.started_at = None
+        self._active = workers
+        self._lock = threading.Lock()
+
+    def stats(self):
+        """
+        Retourne les statistiques de l'étage.
+
+        Returns:
+            dict[str, float | int]: Profondeur de la file, éléments traités, erreurs et débit (éléments/s).
+        """
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_size': self.queue.maxsize,
+            'processed': self.processed,
+            'errors': self.errors,
+            'throughput': self.processed / elapsed if elapsed else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Enchaîne plusieurs étages exécutés en parallèle.
+
+    Exemple :
+
+        pipeline = Pipeline(queue_size=100)
+        pipeline.add_stage('fetch', fetch, workers=20)
+        pipeline.add_stage('parse', parse, workers=2)
+        pipeline.run(urls)
+
+    Args:
+        queue_size (int, optional): Taille maximale de chaque file entre deux étages (100 par défaut).
+        report_interval (float, optional): Intervalle en secondes entre deux affichages des statistiques.
+                                           0 pour désactiver l'affichage périodique.
+    """
+
+    def __init__(self, queue_size=100, report_interval=0):
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.stages = []
+
+    def add_stage(self, name, func, workers=1):
+        """
+        Ajoute un étage à la fin du pipeline.
+
+        Args:
+            name (str): Nom de l'étage.
+            func (callable): Fonction de traitement d'un élément (voir `Stage`).
+            workers (int, optional): Nombre de threads de l'étage (1 par défaut).
+
+        Returns:
+            Pipeline: Le pipeline lui-même, pour chaîner les appels.
+        """
+        self.stages.append(Stage(name, func, workers, self.queue_size))
+        return self
+
+    def stats(self):
+        """
+        Retourne les statistiques de tous les étages.
+
+        Returns:
+            dict[str, dict]: Statistiques par nom d'étage.
+        """
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def print_stats(self):
+        """
+        Affiche la profondeur des files et le débit de chaque étage.
+        """
+        for name, entry in self.stats().items():
+            print(f"[PIPELINE] {name:<10} file {entry['queue_depth']}/{entry['queue_size']} | "
+                  f"{entry['processed']} traités | {entry['errors']} erreurs | "
+                  f"{entry['throughput']:.1f} éléments/s")
+
+    def run(self, items):
+        """
+        Injecte les éléments dans le premier étage et attend la fin de tous les étages.
+
+        Args:
+            items (iterable): Éléments d'entrée du premier étage.
+        """
+        threads = []
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            stage.started_at = time.time()
+            for _ in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(stage, next_stage), daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        done = threading.Event()
+        if self.report_interval:
+            threading.Thread(target=self._report, args=(done,), daemon=True).start()
+
+        first = self.stages[0]
+        for item in items:
+            first.queue.put(item)
+        for _ in range(first.workers):
+            first.queue.put(_STOP)
+
+        for thread in threads:
+            thread.join()
+        done.set()
+
+    def _work(self, stage, next_stage):
+        """
+        Boucle d'un thread d'étage : traite les éléments jusqu'au signal d'arrêt,
+        puis propage l'arrêt à l'étage suivant quand le dernier thread de l'étage se termine.
+        """
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                break
+            try:
+                outputs = stage.func(item)
+                for output in outputs or ():
+                    if next_stage is not None:
+                        next_stage.queue.put(output)
+            except Exception as e:
+                with stage._lock:
+                    stage.errors += 1
+                print(f"[ERREUR] Étage '{stage.name}' : {e}")
+            finally:
+                with stage._lock:
+                    stage.processed += 1
+
+        with stage._lock:
+            stage._active -= 1
+            last = stage._active == 0
+        if last and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.queue.put(_STOP)
+
+    def _report(self, done):
+        """
+        Affiche périodiquement les statistiques jusqu'à la fin du pipeline.
+        """
+        while not done.wait(self.report_interval):
+            self.print_stats()
@@ -0,0 +1,120 @@
+import sys
+from collections.abc import Mapping
+
+"""
+Représentation compacte des données d'un livre.
+
+`BookRecord` remplace le dictionnaire de 10 clés produit pour chaque page produit : les valeurs
+sont rangées dans des `__slots__` (pas de table de hachage par livre) et les noms de catégorie
+sont internés, donc partagés entre tous les livres d'une même catégorie. L'objet reste un
+`Mapping` en lecture : record['title'], record.get(...), keys(), items() et dict(record)
+fonctionnent comme avec l'ancien dictionnaire.
+"""
+
+BOOK_FIELDS = (
+    'product_page_url',
+    'universal_product_code',
+    'title',
+    'price_including_tax',
+    'price_excluding_tax',
+    'number_available',
+    'product_description',
+    'category',
+    'review_rating',
+    'image_url',
+)
+
+# Schéma des livres conservés dans le cache de pages (voir `utils.page_cache`) : à changer
+# lorsque l'extraction d'une page produit change, pour que les entrées existantes soient re-extraites.
+BOOK_SCHEMA = 'book-v1:' + ','.join(BOOK_FIELDS)
+
+
+class BookRecord(Mapping):
+    """
+    Données d'un livre, accessibles comme un dictionnaire en lecture seule.
+
+    Args:
+        product_page_url (str): URL de la page produit.
+        universal_product_code (str): Code UPC.
+        title (str): Titre du livre.
+        price_including_tax (float): Prix TTC.
+        price_excluding_tax (float): Prix HT.
+        number_available (int | str): Stock disponible ("Nombre non trouvé" si absent de la page).
+        product_description (str): Description du livre.
+        category (str): Nom de la catégorie (interné).
+        review_rating (int): Note de 0 à 5.
+        image_url (str): URL absolue de la couverture.
+    """
+    __slots__ = BOOK_FIELDS
+
+    def __init__(self, product_page_url, universal_product_code, title, price_including_tax, price_excluding_tax,
+                 number_available, product_description, category, review_rating, image_url):
+        self.product_page_url = product_page_url
+        self.universal_product_code = universal_product_code
+        self.title = title
+        self.price_including_tax = price_including_tax
+        self.price_excluding_tax = price_excluding_tax
+        self.number_available = number_available
+        self.product_description = product_description
+        self.category = sys.intern(category) if isinstance(category, str) else category
+        self.review_rating = review_rating
+        self.image_url = image_url
+
+    @classmethod
+    def from_mapping(cls, data):
+        """
+        Construit un enregistrement à partir d'un dictionnaire de livre (ex : relu depuis un cache JSON).
+        Un `BookRecord` est retourné tel quel.
+
+        Raises:
+            KeyError: Si un champ de `BOOK_FIELDS` est absent.
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(*(data[field] for field in BOOK_FIELDS))
+
+    def astuple(self):
+        """
+        Retourne les valeurs dans l'ordre de `BOOK_FIELDS` (écriture CSV sans recherche par clé).
+        """
+        return (self.product_page_url, self.universal_product_code, self.title, self.price_including_tax,
+                self.price_excluding_tax, self.number_available, self.product_description, self.category,
+                self.review_rating, self.image_url)
+
+    def to_dict(self):
+        """
+        Retourne une copie sous forme de dictionnaire (sérialisation JSON).
+        """
+        return dict(zip(BOOK_FIELDS, self.astuple()))
+
+    def __getitem__(self, key):
+        if key not in BOOK_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in BOOK_FIELDS
+
+    def __iter__(self):
+        return iter(BOOK_FIELDS)
+
+    def __len__(self):
+        return len(BOOK_FIELDS)
+
+    def __reduce__(self):
+        return BookRecord, self.astuple()
+
+    def __repr__(self):
+        return f"BookRecord({self.to_dict()!r})"
+
+
+def to_json(value):
+    """
+    Fonction `default` de `json.dumps` : sérialise les `BookRecord` comme des dictionnaires.
+
+    Raises:
+        TypeError: Si la valeur n'est pas sérialisable.
+    """
+    if isinstance(value, BookRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
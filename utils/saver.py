@@ -1,37 +1,667 @@
 import os
+import atexit
 import csv
+import gzip
+import io
+import json
+import queue
 import re
+import threading
 from datetime import date
+from functools import lru_cache
 from utils.cleaner import clean_filename
+from utils.metrics import get_metrics
+from utils.records import BOOK_FIELDS, BookRecord
 
 DATE_TODAY = date.today()
+PARQUET_BATCH_SIZE = 1000
+GZIP_LEVEL = 6
+STREAM_BATCH_SIZE = 100
+WRITE_QUEUE_SIZE = 64
+FSYNC_BATCH_SIZE = 32
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARQUET_TYPES = {
+    'price_including_tax': 'float64',
+    'price_excluding_tax': 'float64',
+    'number_available': 'int64',
+    'review_rating': 'int8',
+}
 
-def save_to_csv(book_data, folder):
+_state_lock = threading.Lock()
+_created_folders = set()
+_layouts = {}
+_background_writer = None
+
+
+class RecordWriter:
+    """
+    Interface commune des formats d'export : les lignes sont écrites au fil de l'eau
+    puis le fichier est finalisé par `close()`. Utilisable comme gestionnaire de contexte.
+
+    Args:
+        path (str): Chemin du fichier à créer (extension comprise).
+        fieldnames (list[str]): Noms des colonnes, dans l'ordre.
+    """
+    extension = ''
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+
+    def write_rows(self, rows):
+        """
+        Écrit une série de lignes (dictionnaires).
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Transmet au système les lignes déjà écrites.
+        """
+        self._file.flush()
+
+    def close(self):
+        """
+        Finalise et ferme le fichier.
+        """
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvWriter(RecordWriter):
+    """
+    CSV non compressé, séparateur ';' et encodage 'utf-8-sig' (format historique, lisible par Excel).
+    Les `BookRecord` sont écrits directement à partir de leurs valeurs, sans recherche par clé.
+    """
+    extension = '.csv'
+
+    def __init__(self, path, fieldnames):
+        super().__init__(path, fieldnames)
+        self._file = self._open()
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, delimiter=';')
+        self._writer.writeheader()
+        self._book_columns = tuple(self.fieldnames) == BOOK_FIELDS
+
+    def _open(self):
+        return open(self.path, mode='w', newline='', encoding='utf-8-sig')
+
+    def write_rows(self, rows):
+        if not self._book_columns:
+            self._writer.writerows(rows)
+            return
+        writerow = self._writer.writer.writerow
+        for row in rows:
+            if type(row) is BookRecord:
+                writerow(row.astuple())
+            else:
+                self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+class GzipCsvWriter(CsvWriter):
+    """
+    CSV compressé avec gzip.
+    """
+    extension = '.csv.gz'
+
+    def _open(self):
+        return gzip.open(self.path, mode='wt', compresslevel=GZIP_LEVEL, newline='', encoding='utf-8-sig')
+
+
+class ZstdCsvWriter(CsvWriter):
+    """
+    CSV compressé avec zstd (dépendance optionnelle : zstandard).
+    """
+    extension = '.csv.zst'
+
+    def _open(self):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("[ERREUR] Le format 'csv.zst' nécessite zstandard : pip install zstandard") from e
+        self._raw = open(self.path, mode='wb')
+        self._stream = zstandard.ZstdCompressor().stream_writer(self._raw)
+        return io.TextIOWrapper(self._stream, encoding='utf-8-sig', newline='')
+
+    def close(self):
+        self._file.close()
+        self._raw.close()
+
+
+class JsonLinesWriter(RecordWriter):
+    """
+    JSON Lines : un objet JSON par ligne, types conservés (nombres, chaînes).
+    """
+    extension = '.jsonl'
+
+    def __init__(self, path, fieldnames):
+        super().__init__(path, fieldnames)
+        self._file = open(path, mode='w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        for row in rows:
+            self._file.write(json.dumps({field: row.get(field) for field in self.fieldnames}, ensure_ascii=False))
+            self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """
+    Parquet colonnaire avec colonnes typées pour les prix, le stock et la note
+    (dépendance optionnelle : pyarrow). Les lignes sont écrites par groupes de `PARQUET_BATCH_SIZE`.
+    """
+    extension = '.parquet'
+
+    def __init__(self, path, fieldnames):
+        super().__init__(path, fieldnames)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("[ERREUR] Le format 'parquet' nécessite pyarrow : pip install pyarrow") from e
+        self._pa = pa
+        self._schema = pa.schema([
+            (field, getattr(pa, PARQUET_TYPES.get(field, 'string'))()) for field in self.fieldnames
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+        self._buffer = []
+
+    def _convert(self, field, value):
+        if field not in PARQUET_TYPES:
+            return None if value is None else str(value)
+        return value if isinstance(value, (int, float)) else None
+
+    def write_rows(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= PARQUET_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        columns = {
+            field: [self._convert(field, row.get(field)) for row in self._buffer] for field in self.fieldnames
+        }
+        self._writer.write_table(self._pa.table(columns, schema=self._schema))
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'csv.gz': GzipCsvWriter,
+    'csv.zst': ZstdCsvWriter,
+    'jsonl': JsonLinesWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def get_writer(fmt):
+    """
+    Retourne la classe d'écriture associée à un format d'export.
+
+    Args:
+        fmt (str): 'csv', 'csv.gz', 'csv.zst', 'jsonl' ou 'parquet'.
+
+    Returns:
+        type[RecordWriter]: La classe d'écriture du format.
+
+    Raises:
+        ValueError: Si le format est inconnu.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"[ERREUR] Format inconnu : '{fmt}' (choix possibles : {', '.join(WRITERS)})")
+    return WRITERS[fmt]
+
+
+@lru_cache(maxsize=None)
+def safe_category_name(category_name):
+    """
+    Nettoie un nom de catégorie pour les noms de dossiers et de fichiers (résultat mis en cache).
+    """
+    return re.sub(r'[^\w\s-]', '', category_name).strip().replace(' ', '_')
+
+
+def ensure_folder(folder):
+    """
+    Crée un dossier s'il n'existe pas ; chaque dossier n'est créé qu'une fois par processus.
+    """
+    if folder in _created_folders:
+        return
+    os.makedirs(folder, exist_ok=True)
+    with _state_lock:
+        _created_folders.add(folder)
+
+
+class OutputLayout:
+    """
+    Arborescence de sortie d'une phase : <base_dir>/CSV/<catégorie>/<préfixe>_<catégorie>_<date><extension>
+    (phases 3 et 4), ou <base_dir>/CSV/<préfixe>_<catégorie>_<date><extension> (phase 2, une seule catégorie).
+    Les dossiers sont calculés une seule fois par catégorie.
+
+    Args:
+        base_dir (str): Répertoire de base (ex. : phase3, phase4).
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self._folders = {}
+
+    def category_folder(self, category_name):
+        """
+        Retourne le dossier d'une catégorie (sans le créer).
+        """
+        folder = self._folders.get(category_name)
+        if folder is None:
+            folder = self._folders[category_name] = os.path.join(
+                self.base_dir, "CSV", safe_category_name(category_name)
+            )
+        return folder
+
+    def category_file(self, category_name, extension='.csv', prefix='products_category', scraped_on=None):
+        """
+        Retourne le chemin d'un fichier de catégorie (sans créer son dossier).
+
+        Args:
+            category_name (str): Nom brut de la catégorie.
+            extension (str, optional): Extension du format d'export (voir `RecordWriter.extension`).
+            prefix (str, optional): Préfixe du nom de fichier ('products_category', 'listing_category'
+                                    ou 'changes_category').
+            scraped_on (str, optional): Date du scraping (par défaut, la date du jour).
+        """
+        return os.path.join(
+            self.category_folder(category_name),
+            f"{prefix}_{safe_category_name(category_name)}_{scraped_on or DATE_TODAY}{extension}",
+        )
+
+    def single_category_file(self, category_name, extension='.csv', prefix='products_category', scraped_on=None):
+        """
+        Retourne le chemin du fichier d'une catégorie placé directement dans <base_dir>/CSV (phase 2).
+        Mêmes arguments que `category_file`.
+        """
+        return os.path.join(
+            self.base_dir, "CSV", f"{prefix}_{safe_category_name(category_name)}_{scraped_on or DATE_TODAY}{extension}"
+        )
+
+
+def get_layout(base_dir):
+    """
+    Retourne l'arborescence de sortie (partagée) d'un répertoire de base.
+    """
+    with _state_lock:
+        layout = _layouts.get(base_dir)
+        if layout is None:
+            layout = _layouts[base_dir] = OutputLayout(base_dir)
+        return layout
+
+
+def write_file(path, rows, fmt='csv', fieldnames=None, label=None):
+    """
+    Écrit des lignes dans le fichier temporaire '<path>.tmp', à valider avec `commit_files`.
+
+    Args:
+        path (str): Chemin final du fichier.
+        rows (list[Mapping]): Lignes à écrire (au moins une).
+        fmt (str, optional): Format d'export (voir `WRITERS`).
+        fieldnames (Iterable[str], optional): Colonnes (par défaut, les clés de la première ligne).
+        label (str, optional): Format indiqué dans les métriques (par défaut, `fmt`).
+
+    Returns:
+        tuple[str, str]: Chemins du fichier temporaire et du fichier final.
+    """
+    ensure_folder(os.path.dirname(path))
+    tmp_path = f"{path}.tmp"
+    metrics = get_metrics()
+    with metrics.timer('save_seconds', format=label or fmt):
+        with get_writer(fmt)(tmp_path, fieldnames or rows[0].keys()) as writer:
+            writer.write_rows(rows)
+    metrics.inc('rows_saved', len(rows), format=label or fmt)
+    return tmp_path, path
+
+
+def commit_files(files, durable=True):
+    """
+    Valide un groupe de fichiers temporaires : synchronisation sur disque (fsync) de chaque fichier,
+    renommage atomique vers le nom final, puis une synchronisation par dossier concerné.
+
+    Args:
+        files (list[tuple[str, str]]): Couples (fichier temporaire, fichier final).
+        durable (bool, optional): False pour renommer sans fsync (plus rapide, sans garantie après une coupure).
+    """
+    folders = set()
+    for tmp_path, path in files:
+        if durable:
+            with open(tmp_path, 'rb') as f:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        folders.add(os.path.dirname(path))
+    if durable:
+        for folder in folders:
+            try:
+                fd = os.open(folder, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+
+class BackgroundWriter:
+    """
+    Thread d'écriture unique : les écritures de fichiers sont mises en file et exécutées dans l'ordre,
+    hors des threads de récupération. Les fichiers produits sont validés par groupes (`commit_files`)
+    dès que la file se vide ou que `fsync_batch` fichiers sont en attente.
+
+    La file est bornée : si le disque ne suit pas, `submit` attend (la mémoire reste bornée).
+    Les erreurs d'écriture sont affichées puis relancées par `flush()`. Une tâche « barrière » n'est
+    exécutée que si toutes les tâches et validations depuis la barrière précédente ont réussi.
+
+    Args:
+        queue_size (int, optional): Nombre maximal de tâches en attente.
+        fsync_batch (int, optional): Nombre maximal de fichiers validés par groupe.
+        durable (bool, optional): Synchronise les fichiers sur disque avant de les renommer.
+    """
+
+    def __init__(self, queue_size=WRITE_QUEUE_SIZE, fsync_batch=FSYNC_BATCH_SIZE, durable=True):
+        self.fsync_batch = fsync_batch
+        self.durable = durable
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._uncommitted = []
+        self._errors = []
+        self._failed = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, barrier=False):
+        """
+        Met une tâche en file. Si la tâche retourne un couple (fichier temporaire, fichier final),
+        le fichier est validé avec le groupe suivant.
+
+        Args:
+            func (callable): Tâche à exécuter dans le thread d'écriture.
+            *args: Arguments de la tâche.
+            barrier (bool, optional): Valide d'abord tous les fichiers en attente, puis exécute la tâche
+                                      (ex : marquer une catégorie terminée une fois son fichier sur disque).
+                                      La tâche est ignorée si une écriture ou une validation a échoué
+                                      depuis la barrière précédente.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='background-writer', daemon=True)
+                self._thread.start()
+        self._queue.put((func, args, barrier))
+
+    def _run(self):
+        while True:
+            func, args, barrier = self._queue.get()
+            try:
+                if barrier:
+                    failed, self._failed = self._failed, False
+                    try:
+                        self._commit()
+                    except Exception as e:
+                        print(f"[ERREUR] Validation des fichiers en attente échouée : {e}")
+                        self._errors.append(e)
+                        failed = True
+                    if failed:
+                        print(f"[ERREUR] Tâche ignorée ({getattr(func, '__name__', func)} "
+                              f"{' '.join(map(str, args))}) : une écriture précédente a échoué.")
+                        continue
+                result = func(*args)
+                if result is not None:
+                    self._uncommitted.append(result)
+                if len(self._uncommitted) >= self.fsync_batch or self._queue.empty():
+                    self._commit()
+            except Exception as e:
+                print(f"[ERREUR] Écriture en arrière-plan échouée : {e}")
+                self._errors.append(e)
+                self._failed = True
+            finally:
+                self._queue.task_done()
+
+    def _commit(self):
+        if not self._uncommitted:
+            return
+        files, self._uncommitted = self._uncommitted, []
+        with get_metrics().timer('commit_seconds'):
+            commit_files(files, self.durable)
+
+    def flush(self):
+        """
+        Attend que toutes les tâches en file soient exécutées et leurs fichiers validés.
+
+        Raises:
+            Exception: La première erreur d'écriture survenue depuis le dernier `flush`.
+        """
+        self._queue.join()
+        if self._errors:
+            error, self._errors = self._errors[0], []
+            raise error
+
+
+def get_background_writer():
+    """
+    Retourne le thread d'écriture partagé ; ses écritures sont terminées avant la sortie du processus.
+    """
+    global _background_writer
+    with _state_lock:
+        if _background_writer is None:
+            _background_writer = BackgroundWriter()
+            atexit.register(_flush_at_exit)
+        return _background_writer
+
+
+def _flush_at_exit():
+    try:
+        _background_writer.flush()
+    except Exception as e:
+        print(f"[ERREUR] Écritures non terminées à la sortie : {e}")
+
+
+class CategoryStreamWriter:
+    """
+    Sortie en flux pour une catégorie : les lignes sont écrites par lots au fur et à mesure
+    de leur arrivée, dans un fichier temporaire renommé atomiquement à la fermeture.
+
+    Les lots sont écrits par le thread d'écriture partagé (`get_background_writer`) : les threads
+    de récupération ne font que les mettre en file. La mémoire reste bornée par la taille d'un lot
+    et de la file d'écriture, quelle que soit la taille de la catégorie. Un arrêt brutal ne laisse
+    jamais de fichier final à moitié écrit : les lots déjà écrits restent lisibles dans le fichier '.tmp'.
+
+    Args:
+        category_name (str): Nom brut de la catégorie (sera nettoyé pour créer le dossier).
+        base_dir (str): Répertoire de base où le dossier CSV sera créé (ex. : phase3, phase4).
+        fmt (str, optional): Format d'export ('csv' par défaut, voir `WRITERS`).
+        batch_size (int, optional): Nombre de lignes accumulées avant chaque écriture (100 par défaut).
+        keep_fields (tuple[str], optional): Champs à conserver en mémoire pour chaque ligne
+                                            (ex : ('title', 'image_url') pour télécharger les couvertures).
+    """
+
+    def __init__(self, category_name, base_dir, fmt='csv', batch_size=STREAM_BATCH_SIZE, keep_fields=None):
+        self.category_name = category_name
+        self.fmt = fmt
+        self.writer_class = get_writer(fmt)
+        self.batch_size = batch_size
+        self.keep_fields = keep_fields
+        self.kept_rows = []
+        self.count = 0
+        self._batch = []
+        self._writer = None
+        self._lock = threading.Lock()
+        self._output = get_background_writer()
+
+        self.path = get_layout(base_dir).category_file(category_name, self.writer_class.extension)
+        self.folder = os.path.dirname(self.path)
+        self.tmp_path = f"{self.path}.tmp"
+
+    def write(self, row):
+        """
+        Ajoute une ligne ; le lot est écrit sur disque dès qu'il atteint `batch_size` lignes.
+
+        Args:
+            row (Mapping): Données d'un livre (dict ou BookRecord).
+        """
+        with self._lock:
+            self._batch.append(row)
+            self.count += 1
+            if self.keep_fields:
+                self.kept_rows.append({field: row[field] for field in self.keep_fields})
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch()
+
+    def _flush_batch(self):
+        if not self._batch:
+            return
+        self._output.submit(self._write_batch, self._batch)
+        self._batch = []
+
+    def _write_batch(self, rows):
+        # Exécuté par le thread d'écriture, seul à manipuler self._writer.
+        metrics = get_metrics()
+        with metrics.timer('save_seconds', format=self.fmt):
+            if self._writer is None:
+                ensure_folder(self.folder)
+                self._writer = self.writer_class(self.tmp_path, rows[0].keys())
+            self._writer.write_rows(rows)
+            self._writer.flush()
+        metrics.inc('rows_saved', len(rows), format=self.fmt)
+
+    def _finish(self):
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        return self.tmp_path, self.path
+
+    def _abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self):
+        """
+        Met en file le dernier lot et la finalisation : le fichier temporaire est fermé puis
+        renommé vers son nom final par le thread d'écriture.
+        """
+        with self._lock:
+            self._flush_batch()
+            if not self.count:
+                print(f"[INFO] Aucun livre à enregistrer pour la catégorie '{self.category_name}'")
+                return
+            self._output.submit(self._finish)
+        print(f"[SAUVEGARDE] {self.count} livres enregistrés dans : {self.path}")
+
+    def abort(self):
+        """
+        Interrompt l'écriture sans renommer le fichier : les lots déjà écrits restent dans le fichier '.tmp'.
+        """
+        with self._lock:
+            self._flush_batch()
+            if self.count:
+                self._output.submit(self._abort)
+                print(f"[ERREUR] Catégorie '{self.category_name}' interrompue, {self.count} livres conservés dans : "
+                      f"{self.tmp_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class TeeSink:
+    """
+    Sortie en flux qui transmet chaque ligne à plusieurs sorties (ex : fichier et journal de reprise).
+
+    Args:
+        *sinks: Sorties possédant une méthode `write(row)`.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, row):
+        for sink in self.sinks:
+            sink.write(row)
+
+
+class BatchSink:
+    """
+    Sortie en flux qui regroupe les lignes par lots avant de les transmettre à `flush`
+    (ex : une transaction SQLite par lot). Utilisable comme gestionnaire de contexte.
+
+    Args:
+        flush (callable): Fonction appelée avec la liste des lignes de chaque lot.
+        batch_size (int, optional): Nombre de lignes par lot.
+    """
+
+    def __init__(self, flush, batch_size=STREAM_BATCH_SIZE):
+        self.flush = flush
+        self.batch_size = batch_size
+        self._batch = []
+        self._lock = threading.Lock()
+
+    def write(self, row):
+        with self._lock:
+            self._batch.append(row)
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch()
+
+    def _flush_batch(self):
+        if self._batch:
+            self.flush(self._batch)
+            self._batch = []
+
+    def close(self):
+        """
+        Transmet le dernier lot.
+        """
+        with self._lock:
+            self._flush_batch()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def save_to_csv(book_data, folder, base_dir=os.path.join(PROJECT_ROOT, 'phase1')):
     """
     Sauvegarde les données d'un livre dans un fichier CSV.
 
     Args:
         book_data (dict[str, any]): Dictionnaire contenant les données du livre (titre, prix, catégorie, etc.)
         folder (str): Nom ou chemin du dossier où sera créé le fichier CSV.
+        base_dir (str, optional): Répertoire de base du dossier (par défaut, phase1).
     Side Effects: 
         Crée un fichier CSV dans le dossier spécifié
     Raises:
         Exception: En cas d'erreur lors de la création du dossier ou de l'écriture du fichier.
     """
+    csv_path = os.path.join(base_dir, folder)
     try:
-        phase1_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'phase1'))
-        csv_path = os.path.join(phase1_dir, folder)
-        os.makedirs(csv_path, exist_ok=True)
-
-        clean_title = clean_filename(book_data['title'])
-        csv_fieldname = f'{clean_title}_{DATE_TODAY}.csv'
-        csv_file = os.path.join(csv_path, csv_fieldname)
-
-        with open(csv_file, mode='w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=book_data.keys(), delimiter=';')
-            writer.writeheader()
-            writer.writerow(book_data)
-        print(f"\nLes données du livre : '{book_data['title']}' ont étaient exportées vers {csv_file}")
+        csv_fieldname = f'{clean_filename(book_data["title"])}_{DATE_TODAY}.csv'
+        commit_files([write_file(os.path.join(csv_path, csv_fieldname), [book_data])])
+        print(f"\nLes données du livre : '{book_data['title']}' ont étaient exportées vers {os.path.join(csv_path, csv_fieldname)}")
         return csv_fieldname
     except PermissionError:
         raise PermissionError(f"[ERREUR] Le fichier est déjà ouvert ailleurs (ex: Excel). Ferme-le pour pouvoir sauvegarder : {csv_path}")
@@ -39,72 +669,96 @@ def save_to_csv(book_data, folder):
         print(f"[ERREUR] Impossible d'enregistrer le fichier CSV :\n-> {e}")
 
 
-def save_category_to_csv(data_list, category_name):
+def save_category_to_csv(data_list, category_name, base_dir=os.path.join(PROJECT_ROOT, 'phase2')):
     """
     Crée un dossier 'CSV' dans le dossier phase2 (s'il n'existe pas), 
     puis enregistre les données d'une catégorie de livres dans un fichier CSV.
 
+    Comme pour les phases 3 et 4, le chemin vient de l'arborescence de sortie (`get_layout`) et le fichier
+    est écrit sous un nom temporaire puis validé (fsync, renommage atomique) : un CSV existant n'est
+    jamais remplacé par un fichier incomplet.
+
     Args:
         data_list (list[dict[[str, any]]): Liste des dictionnaires contenant les données extraites des pages produit.
         category_name (str): Nom de la catégorie à utiliser pour nommer le fichier CSV.
+        base_dir (str, optional): Répertoire de base du dossier 'CSV' (par défaut, phase2).
+
+    Returns:
+        str | None: Chemin du fichier enregistré (None si la liste est vide ou en cas d'échec).
 
     Raises:
-        Exception: En cas d'erreur lors de la création du dossier ou de l'écriture du fichier CSV.
+        PermissionError: Si le fichier final est déjà ouvert ailleurs (ex : Excel).
     """
     if not data_list:
         print("[INFO] Aucun livre à enregistrer.")
-        return
+        return None
 
+    csv_path = get_layout(base_dir).single_category_file(category_name)
     try:
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        phase2_dir = os.path.join(project_root, 'phase2')
-        csv_folder = os.path.join(phase2_dir, 'CSV')
-        os.makedirs(csv_folder, exist_ok=True)
-
-        csv_filename = f"products_category_{category_name}_{DATE_TODAY}.csv"
-        csv_path = os.path.join(csv_folder, csv_filename)
-
-        with open(csv_path, mode='w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=data_list[0].keys(), delimiter=';')
-            writer.writeheader()
-            writer.writerows(data_list)
-
+        commit_files([write_file(csv_path, data_list)])
         print(f"[SAUVEGARDE] {len(data_list)} livres enregistrés dans : {csv_path}")
-
-
+        return csv_path
     except PermissionError:
         raise PermissionError(f"[ERREUR] Le fichier est déjà ouvert ailleurs (ex: Excel). Ferme-le pour pouvoir sauvegarder : {csv_path}")
     except Exception as e:
         print(f"[ERREUR] Échec lors de l'écriture du fichier CSV : {e}")
+        return None
+    finally:
+        if os.path.isfile(f"{csv_path}.tmp"):
+            os.remove(f"{csv_path}.tmp")
 
 
-def save_all_categories_to_csv(all_books_data, category_name, base_dir):
+def save_all_categories_to_csv(all_books_data, category_name, base_dir, fmt='csv', scraped_on=None,
+                               prefix='products_category'):
     """
-    Sauvegarde les données d'une catégorie de livres dans un fichier CSV,
+    Sauvegarde les données d'une catégorie de livres dans un fichier CSV (ou un autre format d'export),
     dans un dossier dédié à cette catégorie.
 
+    L'écriture est confiée au thread d'écriture partagé (`get_background_writer`) : la fonction
+    rend la main immédiatement, le fichier est écrit puis validé (fsync, renommage atomique) en arrière-plan.
+    Appeler `get_background_writer().flush()` pour attendre la fin des écritures.
+
     Args:
-        all_books_data (list[dict]): Liste des données extraites pour tous les livres d'une catégorie.
+        all_books_data (list[Mapping]): Liste des données extraites pour tous les livres d'une catégorie.
         category_name (str): Nom brut de la catégorie (sera nettoyé pour créer le dossier).
         base_fir (str): Chemin du répertoire de base où le dossier CSV sera créé 
                         (ex. : phase3, phase4, etc.).
+        fmt (str, optional): Format d'export : 'csv' (par défaut), 'csv.gz', 'csv.zst', 'jsonl' ou 'parquet'.
+        scraped_on (str, optional): Date du scraping dans le nom du fichier (par défaut, la date du jour).
+        prefix (str, optional): Préfixe du nom de fichier ('listing_category' pour le mode "prix seuls",
+                                qui ne doit pas remplacer l'export complet du jour).
+
+    Returns:
+        str | None: Chemin du fichier final (None si la catégorie est vide).
 
     Raises:
-        PermissionError: Si le fichier est déjà ouvert (ex : Excel) et ne peut pas être écrasé.
-        Exception: En cas d'échec lors de la création du dossier ou de l'écriture du fichier.
+        ValueError: Si le format est inconnu. Les erreurs d'écriture (ex : PermissionError si le fichier
+                    est ouvert dans Excel) sont relancées par `flush()`.
     """
     if not all_books_data:
         print(f"[INFO] Aucun livre à enregistrer pour la catégorie '{category_name}'")
-        return
+        return None
+
+    writer_class = get_writer(fmt)
+    path = get_layout(base_dir).category_file(category_name, writer_class.extension, prefix, scraped_on)
+    get_background_writer().submit(write_file, path, all_books_data, fmt)
+    return path
 
-    safe_category_name = re.sub(r'[^\w\s-]', '', category_name).strip().replace(' ', '_')
-    category_folder = os.path.join(base_dir, "CSV", safe_category_name)
-    os.makedirs(category_folder, exist_ok=True)
 
-    filename = f"products_category_{safe_category_name}_{DATE_TODAY}.csv"
-    csv_path = os.path.join(category_folder, filename)
+def save_category_changes_to_csv(changes, category_name, base_dir):
+    """
+    Enregistre le journal des changements d'une catégorie (mode delta) dans un fichier CSV,
+    dans le dossier dédié à cette catégorie (écriture en arrière-plan, comme `save_all_categories_to_csv`).
+
+    Args:
+        changes (list[dict]): Lignes de changement produites par `utils.delta.SnapshotStore.apply`.
+        category_name (str): Nom brut de la catégorie (sera nettoyé pour créer le dossier).
+        base_dir (str): Chemin du répertoire de base où le dossier CSV sera créé (ex. : phase3, phase4).
+    """
+    if not changes:
+        print(f"[DELTA] Aucun changement pour la catégorie '{category_name}'")
+        return
 
-    with open(csv_path, mode='w', newline='', encoding='utf-8-sig') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=all_books_data[0].keys(), delimiter=';')
-        writer.writeheader()
-        writer.writerows(all_books_data)
\ No newline at end of file
+    csv_path = get_layout(base_dir).category_file(category_name, prefix='changes_category')
+    get_background_writer().submit(write_file, csv_path, changes, 'csv', None, 'changes')
+    print(f"[DELTA] {len(changes)} changements enregistrés dans : {csv_path}")
@@ -0,0 +1,277 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+"""
+Ordonnanceur des requêtes partagé par tous les chemins de récupération (threads, pipeline, asyncio).
+
+Pour chaque hôte, il combine :
+    - un seau à jetons (token bucket) qui limite le débit de requêtes par seconde ;
+    - une limite de requêtes simultanées, ajustée de façon adaptative (AIMD) : elle augmente
+      tant que les réponses sont rapides et saines, et diminue dès que la latence se dégrade
+      ou que le serveur répond 429 / 5xx ;
+    - des reprises avec backoff exponentiel et gigue (full jitter), qui respectent l'en-tête Retry-After.
+"""
+
+DEFAULT_RATE = 50.0
+MIN_RATE = 1.0
+MAX_RATE = 200.0
+RATE_INCREASE = 0.5
+DEFAULT_MIN_CONCURRENCY = 2
+DEFAULT_MAX_CONCURRENCY = 20
+DECREASE_FACTOR = 0.7
+LATENCY_DECREASE_FACTOR = 0.9
+LATENCY_TOLERANCE = 3.0
+LATENCY_FLOOR = 0.05
+LATENCY_SMOOTHING = 0.2
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+SLOT_POLL_INTERVAL = 0.01
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def parse_retry_after(value):
+    """
+    Convertit un en-tête Retry-After (secondes ou date HTTP) en nombre de secondes.
+
+    Args:
+        value (str | None): Valeur de l'en-tête.
+
+    Returns:
+        float | None: Délai en secondes, ou None si l'en-tête est absent ou invalide.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    """
+    État d'ordonnancement d'un hôte : seau à jetons, limite de concurrence et compteurs.
+    """
+
+    def __init__(self, rate, concurrency):
+        self.rate = rate
+        self.tokens = 1.0
+        self.refilled_at = time.monotonic()
+        self.limit = float(concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency = None
+        self.min_latency = None
+        self.counters = {'requests': 0, 'retries': 0, 'throttled': 0, 'server_errors': 0, 'failures': 0}
+
+
+class FetchScheduler:
+    """
+    Ordonnanceur adaptatif des requêtes, par hôte, partageable entre threads et boucles asyncio.
+
+    Args:
+        rate (float, optional): Débit initial autorisé par hôte, en requêtes par seconde.
+        max_rate (float, optional): Débit maximal atteignable par hôte.
+        min_concurrency (int, optional): Nombre minimal de requêtes simultanées par hôte.
+        max_concurrency (int, optional): Nombre maximal de requêtes simultanées par hôte.
+        max_retries (int, optional): Nombre maximal de reprises d'une requête en échec.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, max_rate=MAX_RATE, min_concurrency=DEFAULT_MIN_CONCURRENCY,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES):
+        self.initial_rate = rate
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.initial_rate, self.max_concurrency)
+        return state
+
+    def allow_concurrency(self, max_concurrency):
+        """
+        Relève (sans jamais l'abaisser) le nombre maximal de requêtes simultanées par hôte,
+        par exemple à la taille du pool de connexions ou à la limite par hôte du moteur asyncio.
+
+        Args:
+            max_concurrency (int): Nombre de requêtes simultanées que l'appelant peut envoyer vers un même hôte.
+        """
+        with self._lock:
+            self.max_concurrency = max(self.max_concurrency, max_concurrency)
+
+    def try_acquire(self, url):
+        """
+        Tente de réserver un créneau (jeton et place de concurrence) pour une requête.
+
+        Args:
+            url (str): L'URL de la requête.
+
+        Returns:
+            float: 0 si le créneau est réservé, sinon le délai conseillé (en secondes) avant de réessayer.
+        """
+        with self._lock:
+            state = self._host(url)
+            now = time.monotonic()
+            if now < state.paused_until:
+                return state.paused_until - now
+            state.tokens = min(1.0, state.tokens + (now - state.refilled_at) * state.rate)
+            state.refilled_at = now
+            if state.tokens < 1.0:
+                return (1.0 - state.tokens) / state.rate
+            if state.in_flight >= int(state.limit):
+                return SLOT_POLL_INTERVAL
+            state.tokens -= 1.0
+            state.in_flight += 1
+            state.counters['requests'] += 1
+            return 0.0
+
+    def acquire(self, url):
+        """
+        Attend (en bloquant le thread) qu'un créneau soit disponible pour une requête.
+
+        Args:
+            url (str): L'URL de la requête.
+        """
+        while True:
+            wait = self.try_acquire(url)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def release(self, url, status=None, latency=None, retry_after=None):
+        """
+        Libère le créneau d'une requête terminée et ajuste le débit et la concurrence de l'hôte.
+
+        Args:
+            url (str): L'URL de la requête.
+            status (int, optional): Code HTTP de la réponse, ou None en cas d'erreur réseau.
+            latency (float, optional): Durée de la requête en secondes.
+            retry_after (float, optional): Délai demandé par le serveur (en-tête Retry-After).
+        """
+        with self._lock:
+            state = self._host(url)
+            state.in_flight = max(state.in_flight - 1, 0)
+            if status is None or status in RETRY_STATUSES:
+                if status == 429:
+                    state.counters['throttled'] += 1
+                elif status is None:
+                    state.counters['failures'] += 1
+                else:
+                    state.counters['server_errors'] += 1
+                state.limit = max(self.min_concurrency, state.limit * DECREASE_FACTOR)
+                state.rate = max(MIN_RATE, state.rate * DECREASE_FACTOR)
+                if retry_after:
+                    state.paused_until = max(state.paused_until, time.monotonic() + retry_after)
+                return
+
+            if latency is not None:
+                state.latency = latency if state.latency is None else (
+                    (1 - LATENCY_SMOOTHING) * state.latency + LATENCY_SMOOTHING * latency
+                )
+                state.min_latency = latency if state.min_latency is None else min(state.min_latency, latency)
+            baseline = max(state.min_latency or 0.0, LATENCY_FLOOR)
+            if state.latency is not None and state.latency > LATENCY_TOLERANCE * baseline:
+                state.limit = max(self.min_concurrency, state.limit * LATENCY_DECREASE_FACTOR)
+            else:
+                state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+                state.rate = min(self.max_rate, state.rate + RATE_INCREASE)
+
+    def cancel(self, url):
+        """
+        Libère le créneau d'une requête interrompue pour une raison étrangère à l'hôte (URL ou en-tête
+        invalide, annulation de la tâche...), sans ajuster son débit ni sa concurrence.
+
+        Args:
+            url (str): L'URL de la requête.
+        """
+        with self._lock:
+            state = self._host(url)
+            state.in_flight = max(state.in_flight - 1, 0)
+
+    def should_retry(self, attempt, status=None):
+        """
+        Indique si une requête doit être retentée.
+
+        Args:
+            attempt (int): Numéro de la tentative qui vient d'échouer (0 pour la première).
+            status (int, optional): Code HTTP reçu, ou None en cas d'erreur réseau.
+
+        Returns:
+            bool: True si une nouvelle tentative est autorisée.
+        """
+        return attempt < self.max_retries and (status is None or status in RETRY_STATUSES)
+
+    def backoff_delay(self, url, attempt, retry_after=None):
+        """
+        Calcule le délai avant la prochaine tentative (backoff exponentiel avec gigue).
+
+        Args:
+            url (str): L'URL de la requête.
+            attempt (int): Numéro de la tentative qui vient d'échouer (0 pour la première).
+            retry_after (float, optional): Délai demandé par le serveur.
+
+        Returns:
+            float: Délai en secondes.
+        """
+        with self._lock:
+            self._host(url).counters['retries'] += 1
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def stats(self):
+        """
+        Retourne l'état courant de chaque hôte.
+
+        Returns:
+            dict[str, dict]: Pour chaque hôte, débit, concurrence, latence lissée et compteurs.
+        """
+        with self._lock:
+            return {
+                host: {
+                    'rate': state.rate,
+                    'concurrency': int(state.limit),
+                    'latency': state.latency,
+                    **state.counters,
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def print_stats(self):
+        """
+        Affiche l'état de l'ordonnanceur pour chaque hôte dans la console.
+        """
+        for host, entry in self.stats().items():
+            latency = f"{entry['latency'] * 1000:.0f} ms" if entry['latency'] is not None else "n/a"
+            print(f"[ORDONNANCEUR] {host} : {entry['requests']} requêtes, {entry['retries']} reprises, "
+                  f"{entry['throttled']} 429, {entry['server_errors']} 5xx, {entry['failures']} erreurs réseau "
+                  f"-> {entry['rate']:.1f} req/s, {entry['concurrency']} simultanées, latence {latency}")
+
+
+def get_scheduler():
+    """
+    Retourne l'ordonnanceur partagé, en le créant au premier appel.
+
+    Returns:
+        FetchScheduler: L'ordonnanceur partagé.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler()
+        return _scheduler
@@ -0,0 +1,218 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.image_store import ImageStore, get_image_store
+from utils.metrics import get_metrics
+
+"""
+Génération des miniatures des couvertures et du manifeste d'images de chaque catégorie
+(dépendance optionnelle : Pillow).
+
+Les miniatures sont calculées une fois par image source, dans un pool de processus, et rangées
+dans le stockage d'images sous l'empreinte de la source (.cache/images/thumbnails/100x150/ab/abcdef....jpg).
+Une couverture dont l'empreinte n'a pas changé depuis un run précédent n'est ni relue ni
+redimensionnée. Le dossier 'Book_Cover' de chaque catégorie reçoit des liens vers les miniatures
+(thumbnails/100x150/nom_du_livre.jpg) et un fichier manifest.json : dimensions, taille en octets
+et empreinte SHA-256 de chaque couverture, chemins de ses miniatures.
+"""
+
+THUMBNAIL_SIZES = ((100, 150), (200, 300))
+THUMBNAIL_QUALITY = 85
+MANIFEST_NAME = 'manifest.json'
+
+
+def size_label(size):
+    """
+    Retourne le nom du dossier d'une taille de miniature (ex : '100x150').
+    """
+    return f"{size[0]}x{size[1]}"
+
+
+def _render(source_path, targets):
+    """
+    Lit une couverture et produit ses miniatures (exécuté dans un processus du pool).
+
+    Chaque miniature a exactement la taille demandée : l'image est réduite sans déformation
+    puis complétée par des bandes blanches.
+
+    Args:
+        source_path (str): Chemin de l'image dans le stockage.
+        targets (list[tuple[tuple[int, int], str]]): Couples (taille, chemin de la miniature) à produire.
+
+    Returns:
+        tuple[int, int]: Largeur et hauteur de l'image source.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        width, height = image.size
+        if targets:
+            image = image.convert('RGB')
+        for size, dest_path in targets:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+            ImageOps.pad(image, size, method=Image.Resampling.LANCZOS, color='white').save(
+                tmp_path, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True
+            )
+            os.replace(tmp_path, dest_path)
+    return width, height
+
+
+class ThumbnailStage:
+    """
+    Étape de post-traitement des couvertures téléchargées : miniatures et manifeste par catégorie.
+
+    Les catégories sont ajoutées au fil du crawl (`add_category`) : les couvertures à traiter
+    partent aussitôt dans le pool de processus, en parallèle des téléchargements. `close` attend
+    les miniatures puis écrit les liens et le manifeste de chaque catégorie.
+
+    Args:
+        store (ImageStore, optional): Stockage des images (par défaut, le stockage partagé).
+        sizes (Iterable[tuple[int, int]], optional): Tailles des miniatures (largeur, hauteur) en pixels.
+        workers (int, optional): Nombre de processus (nombre de cœurs par défaut).
+
+    Raises:
+        ImportError: Si Pillow n'est pas installé.
+    """
+
+    def __init__(self, store=None, sizes=THUMBNAIL_SIZES, workers=None):
+        try:
+            import PIL  # noqa: F401
+        except ImportError as e:
+            raise ImportError("[ERREUR] Les miniatures nécessitent Pillow : pip install Pillow") from e
+        self.store = store if store is not None else get_image_store()
+        self.sizes = tuple(tuple(size) for size in sizes)
+        self.workers = workers
+        self._pool = None
+        self._renders = {}
+        self._categories = []
+        self.counters = {'generated': 0, 'unchanged': 0, 'errors': 0}
+
+    def thumbnail_path(self, content_hash, size):
+        """
+        Retourne le chemin d'une miniature dans le stockage à partir de l'empreinte de la source.
+        """
+        return os.path.join(self.store.root, 'thumbnails', size_label(size), content_hash[:2], content_hash + '.jpg')
+
+    def add_category(self, category_name, covers, book_cover_dir):
+        """
+        Ajoute les couvertures d'une catégorie et lance le calcul des miniatures manquantes.
+
+        Une image source n'est traitée qu'une fois par run, même si elle figure dans plusieurs
+        catégories ; les couvertures absentes du stockage (téléchargement échoué) sont ignorées.
+
+        Args:
+            category_name (str): Nom de la catégorie.
+            covers (Iterable[tuple[Mapping, str]]): Couples (livre, chemin de sa couverture dans `book_cover_dir`).
+            book_cover_dir (str): Dossier des couvertures de la catégorie.
+        """
+        entries = []
+        for book, cover_path in covers:
+            entry = self.store.entry(book['image_url'])
+            if entry is None or not os.path.exists(cover_path):
+                continue
+            content_hash, extension = entry
+            entries.append((book, cover_path, content_hash))
+            if content_hash in self._renders:
+                continue
+            targets = [(size, self.thumbnail_path(content_hash, size)) for size in self.sizes]
+            targets = [(size, path) for size, path in targets if not os.path.exists(path)]
+            if not targets and self.store.image_info(content_hash) is not None:
+                self._renders[content_hash] = None
+                self.counters['unchanged'] += 1
+                get_metrics().inc('thumbnails', outcome='unchanged')
+                continue
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            source_path = self.store.object_path(content_hash, extension)
+            self._renders[content_hash] = (self._pool.submit(_render, source_path, targets), source_path)
+        self._categories.append((category_name, book_cover_dir, entries))
+
+    def _collect(self):
+        """
+        Attend les miniatures en cours et enregistre les dimensions et la taille des images sources.
+        """
+        for content_hash, render in self._renders.items():
+            if render is None:
+                continue
+            future, source_path = render
+            try:
+                width, height = future.result()
+            except Exception as e:
+                print(f"[ERREUR] Miniatures échouées ({source_path}) : {e}")
+                self.counters['errors'] += 1
+                get_metrics().inc('errors', level='image', stage='thumbnail')
+                continue
+            self.store.record_image_info(content_hash, width, height, os.path.getsize(source_path))
+            self.counters['generated'] += 1
+            get_metrics().inc('thumbnails', outcome='generated')
+        self._renders = dict.fromkeys(self._renders)
+
+    def _write_category(self, category_name, book_cover_dir, entries):
+        """
+        Lie les miniatures dans le dossier de la catégorie et écrit son manifeste.
+        """
+        images = []
+        for book, cover_path, content_hash in entries:
+            info = self.store.image_info(content_hash)
+            if info is None:
+                continue
+            width, height, size = info
+            stem = os.path.splitext(os.path.basename(cover_path))[0]
+            thumbnails = {}
+            for thumbnail_size in self.sizes:
+                relative_path = f"thumbnails/{size_label(thumbnail_size)}/{stem}.jpg"
+                dest_path = os.path.join(book_cover_dir, *relative_path.split('/'))
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                ImageStore.link(self.thumbnail_path(content_hash, thumbnail_size), dest_path)
+                thumbnails[size_label(thumbnail_size)] = relative_path
+            images.append({
+                'title': book['title'],
+                'image_url': book['image_url'],
+                'file': os.path.basename(cover_path),
+                'width': width,
+                'height': height,
+                'bytes': size,
+                'sha256': content_hash,
+                'thumbnails': thumbnails,
+            })
+
+        manifest_path = os.path.join(book_cover_dir, MANIFEST_NAME)
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'category': category_name,
+                'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'sizes': [size_label(size) for size in self.sizes],
+                'images': images,
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def close(self):
+        """
+        Attend la fin des miniatures, écrit les liens et le manifeste de chaque catégorie
+        puis arrête le pool de processus.
+        """
+        try:
+            self._collect()
+            for category_name, book_cover_dir, entries in self._categories:
+                self._write_category(category_name, book_cover_dir, entries)
+            self._categories = []
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def print_report(self):
+        """
+        Affiche le bilan des miniatures du run.
+        """
+        print(f"[MINIATURES] {self.counters['generated']} images traitées, {self.counters['unchanged']} inchangées, "
+              f"{self.counters['errors']} erreurs ({', '.join(size_label(size) for size in self.sizes)})")
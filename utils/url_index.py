@@ -0,0 +1,308 @@
+import os
+import sqlite3
+import threading
+import time
+from utils.metrics import get_metrics
+from utils.saver import BatchSink
+
+"""
+Index persistant des URLs du site (à la manière d'un sitemap) et dédoublonnage des livres d'un run.
+
+L'index conserve, d'un run à l'autre, les URLs des catégories, les pages produit de chaque
+catégorie et l'UPC associé à chaque page produit. La découverte des catégories le met à jour
+de façon incrémentale : seuls les liens apparus ou disparus sont écrits.
+
+`CrawlDedup` garantit qu'une page produit n'est récupérée et analysée qu'une fois par run,
+même si elle figure dans plusieurs catégories ou si une liste change en cours de run : son
+enregistrement est partagé avec toutes les catégories qui la listent.
+"""
+
+DEFAULT_INDEX_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'url_index.sqlite3'))
+INDEX_BATCH_SIZE = 500
+
+
+class UrlIndex:
+    """
+    Index des URLs stocké dans une base SQLite, partageable entre threads.
+
+    Args:
+        path (str, optional): Chemin du fichier SQLite (par défaut : .cache/url_index.sqlite3 à la racine du projet).
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS categories (
+                name TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                refreshed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS category_products (
+                category TEXT NOT NULL,
+                product_url TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (category, product_url)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_category_products_url ON category_products (product_url);
+            CREATE TABLE IF NOT EXISTS products (
+                url TEXT PRIMARY KEY,
+                universal_product_code TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_products_upc ON products (universal_product_code);
+        """)
+
+    def update_categories(self, categories):
+        """
+        Enregistre la liste des catégories découvertes sur la page d'accueil.
+
+        Args:
+            categories (Iterable[tuple[str, str]]): Couples (nom de catégorie, URL de catégorie).
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO categories (name, url) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET url = excluded.url",
+                list(categories),
+            )
+
+    def update_category(self, category_name, product_urls):
+        """
+        Met à jour les pages produit d'une catégorie : seuls les liens ajoutés ou retirés
+        depuis la dernière découverte sont écrits.
+
+        Args:
+            category_name (str): Nom de la catégorie.
+            product_urls (list[str]): URLs des pages produit, dans l'ordre de la catégorie.
+
+        Returns:
+            tuple[int, int]: Nombre de liens ajoutés et retirés.
+        """
+        positions = {url: position for position, url in enumerate(product_urls)}
+        with self._lock, self._conn:
+            previous = dict(self._conn.execute(
+                "SELECT product_url, position FROM category_products WHERE category = ?", (category_name,)
+            ))
+            removed = [url for url in previous if url not in positions]
+            changed = [(category_name, url, position) for url, position in positions.items()
+                       if previous.get(url) != position]
+            self._conn.executemany(
+                "DELETE FROM category_products WHERE category = ? AND product_url = ?",
+                [(category_name, url) for url in removed],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO category_products (category, product_url, position) VALUES (?, ?, ?)", changed
+            )
+            self._conn.execute(
+                "INSERT INTO categories (name, url, refreshed_at) VALUES (?, '', ?) "
+                "ON CONFLICT (name) DO UPDATE SET refreshed_at = excluded.refreshed_at",
+                (category_name, time.time()),
+            )
+        added = sum(1 for url in positions if url not in previous)
+        return added, len(removed)
+
+    def record_products(self, books):
+        """
+        Enregistre l'UPC de chaque page produit (les livres sans UPC sont ignorés).
+
+        Args:
+            books (Iterable[Mapping]): Livres récupérés (BookRecord ou dictionnaires).
+        """
+        rows = [(book['product_page_url'], book['universal_product_code'], time.time())
+                for book in books if book.get('universal_product_code')]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO products (url, universal_product_code, updated_at) VALUES (?, ?, ?)", rows
+            )
+
+    def product_writer(self, batch_size=INDEX_BATCH_SIZE):
+        """
+        Retourne une sortie en flux (méthode `write`) qui enregistre les UPC par lots.
+
+        Returns:
+            BatchSink: Sortie à fermer (ou à utiliser comme gestionnaire de contexte).
+        """
+        return BatchSink(self.record_products, batch_size)
+
+    def product_urls(self, category_name):
+        """
+        Retourne les pages produit connues d'une catégorie, dans l'ordre de sa dernière découverte.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT product_url FROM category_products WHERE category = ? ORDER BY position", (category_name,)
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def categories_of(self, product_url):
+        """
+        Retourne les catégories dans lesquelles figure une page produit.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT category FROM category_products WHERE product_url = ? ORDER BY category", (product_url,)
+            ).fetchall()
+        return [category for (category,) in rows]
+
+    def upc(self, product_url):
+        """
+        Retourne l'UPC connu d'une page produit (None s'il n'a jamais été enregistré).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT universal_product_code FROM products WHERE url = ?", (product_url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def upc_map(self):
+        """
+        Retourne la correspondance complète URL de page produit -> UPC.
+
+        Returns:
+            dict[str, str]: UPC par URL.
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT url, universal_product_code FROM products"))
+
+    def summary(self):
+        """
+        Retourne le nombre de catégories, de liens catégorie -> produit et de produits indexés.
+        """
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('categories', 'category_products', 'products')
+            }
+
+    def close(self):
+        """
+        Ferme la connexion à la base.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class CrawlDedup:
+    """
+    Livres pris en charge pendant un run, partageable entre threads.
+
+    Un livre est identifié par son UPC lorsqu'il est connu (plusieurs URLs pour un même produit),
+    sinon par l'URL de sa page produit. La première catégorie qui rencontre un livre le réserve
+    (`claim`), le récupère puis publie son enregistrement (`publish`, ou `write` comme une sortie
+    en flux). Les autres catégories qui listent ce livre ne le récupèrent pas : elles reçoivent
+    l'enregistrement publié (`shared`, `books`) et l'écrivent aussi dans leurs propres fichiers.
+
+    Args:
+        aliases (dict[str, str], optional): UPC connus par URL (voir `UrlIndex.upc_map`).
+    """
+
+    def __init__(self, aliases=None):
+        self.aliases = aliases or {}
+        self._records = {}
+        self._published = set()
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def _key(self, url):
+        return self.aliases.get(url, url)
+
+    def claim(self, url):
+        """
+        Réserve une page produit pour ce run.
+
+        Returns:
+            bool: True si la page n'avait pas encore été réservée (elle doit être récupérée, puis publiée).
+        """
+        from concurrent.futures import Future
+
+        key = self._key(url)
+        with self._lock:
+            if key in self._records:
+                self.skipped += 1
+                get_metrics().inc('duplicates', level='book')
+                return False
+            self._records[key] = Future()
+            return True
+
+    def claim_all(self, urls):
+        """
+        Réserve une liste de pages produit et retourne celles qui n'avaient pas encore été réservées,
+        dans leur ordre d'origine.
+        """
+        return [url for url in urls if self.claim(url)]
+
+    def publish(self, url, book):
+        """
+        Publie l'enregistrement d'une page produit réservée, pour les autres catégories qui la listent.
+        Sans effet si la page a déjà été publiée.
+
+        Args:
+            url (str): URL de la page produit.
+            book (dict | None): Données du livre, ou None si sa récupération a échoué.
+        """
+        key = self._key(url)
+        with self._lock:
+            future = self._records.get(key)
+            if future is None or key in self._published:
+                return
+            self._published.add(key)
+        future.set_result(book)
+
+    def write(self, book):
+        """
+        Publie un livre récupéré (interface des sorties en flux, voir `TeeSink`).
+        """
+        self.publish(book['product_page_url'], book)
+
+    def release(self, urls):
+        """
+        Publie None pour les pages réservées qui n'ont pas été publiées (récupération en échec) :
+        les catégories qui les attendent ne restent pas bloquées.
+        """
+        for url in urls:
+            self.publish(url, None)
+
+    def shared(self, url):
+        """
+        Retourne l'enregistrement à venir d'une page produit réservée.
+
+        Returns:
+            concurrent.futures.Future: Résolu avec les données du livre (None en cas d'échec).
+        """
+        with self._lock:
+            return self._records[self._key(url)]
+
+    def books(self, urls, skip=()):
+        """
+        Retourne les livres publiés pour une liste de pages produit, dans leur ordre d'origine,
+        en attendant les pages encore en cours de récupération.
+
+        Args:
+            urls (list[str]): URLs des pages produit (toutes réservées).
+            skip (list[str], optional): Pages à écarter (ex : celles déjà écrites par la catégorie).
+
+        Returns:
+            list[dict]: Un enregistrement par livre distinct ; les livres en échec sont ignorés.
+        """
+        seen = {self._key(url) for url in skip}
+        books = []
+        for url in urls:
+            key = self._key(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            book = self.shared(url).result()
+            if book:
+                books.append(book)
+        return books
+
+    def print_report(self):
+        """
+        Affiche le bilan du dédoublonnage du run.
+        """
+        print(f"[DEDOUBLONNAGE] {len(self._records)} livres distincts, {self.skipped} doublons partagés (non récupérés)")
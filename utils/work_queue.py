@@ -0,0 +1,502 @@
+import hmac
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from utils.records import to_json
+
+"""
+File de travail partagée pour le crawl réparti (voir `phase4.sharded`).
+
+Le coordinateur y dépose des unités de travail (une catégorie, un lot de pages produit) que
+des workers, processus locaux ou machines distantes, prennent en bail : un bail expiré
+(worker arrêté en cours de travail) remet l'unité en attente, jusqu'à `MAX_ATTEMPTS` tentatives.
+Un worker en vie prolonge son bail tant qu'il traite l'unité (`LeaseKeeper`) : une unité lente
+(ralentie par le contrôle de débit) n'est pas reprise par un autre worker.
+Les résultats sont stockés avec l'unité, pour être fusionnés par le coordinateur.
+
+Deux accès à la même file :
+    - `WorkQueue` : base SQLite locale, partageable entre processus d'une même machine ;
+    - `RemoteQueue` : client TCP d'un coordinateur lancé avec `serve_queue` (autres machines).
+
+Le serveur TCP écoute par défaut sur 127.0.0.1 : l'ouvrir aux autres machines demande une adresse
+explicite et un jeton partagé (`QUEUE_TOKEN_ENV` ou --token), vérifié à chaque appel. Le protocole
+n'est pas chiffré (jeton et résultats circulent en clair) : hors boucle locale, il ne doit être
+exposé que sur un réseau de confiance (réseau privé, VPN ou tunnel SSH).
+"""
+
+DEFAULT_QUEUE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache', 'work_queue.sqlite3'))
+LEASE_SECONDS = 300
+RENEW_INTERVAL = LEASE_SECONDS / 3
+MAX_ATTEMPTS = 3
+QUEUE_TOKEN_ENV = 'BOOKSONLINE_QUEUE_TOKEN'
+LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+REMOTE_METHODS = (
+    'latest_crawl', 'crawl_options', 'lease', 'renew', 'complete', 'fail', 'claim_urls', 'is_finished', 'status'
+)
+
+
+class WorkQueue:
+    """
+    File de travail stockée dans une base SQLite (mode WAL), partageable entre threads et processus.
+
+    Args:
+        path (str, optional): Chemin du fichier SQLite (par défaut : .cache/work_queue.sqlite3 à la racine du projet).
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawls (
+                id TEXT PRIMARY KEY,
+                options TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                result TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (crawl, state);
+            CREATE TABLE IF NOT EXISTS claims (
+                crawl TEXT NOT NULL,
+                url TEXT NOT NULL,
+                category TEXT NOT NULL,
+                PRIMARY KEY (crawl, url)
+            ) WITHOUT ROWID;
+        """)
+
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def create_crawl(self, crawl, options, jobs):
+        """
+        Enregistre un nouveau crawl et ses premières unités de travail.
+
+        Args:
+            crawl (str): Identifiant du crawl.
+            options (dict): Options partagées par tous les workers (sérialisables en JSON).
+            jobs (Iterable[tuple[str, dict]]): Couples (type d'unité, contenu).
+        """
+        with self._lock:
+            self._transaction()
+            try:
+                self._conn.execute("INSERT INTO crawls (id, options, created_at) VALUES (?, ?, ?)",
+                                   (crawl, json.dumps(options), time.time()))
+                self._insert_jobs(crawl, jobs)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _insert_jobs(self, crawl, jobs):
+        self._conn.executemany(
+            "INSERT INTO jobs (crawl, kind, payload) VALUES (?, ?, ?)",
+            [(crawl, kind, json.dumps(payload, default=to_json)) for kind, payload in jobs],
+        )
+
+    def latest_crawl(self):
+        """
+        Retourne l'identifiant du dernier crawl créé (None si la file est vide).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM crawls ORDER BY created_at DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def crawl_options(self, crawl):
+        """
+        Retourne les options d'un crawl (None si le crawl est inconnu).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT options FROM crawls WHERE id = ?", (crawl,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def lease(self, crawl, owner, lease_seconds=LEASE_SECONDS):
+        """
+        Prend en bail la plus ancienne unité en attente (ou dont le bail a expiré) d'un crawl.
+
+        Returns:
+            dict | None: Clés 'id', 'kind', 'payload' et 'attempts', ou None si aucune unité n'est disponible.
+        """
+        now = time.time()
+        with self._lock:
+            self._transaction()
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'failed', error = 'bail expiré' "
+                    "WHERE crawl = ? AND state = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (crawl, now, MAX_ATTEMPTS),
+                )
+                row = self._conn.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs WHERE crawl = ? "
+                    "AND (state = 'pending' OR (state = 'leased' AND lease_until < ?)) ORDER BY id LIMIT 1",
+                    (crawl, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                        "WHERE id = ?", (owner, now + lease_seconds, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]), 'attempts': row[3] + 1}
+
+    def renew(self, job_id, owner, lease_seconds=LEASE_SECONDS):
+        """
+        Prolonge le bail d'une unité en cours de traitement.
+
+        Returns:
+            bool: True si le bail est toujours détenu par ce worker (False s'il a expiré et été repris).
+        """
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (time.time() + lease_seconds, job_id, owner),
+            ).rowcount
+        return bool(updated)
+
+    def complete(self, job_id, owner, result=None, new_jobs=()):
+        """
+        Termine une unité et ajoute, dans la même transaction, les unités qu'elle a produites.
+
+        Sans effet si le bail a été repris par un autre worker entre-temps.
+
+        Args:
+            job_id (int): Identifiant de l'unité.
+            owner (str): Worker titulaire du bail.
+            result (optional): Résultat de l'unité (sérialisable en JSON, `BookRecord` compris).
+            new_jobs (Iterable[tuple[str, dict]], optional): Nouvelles unités (type, contenu).
+
+        Returns:
+            bool: True si l'unité a été terminée par ce worker.
+        """
+        with self._lock:
+            self._transaction()
+            try:
+                updated = self._conn.execute(
+                    "UPDATE jobs SET state = 'done', result = ?, error = NULL "
+                    "WHERE id = ? AND owner = ? AND state = 'leased'",
+                    (json.dumps(result, ensure_ascii=False, default=to_json), job_id, owner),
+                ).rowcount
+                if updated:
+                    crawl = self._conn.execute("SELECT crawl FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+                    self._insert_jobs(crawl, new_jobs)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return bool(updated)
+
+    def fail(self, job_id, owner, error, result=None):
+        """
+        Signale l'échec d'une unité : elle est remise en attente, ou marquée en échec
+        après `MAX_ATTEMPTS` tentatives.
+
+        Args:
+            job_id (int): Identifiant de l'unité.
+            owner (str): Worker titulaire du bail.
+            error (str): Cause de l'échec.
+            result (optional): Résultat partiel, conservé si l'unité est définitivement en échec
+                               (voir `results`).
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, result = ?, owner = NULL, lease_until = NULL "
+                "WHERE id = ? AND owner = ? AND state = 'leased'",
+                (MAX_ATTEMPTS, str(error), json.dumps(result, ensure_ascii=False, default=to_json),
+                 job_id, owner),
+            )
+
+    def claim_urls(self, crawl, category_name, urls):
+        """
+        Attribue des pages produit à une catégorie pour ce crawl et retourne celles qui lui reviennent.
+
+        Une page déjà attribuée à une autre catégorie est écartée ; l'appel est idempotent
+        (une catégorie reprise après un bail expiré retrouve ses pages).
+
+        Returns:
+            list[str]: Pages attribuées à `category_name`, dans l'ordre de `urls`.
+        """
+        with self._lock:
+            self._transaction()
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO claims (crawl, url, category) VALUES (?, ?, ?)",
+                    [(crawl, url, category_name) for url in urls],
+                )
+                owned = {url for (url,) in self._conn.execute(
+                    "SELECT url FROM claims WHERE crawl = ? AND category = ?", (crawl, category_name)
+                )}
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [url for url in urls if url in owned]
+
+    def is_finished(self, crawl):
+        """
+        Indique si toutes les unités d'un crawl sont terminées ou en échec.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE crawl = ? AND state IN ('pending', 'leased')", (crawl,)
+            ).fetchone()
+        return row[0] == 0
+
+    def status(self, crawl):
+        """
+        Compte les unités d'un crawl par type et par état.
+
+        Returns:
+            dict[str, dict[str, int]]: Pour chaque type d'unité, le nombre d'unités par état.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, state, COUNT(*) FROM jobs WHERE crawl = ? GROUP BY kind, state", (crawl,)
+            ).fetchall()
+        status = {}
+        for kind, state, count in rows:
+            status.setdefault(kind, {})[state] = count
+        return status
+
+    def results(self, crawl, kind, partial=False):
+        """
+        Retourne le contenu et le résultat des unités terminées d'un type, dans l'ordre de création.
+
+        Args:
+            crawl (str): Identifiant du crawl.
+            kind (str): Type d'unité.
+            partial (bool, optional): Inclut le résultat partiel des unités en échec qui en ont un.
+
+        Returns:
+            list[tuple[dict, object]]: Couples (contenu, résultat).
+        """
+        states = "('done', 'failed')" if partial else "('done')"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload, result FROM jobs WHERE crawl = ? AND kind = ? AND state IN {states} "
+                "AND result IS NOT NULL AND result != 'null' ORDER BY id",
+                (crawl, kind),
+            ).fetchall()
+        return [(json.loads(payload), json.loads(result)) for payload, result in rows]
+
+    def failures(self, crawl):
+        """
+        Retourne les unités en échec d'un crawl.
+
+        Returns:
+            list[tuple[str, dict, str]]: Triplets (type, contenu, dernière erreur).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, payload, error FROM jobs WHERE crawl = ? AND state = 'failed' ORDER BY id", (crawl,)
+            ).fetchall()
+        return [(kind, json.loads(payload), error) for kind, payload, error in rows]
+
+    def close(self):
+        """
+        Ferme la connexion à la base.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class LeaseKeeper:
+    """
+    Prolonge le bail d'une unité à intervalle régulier dans un thread, le temps de son traitement.
+
+    Exemple :
+
+        with LeaseKeeper(queue, job['id'], owner):
+            result = process(job)
+
+    Args:
+        queue (WorkQueue | RemoteQueue): File de travail.
+        job_id (int): Identifiant de l'unité prise en bail.
+        owner (str): Worker titulaire du bail.
+        interval (float, optional): Intervalle entre deux prolongations en secondes (un tiers du bail).
+    """
+
+    def __init__(self, queue, job_id, owner, interval=RENEW_INTERVAL):
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job_id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.renew(self.job_id, self.owner):
+                    print(f"[ERREUR] Bail de l'unité {self.job_id} perdu : elle a été reprise par un autre worker.")
+                    return
+            except Exception as e:
+                print(f"[ERREUR] Prolongation du bail de l'unité {self.job_id} impossible : {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+class _QueueHandler(socketserver.StreamRequestHandler):
+    """
+    Traite les requêtes d'un worker distant : une ligne JSON {"method", "args"} par appel,
+    une ligne JSON {"result"} ou {"error"} en réponse.
+
+    Si le serveur a un jeton, chaque requête doit porter le même ("token") : sinon la réponse
+    est une erreur et la connexion est fermée.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = {}
+            token = str(request.get('token') or '').encode('utf-8')
+            if self.server.token and not hmac.compare_digest(token, self.server.token.encode('utf-8')):
+                self.wfile.write(b'{"error": "jeton invalide"}\n')
+                return
+            try:
+                if request['method'] not in REMOTE_METHODS:
+                    raise ValueError(f"méthode non autorisée : {request['method']}")
+                response = {'result': getattr(self.server.queue, request['method'])(*request['args'])}
+            except Exception as e:
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False, default=to_json).encode('utf-8') + b'\n')
+
+
+class QueueServer(socketserver.ThreadingTCPServer):
+    """
+    Serveur TCP exposant une `WorkQueue` aux workers d'autres machines (voir `RemoteQueue`).
+
+    Args:
+        queue (WorkQueue): File servie.
+        address (tuple[str, int]): Adresse d'écoute (hôte, port).
+        token (str, optional): Jeton partagé exigé des workers (aucun contrôle si None).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, queue, address, token=None):
+        self.queue = queue
+        self.token = token
+        super().__init__(address, _QueueHandler)
+
+
+def serve_queue(queue, host='127.0.0.1', port=8800, token=None):
+    """
+    Sert une file de travail en TCP jusqu'à l'interruption du processus (Ctrl+C).
+
+    Args:
+        queue (WorkQueue): File servie.
+        host (str, optional): Adresse d'écoute (boucle locale par défaut ; '0.0.0.0' pour toutes les interfaces,
+                              sur un réseau de confiance uniquement : le jeton circule en clair).
+        port (int, optional): Port d'écoute.
+        token (str, optional): Jeton partagé exigé des workers (par défaut : variable d'environnement
+                               `QUEUE_TOKEN_ENV`).
+
+    Raises:
+        ValueError: Si l'adresse d'écoute n'est pas locale et qu'aucun jeton n'est fourni.
+    """
+    token = token or os.environ.get(QUEUE_TOKEN_ENV)
+    if host not in LOOPBACK_HOSTS and not token:
+        raise ValueError(f"[ERREUR] Une file servie sur {host} exige un jeton partagé "
+                         f"(--token ou variable {QUEUE_TOKEN_ENV}).")
+    with QueueServer(queue, (host, port), token) as server:
+        print(f"[FILE] File {queue.path} servie sur {host}:{port}" + (" (jeton exigé)" if token else ""))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+class RemoteQueue:
+    """
+    Client d'une file servie par `serve_queue`, avec les mêmes méthodes que `WorkQueue`
+    pour un worker (`lease`, `renew`, `complete`, `fail`, `claim_urls`, `is_finished`...).
+
+    Args:
+        address (str): Adresse du coordinateur, 'hôte:port'.
+        timeout (float, optional): Timeout des appels en secondes.
+        token (str, optional): Jeton partagé du coordinateur (par défaut : variable d'environnement
+                               `QUEUE_TOKEN_ENV`).
+    """
+
+    def __init__(self, address, timeout=60, token=None):
+        host, _, port = address.rpartition(':')
+        self.path = f"tcp://{address}"
+        self._token = token or os.environ.get(QUEUE_TOKEN_ENV)
+        self._lock = threading.Lock()
+        self._socket = socket.create_connection((host, int(port)), timeout=timeout)
+        self._file = self._socket.makefile('rwb')
+
+    def _call(self, method, *args):
+        request = json.dumps({'method': method, 'args': args, 'token': self._token},
+                             ensure_ascii=False, default=to_json)
+        with self._lock:
+            self._file.write(request.encode('utf-8') + b'\n')
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError(f"[ERREUR] Connexion au coordinateur perdue ({self.path})")
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"[ERREUR] Coordinateur : {response['error']}")
+        return response['result']
+
+    def __getattr__(self, name):
+        if name in REMOTE_METHODS:
+            return lambda *args: self._call(name, *args)
+        raise AttributeError(name)
+
+    def close(self):
+        """
+        Ferme la connexion au coordinateur.
+        """
+        self._file.close()
+        self._socket.close()
+
+
+def open_queue(location=None, token=None):
+    """
+    Ouvre une file de travail locale (chemin SQLite) ou distante ('hôte:port').
+
+    Args:
+        location (str, optional): Chemin du fichier SQLite, ou adresse 'hôte:port' d'un coordinateur
+                                  (par défaut : la file locale .cache/work_queue.sqlite3).
+        token (str, optional): Jeton partagé d'un coordinateur distant.
+
+    Returns:
+        WorkQueue | RemoteQueue: La file ouverte.
+    """
+    if location is None:
+        return WorkQueue()
+    host, _, port = location.rpartition(':')
+    if host and port.isdigit():
+        return RemoteQueue(location, token=token)
+    return WorkQueue(location)